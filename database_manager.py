@@ -8,16 +8,39 @@ und das Migrations-System für zukünftige Updates.
 """
 import sqlite3
 import os
-import pandas as pd
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from collections import defaultdict
-import random
 from utils.settings_manager import SettingsManager
+from utils.constraint_engine import ConstraintEngine
+from utils.event_model import shift_interval, shift_duration, busy_in_window, event_id_list, MAX_SHIFT_MINUTES
+from utils.query_profiler import QueryProfiler, ProfiledCursor, PROFILE_ENV_VAR
+from utils.planning_trace import PlanningTrace, default_trace_path, PHASE_PREPARE, PHASE_SEARCH, PHASE_IMPROVE
+from utils.planner import PlanningProblem, search_best_plan, run_greedy
+from utils.local_search import improve_plan
+from utils.plan_draft import PlanDraft
+from utils.change_journal import ChangeJournal, create_journal_schema, install_triggers, is_journaled_write
+from utils.person_search import PersonSearch, create_person_search_schema
+from utils.shift_counters import create_counter_schema, refresh_after_replay
+from utils.age_eligibility import AgeEligibility
+from utils.unavailability import UnavailabilityIndex, create_unavailability_schema, unavailability_interval, parse_unavailability_row
+from utils.domain import HelperCandidate, WARN_NO_BREAK, WARN_DAILY_LIMIT, WARN_TOO_YOUNG, competence_flags, status_code
+
+STAFFING_KEYS = ("required", "assigned", "open", "missing_tl")
+# Jahresfilter als Bereichsvergleich auf dem Eventdatum, damit er vor dem Zusammenführen greift
+CURRENT_YEAR_FILTER = " AND e.start_date >= strftime('%Y', 'now') || '-01-01' AND e.start_date < strftime('%Y', 'now', '+1 year') || '-01-01'"
 
 class DatabaseManager:
     def __init__(self, db_path="vereinsplaner.db"):
         self.db_path = db_path
         self.conn = None
+        self._plan_validators = {}  # event_id -> ConstraintEngine (Live-Prüfung des Plans)
+        self._shift_times = {}      # shift_id -> (start_ts, end_ts), für Deltas aus fremden Events
+        self.profiler = None        # QueryProfiler, nur wenn Profiling aktiv ist
+        self.last_planning_trace = None  # PlanningTrace des letzten protokollierten Planungslaufs
+        self.last_planning_result = None # PlanResult des letzten Planungsvorschlags (Seed, Bewertung)
+        self._staffing_cache = {}        # letzte Besetzungsübersicht (get_staffing_rollup)
+        self._age_eligibility = {}       # Tupel von Event-IDs -> AgeEligibility
         self._connect()
         
         # 1. Basis-Struktur sicherstellen (für Neuinstallationen)
@@ -25,6 +48,14 @@ class DatabaseManager:
         
         # 2. Updates/Migrationen prüfen (für bestehende Nutzer bei Updates)
         self._check_and_run_migrations()
+        self.journal = ChangeJournal(self.conn, self._cursor, refresh_after_replay)
+        self.person_search = PersonSearch(self.conn)
+        self.unavailability = UnavailabilityIndex(self.conn)
+
+        # 3. Optionales Query-Profiling (Umgebungsvariable oder Einstellungen)
+        settings = SettingsManager()
+        if os.environ.get(PROFILE_ENV_VAR) or settings.get_query_profiling():
+            self.enable_profiling(settings.get_slow_query_ms())
 
     def _connect(self):
         try:
@@ -127,7 +158,7 @@ class DatabaseManager:
         cursor = self.conn.cursor()
         cursor.execute("PRAGMA user_version")
         current_db_version = cursor.fetchone()[0]
-        TARGET_VERSION = 1 
+        TARGET_VERSION = 10
         
         if current_db_version >= TARGET_VERSION:
             return
@@ -135,7 +166,50 @@ class DatabaseManager:
         print(f"Führe Datenbank-Migration durch: v{current_db_version} -> v{TARGET_VERSION}")
         try:
             cursor.execute("BEGIN TRANSACTION")
-            # (Platzhalter für zukünftige Migrationen)
+            if current_db_version < 2:
+                # v2: Schichtdauer in Minuten vorberechnen (Mitternacht einmalig beim Schreiben behandelt)
+                cursor.execute("ALTER TABLE shifts ADD COLUMN duration_min INTEGER")
+                cursor.execute("""
+                    UPDATE shifts SET duration_min = CASE
+                        WHEN (CAST(substr(end_time, 1, 2) AS INTEGER) * 60 + CAST(substr(end_time, 4, 2) AS INTEGER)) > (CAST(substr(start_time, 1, 2) AS INTEGER) * 60 + CAST(substr(start_time, 4, 2) AS INTEGER))
+                        THEN (CAST(substr(end_time, 1, 2) AS INTEGER) * 60 + CAST(substr(end_time, 4, 2) AS INTEGER)) - (CAST(substr(start_time, 1, 2) AS INTEGER) * 60 + CAST(substr(start_time, 4, 2) AS INTEGER))
+                        ELSE (CAST(substr(end_time, 1, 2) AS INTEGER) * 60 + CAST(substr(end_time, 4, 2) AS INTEGER)) - (CAST(substr(start_time, 1, 2) AS INTEGER) * 60 + CAST(substr(start_time, 4, 2) AS INTEGER)) + 1440
+                    END
+                """)
+            if current_db_version < 3:
+                # v3: Beginn/Ende als Epoch-Minuten, damit Zeitvergleiche ganzzahlig statt per strptime laufen
+                cursor.execute("ALTER TABLE shifts ADD COLUMN start_ts INTEGER")
+                cursor.execute("ALTER TABLE shifts ADD COLUMN end_ts INTEGER")
+                cursor.execute("UPDATE shifts SET start_ts = CAST(strftime('%s', shift_date || ' ' || start_time) AS INTEGER) / 60")
+                cursor.execute("UPDATE shifts SET end_ts = start_ts + duration_min")
+            if current_db_version < 4:
+                # v4: Änderungsjournal für Rückgängig/Wiederholen (Trigger schreiben in derselben Transaktion)
+                create_journal_schema(cursor)
+            if current_db_version < 5:
+                # v5: Zeitindex für Belegungsabfragen über Event-Grenzen hinweg (Doppelbuchungen, gemeinsame Planung)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_shifts_time ON shifts (start_ts, end_ts)")
+            if current_db_version < 6:
+                # v6: Volltextindex für die Personensuche (ohne FTS5 sucht PersonSearch per LIKE)
+                if not create_person_search_schema(cursor): print("FTS5 nicht verfügbar, Personensuche ohne Index.")
+            if current_db_version < 7:
+                # v7: Belegungszähler je Schicht, von Triggern gepflegt; Journal-Trigger ohne die neuen Spalten neu anlegen
+                create_counter_schema(cursor)
+                install_triggers(cursor)
+            if current_db_version < 8:
+                # v8: Mindestalter je Dienst-Typ statt fest verdrahteter Grenzen für "Bar" und "Kasse"
+                cursor.execute("ALTER TABLE duty_types ADD COLUMN min_age INTEGER NOT NULL DEFAULT 0")
+                settings = SettingsManager()
+                cursor.executemany("UPDATE duty_types SET min_age = ? WHERE name = ?", ((settings.get_min_age_bar(), "Bar"), (settings.get_min_age_kasse(), "Kasse")))
+            if current_db_version < 9:
+                # v9: Abwesenheiten der Mitglieder mit Intervallindex (ohne R*-Tree über den B-Baum-Index)
+                if not create_unavailability_schema(cursor): print("R*-Tree nicht verfügbar, Abwesenheiten ohne Intervallindex.")
+            if current_db_version < 10:
+                # v10: Schichten mit gleicher Anfangs- und Endzeit zählen 0 Stunden (v2 hatte 24 h eingetragen);
+                # end_ts bleibt einen Tag später, für Zeitkonflikte gilt die Schicht weiter als ganzer Tag.
+                # Korrektur am Bestand, keine Benutzeraktion: nicht ins Änderungsjournal schreiben
+                cursor.execute("UPDATE journal_state SET enabled = 0")
+                cursor.execute("UPDATE shifts SET duration_min = 0 WHERE start_time = end_time AND duration_min <> 0")
+                cursor.execute("UPDATE journal_state SET enabled = 1")
             cursor.execute(f"PRAGMA user_version = {TARGET_VERSION}")
             cursor.execute("COMMIT")
             print("Migration erfolgreich abgeschlossen.")
@@ -145,20 +219,141 @@ class DatabaseManager:
             raise RuntimeError("Datenbank-Update fehlgeschlagen.")
 
     def execute_query(self, query, params=(), fetch=None):
+        if self.profiler is not None: start = time.perf_counter()
         try:
             cursor = self.conn.cursor()
+            if fetch is None and is_journaled_write(query): self.journal.begin_group(cursor)  # Jede Einzeländerung ist eine eigene Aktion
+            cursor.execute(query, params)
+            if fetch == "one": result = cursor.fetchone(); rows = 0 if result is None else 1
+            elif fetch == "all": result = cursor.fetchall(); rows = len(result)
+            else: self.conn.commit(); result = cursor.lastrowid; rows = max(cursor.rowcount, 0)
+            if self.profiler is not None: self.profiler.record(query, params, (time.perf_counter() - start) * 1000.0, rows)
+            return result
+        except sqlite3.Error as e:
+            print(f"Fehler bei der Abfrage: {e}\nQuery: {query}")
+            self.conn.rollback()
+            return None
+
+    # --- Profiling ---
+    def enable_profiling(self, slow_threshold_ms=100):
+        """Schaltet die Messung aller Abfragen ein (bestehende Messwerte bleiben erhalten)."""
+        if self.profiler is None: self.profiler = QueryProfiler(self.conn, slow_threshold_ms)
+        else: self.profiler.slow_threshold_ms = slow_threshold_ms
+
+    def disable_profiling(self):
+        self.profiler = None
+
+    def _cursor(self):
+        """Roh-Cursor für Transaktionen; bei aktivem Profiling gemessen."""
+        cursor = self.conn.cursor()
+        return ProfiledCursor(cursor, self.profiler) if self.profiler is not None else cursor
+
+    # --- Rückgängig / Wiederholen ---
+    def _execute_change(self, label, query, params=()):
+        """Wie execute_query für eine schreibende Abfrage, aber mit eigener Bezeichnung im Journal."""
+        try:
+            cursor = self._cursor()
+            self.journal.begin_group(cursor, label)
             cursor.execute(query, params)
-            if fetch == "one": return cursor.fetchone()
-            if fetch == "all": return cursor.fetchall()
             self.conn.commit()
-            return cursor.lastrowid
+            return cursor.rowcount
         except sqlite3.Error as e:
             print(f"Fehler bei der Abfrage: {e}\nQuery: {query}")
             self.conn.rollback()
             return None
 
+    def undo_label(self): return self.journal.undo_label()
+    def redo_label(self): return self.journal.redo_label()
+
+    def undo(self):
+        """Macht die letzte Aktion in einer Transaktion rückgängig; liefert ihre Bezeichnung oder None."""
+        return self._replay_journal(self.journal.undo)
+
+    def redo(self):
+        return self._replay_journal(self.journal.redo)
+
+    def _replay_journal(self, action):
+        try:
+            label = action()
+        except sqlite3.Error as e:
+            print(f"Datenbankfehler beim Rückgängigmachen/Wiederholen: {e}")
+            return None
+        if label is not None: self._invalidate_plan_validators()
+        return label
+
+    # --- Cache der Plan-Prüfung ---
+    def _apply_assignment_delta(self, person_id, shift_id, added):
+        """Spielt eine Zuweisungsänderung in die Live-Prüfung aller geöffneten Events ein."""
+        for validator in self._plan_validators.values():
+            if shift_id in validator.model.shifts: validator.apply_assignment(person_id, shift_id, added)
+            elif validator.model.window is not None and self._touches_window(shift_id, validator.model.window):
+                validator._needs_full_run = True  # Schicht eines anderen Events am Rand oder innerhalb dieses Events
+
+    def _touches_window(self, shift_id, window):
+        times = self._shift_times.get(shift_id)
+        if times is None:
+            row = self.execute_query("SELECT start_ts, end_ts FROM shifts WHERE shift_id = ?", (shift_id,), fetch="one")
+            times = self._shift_times[shift_id] = (row["start_ts"], row["end_ts"]) if row else (None, None)
+        return times[0] is not None and times[0] <= window[1] and times[1] >= window[0]
+
+    def get_constraint_engine(self, event_id):
+        """Liefert die Live-Prüfung eines Events (wird beim ersten Zugriff einmal komplett geladen)."""
+        engine = self._plan_validators.get(event_id)
+        if engine is None:
+            engine = ConstraintEngine(self, event_id)
+            self._plan_validators[event_id] = engine
+        engine.ensure_loaded()
+        return engine
+
+    def get_live_plan_status(self, event_id):
+        """Kennzahlen für Statusleiste und Badges, direkt aus den Zählern der Live-Prüfung."""
+        engine = self.get_constraint_engine(event_id)
+        required, assigned = engine.staffing()
+        errors, warnings = engine.issue_counts()
+        return {"required": required, "assigned": assigned, "missing_tl": engine.missing_team_leaders(), "errors": errors, "warnings": warnings, "shift_badges": engine.shift_badges}
+
+    def _invalidate_plan_validators(self):
+        """Verwirft alle Prüf-Caches (bei Änderungen an Struktur oder Personendaten)."""
+        self._plan_validators.clear()
+        self._shift_times.clear()
+
+    def _invalidate_plan_validators_for(self, event_id):
+        """Lädt die Live-Prüfung dieser Events und der Events, deren Zeitfenster ihre Schichten berührt, beim nächsten Abruf komplett neu
+        (nach Änderungen an vielen Zuweisungen auf einmal). Bei Löschungen vor dem Löschen aufrufen: der Zeitraum kommt aus den Schichten."""
+        ids = event_id_list(event_id)
+        if not self._plan_validators or not ids: return
+        row = self.execute_query(f"SELECT MIN(s.start_ts), MAX(s.end_ts) FROM shifts s JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id IN ({', '.join('?' * len(ids))})", ids, fetch="one")
+        lo, hi = (row[0], row[1]) if row else (None, None)
+        for validator in self._plan_validators.values():
+            window = validator.model.window
+            if set(validator.model.event_ids) & set(ids) or (lo is not None and window is not None and lo <= window[1] and hi >= window[0]):
+                validator._needs_full_run = True
+
+    def _assignment_event_ids(self, assignment_ids):
+        ids = tuple(assignment_ids)
+        if not ids: return ()
+        rows = self.execute_query(f"SELECT DISTINCT t.event_id FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id WHERE a.assignment_id IN ({', '.join('?' * len(ids))})", ids, fetch="all") or []
+        return tuple(row["event_id"] for row in rows)
+
+    def get_age_eligibility(self, event_id):
+        """Jugendschutz-Bitsets (Person × Tag) für ein Event oder mehrere; bleibt bis zur nächsten
+        Änderung an Geburtsdaten, Personen oder Mindestaltern erhalten."""
+        key = event_id_list(event_id)
+        eligibility = self._age_eligibility.get(key)
+        if eligibility is None:
+            events = ", ".join("?" * len(key))
+            days = [row[0] for row in self.execute_query(f"SELECT DISTINCT s.shift_date FROM shifts s JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id IN ({events})", key, fetch="all") or []]
+            min_ages = [row[0] for row in self.execute_query(f"SELECT DISTINCT dt.min_age FROM tasks t JOIN duty_types dt ON t.duty_type_id = dt.duty_type_id WHERE t.event_id IN ({events})", key, fetch="all") or []]
+            births = {row[0]: row[1] for row in self.execute_query("SELECT person_id, birth_date FROM persons", fetch="all") or []}
+            eligibility = self._age_eligibility[key] = AgeEligibility(days, births, min_ages)
+        return eligibility
+
+    def _invalidate_age_eligibility(self):
+        self._age_eligibility.clear()
+
     # --- Personen ---
     def add_person(self, **kwargs):
+        self._invalidate_age_eligibility()
         cols = ", ".join(kwargs.keys()); placeholders = ", ".join("?" * len(kwargs))
         return self.execute_query(f"INSERT INTO persons ({cols}) VALUES ({placeholders})", tuple(kwargs.values()))
 
@@ -167,14 +362,18 @@ class DatabaseManager:
             old_status = self.execute_query("SELECT status FROM persons WHERE person_id = ?", (person_id,), fetch="one")
             if old_status and old_status["status"] in ("Ruht", "Austritt") and kwargs["status"] == "Aktiv":
                 self.execute_query("DELETE FROM assignments WHERE person_id = ? OR substitute_person_id = ?", (person_id, person_id))
+        self._invalidate_plan_validators()
+        if "birth_date" in kwargs: self._invalidate_age_eligibility()
         updates = ", ".join([f"{key} = ?" for key in kwargs])
         return self.execute_query(f"UPDATE persons SET {updates} WHERE person_id = ?", tuple(kwargs.values()) + (person_id,))
 
-    def delete_person(self, person_id): return self.execute_query("DELETE FROM persons WHERE person_id = ?", (person_id,))
+    def delete_person(self, person_id): self._invalidate_plan_validators(); return self.execute_query("DELETE FROM persons WHERE person_id = ?", (person_id,))
     def get_person_by_id(self, person_id): return self.execute_query("SELECT * FROM persons WHERE person_id = ?", (person_id,), fetch="one")
+    def search_person_ids(self, text): return self.person_search.person_ids(text)  # None bei leerer Eingabe
     def get_all_persons(self): return self.execute_query("SELECT * FROM persons ORDER BY last_name, first_name", fetch="all")
 
     def import_members(self, members_data):
+        import pandas as pd  # erst beim Import laden (Programmstart ohne pandas)
         added_count = 0; skipped_count = 0
         existing_rows = self.execute_query("SELECT lower(first_name), lower(last_name), lower(display_name) FROM persons", fetch="all")
         existing_names = {(row[0], row[1]) for row in existing_rows}
@@ -223,23 +422,27 @@ class DatabaseManager:
             existing_names.add((first_name.lower(), last_name.lower()))
             self.add_person(**person_data)
             added_count += 1
+        self._invalidate_plan_validators()
         return added_count, skipped_count
 
     # --- Dienst-Typen ---
-    def add_duty_type(self, name, description=""): return self.execute_query("INSERT INTO duty_types (name, description) VALUES (?, ?)", (name, description))
-    def update_duty_type(self, duty_type_id, name, description):
+    def add_duty_type(self, name, description="", min_age=0): return self.execute_query("INSERT INTO duty_types (name, description, min_age) VALUES (?, ?, ?)", (name, description, min_age))
+    def update_duty_type(self, duty_type_id, name, description, min_age=None):
             # Prüfen, ob geschützt
             check_query = "SELECT is_protected FROM duty_types WHERE duty_type_id = ?"
             is_protected = self.execute_query(check_query, (duty_type_id,), fetch="one")[0]
-            
+
+            # Mindestalter (None = unverändert) ist auch bei geschützten Diensten änderbar
+            if min_age is not None: self._invalidate_age_eligibility()
+            self._invalidate_plan_validators()
             if is_protected:
                 # NEU: Bei geschützten Diensten nur Beschreibung ändern, Name ignorieren!
-                query = "UPDATE duty_types SET description = ? WHERE duty_type_id = ?"
-                return self.execute_query(query, (description, duty_type_id))
+                query = "UPDATE duty_types SET description = ?, min_age = COALESCE(?, min_age) WHERE duty_type_id = ?"
+                return self.execute_query(query, (description, min_age, duty_type_id))
             else:
                 # Normales Update
-                query = "UPDATE duty_types SET name = ?, description = ? WHERE duty_type_id = ?"
-                return self.execute_query(query, (name, description, duty_type_id))
+                query = "UPDATE duty_types SET name = ?, description = ?, min_age = COALESCE(?, min_age) WHERE duty_type_id = ?"
+                return self.execute_query(query, (name, description, min_age, duty_type_id))
     def delete_duty_type(self, duty_type_id):
         if self.execute_query("SELECT is_protected FROM duty_types WHERE duty_type_id = ?", (duty_type_id,), fetch="one")[0]: return None
         return self.execute_query("DELETE FROM duty_types WHERE duty_type_id = ?", (duty_type_id,))
@@ -255,42 +458,115 @@ class DatabaseManager:
         return [row["duty_type_id"] for row in rows] if rows else []
     def set_person_restrictions(self, person_id, duty_type_ids):
         if len(duty_type_ids) > 3: return
+        self._invalidate_plan_validators()
         self.execute_query("DELETE FROM person_duty_restrictions WHERE person_id = ?", (person_id,))
         for did in duty_type_ids: self.execute_query("INSERT INTO person_duty_restrictions (person_id, duty_type_id) VALUES (?, ?)", (person_id, did))
+    def get_person_unavailability(self, person_id):
+        return self.execute_query("SELECT * FROM person_unavailability WHERE person_id = ? ORDER BY start_ts", (person_id,), fetch="all") or []
+    def set_person_unavailability(self, person_id, periods):
+        """Ersetzt die Abwesenheiten einer Person; periods = [(start_date, start_time, end_date, end_time, reason), ...]."""
+        rows = [(person_id, *period[:4], *unavailability_interval(*period[:4]), period[4]) for period in periods]
+        try:
+            cursor = self._cursor()
+            cursor.execute("BEGIN TRANSACTION")
+            self.journal.begin_group(cursor, "Abwesenheiten")
+            cursor.execute("DELETE FROM person_unavailability WHERE person_id = ?", (person_id,))
+            cursor.executemany("INSERT INTO person_unavailability (person_id, start_date, start_time, end_date, end_time, start_ts, end_ts, reason) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            cursor.execute("COMMIT")
+            return True
+        except sqlite3.Error as e:
+            print(f"Datenbankfehler beim Speichern der Abwesenheiten: {e}")
+            if self.conn: self.conn.rollback()
+            return False
+    def import_unavailability(self, rows):
+        """Übernimmt Abwesenheiten aus einer CSV-Datei (Zuordnung über den Anzeigenamen).
+        Zeilen mit unbekanntem Namen, ungültigen Daten oder bereits erfasstem Zeitraum werden übersprungen."""
+        persons = {row[1].lower(): row[0] for row in self.execute_query("SELECT person_id, display_name FROM persons", fetch="all") or []}
+        existing = {tuple(row) for row in self.execute_query("SELECT person_id, start_ts, end_ts FROM person_unavailability", fetch="all") or []}
+        new_rows = []; skipped_count = 0
+        for row in rows:
+            try:
+                name, start_date, start_time, end_date, end_time, reason = parse_unavailability_row(row)
+                start, end = unavailability_interval(start_date, start_time, end_date, end_time)
+            except ValueError: skipped_count += 1; continue
+            person_id = persons.get(name.lower())
+            if person_id is None or (person_id, start, end) in existing: skipped_count += 1; continue
+            existing.add((person_id, start, end))
+            new_rows.append((person_id, start_date, start_time, end_date, end_time, start, end, reason))
+        if not new_rows: return 0, skipped_count
+        try:
+            cursor = self._cursor()
+            cursor.execute("BEGIN TRANSACTION")
+            self.journal.begin_group(cursor, "Abwesenheiten importieren")
+            cursor.executemany("INSERT INTO person_unavailability (person_id, start_date, start_time, end_date, end_time, start_ts, end_ts, reason) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", new_rows)
+            cursor.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"Datenbankfehler beim Import der Abwesenheiten: {e}")
+            if self.conn: self.conn.rollback()
+            return 0, len(rows)
+        return len(new_rows), skipped_count
+    def get_unavailable_shift_pairs(self, event_id):
+        """{(person_id, shift_id)}: Schichten der Events, die in eine Abwesenheit fallen (Abfrage über den Intervallindex)."""
+        return self.unavailability.shift_conflicts(event_id_list(event_id))
     def get_person_competencies(self, person_id):
         rows = self.execute_query("SELECT duty_type_id, is_team_leader FROM person_competencies WHERE person_id = ?", (person_id,), fetch="all")
         return {row["duty_type_id"]: row["is_team_leader"] for row in rows} if rows else {}
     def set_person_competencies(self, person_id, competencies):
+        self._invalidate_plan_validators()
         self.execute_query("DELETE FROM person_competencies WHERE person_id = ?", (person_id,))
         for did, is_tl in competencies.items(): self.execute_query("INSERT INTO person_competencies (person_id, duty_type_id, is_team_leader) VALUES (?, ?, ?)", (person_id, did, is_tl))
 
     # --- Events & Shifts ---
+    def get_events_in_range(self, start_date, end_date): return self.execute_query("SELECT * FROM events WHERE start_date <= ? AND COALESCE(end_date, start_date) >= ? ORDER BY start_date", (end_date, start_date), fetch="all")
+    def get_overlapping_events(self, event_id):
+        """Events, deren Zeitraum sich mit dem des Events überschneidet (einschließlich des Events selbst)."""
+        event = self.get_event_by_id(event_id)
+        return self.get_events_in_range(event["start_date"], event["end_date"] or event["start_date"]) if event else []
     def get_all_events(self): return self.execute_query("SELECT * FROM events ORDER BY start_date DESC", fetch="all")
     def get_event_by_id(self, event_id): return self.execute_query("SELECT * FROM events WHERE event_id = ?", (event_id,), fetch="one")
     def add_event(self, name, start_date, end_date=None, status="In Planung"): return self.execute_query("INSERT INTO events (name, start_date, end_date, status) VALUES (?, ?, ?, ?)", (name, start_date, end_date, status))
     def update_event(self, event_id, **kwargs):
         updates = ", ".join([f"{key} = ?" for key in kwargs])
         return self.execute_query(f"UPDATE events SET {updates} WHERE event_id = ?", tuple(kwargs.values()) + (event_id,))
-    def delete_event(self, event_id): return self.execute_query("DELETE FROM events WHERE event_id = ?", (event_id,))
+    def delete_event(self, event_id):
+        self._invalidate_plan_validators_for(event_id)
+        self._plan_validators.pop(event_id, None)
+        return self.execute_query("DELETE FROM events WHERE event_id = ?", (event_id,))
     def get_tasks_for_event(self, event_id): return self.execute_query("SELECT * FROM tasks WHERE event_id = ? ORDER BY name", (event_id,), fetch="all")
     def get_shifts_for_task(self, task_id):
-        return self.execute_query("SELECT s.*, COUNT(a.assignment_id) as assigned_count FROM shifts s LEFT JOIN assignments a ON s.shift_id = a.shift_id WHERE s.task_id = ? GROUP BY s.shift_id ORDER BY s.shift_date, s.start_time", (task_id,), fetch="all")
-    def add_shift(self, task_id, shift_date, start_time, end_time, required_people=1): return self.execute_query("INSERT INTO shifts (task_id, shift_date, start_time, end_time, required_people) VALUES (?, ?, ?, ?, ?)", (task_id, shift_date, start_time, end_time, required_people))
+        return self.execute_query("SELECT * FROM shifts WHERE task_id = ? ORDER BY shift_date, start_time", (task_id,), fetch="all")
+    def add_shift(self, task_id, shift_date, start_time, end_time, required_people=1):
+        self._invalidate_plan_validators()
+        start_ts, end_ts = shift_interval(shift_date, start_time, end_time)
+        return self.execute_query("INSERT INTO shifts (task_id, shift_date, start_time, end_time, required_people, duration_min, start_ts, end_ts) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (task_id, shift_date, start_time, end_time, required_people, shift_duration(start_ts, end_ts), start_ts, end_ts))
     def add_task(self, event_id, duty_type_id, name, description=""): return self.execute_query("INSERT INTO tasks (event_id, duty_type_id, name, description) VALUES (?, ?, ?, ?)", (event_id, duty_type_id, name, description))
     def get_task_by_id(self, task_id): return self.execute_query("SELECT * FROM tasks WHERE task_id = ?", (task_id,), fetch="one")
     def update_task(self, task_id, **kwargs):
+        self._invalidate_plan_validators()
         updates = ", ".join([f"{key} = ?" for key in kwargs])
         return self.execute_query(f"UPDATE tasks SET {updates} WHERE task_id = ?", tuple(kwargs.values()) + (task_id,))
-    def delete_task(self, task_id): return self.execute_query("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+    def delete_task(self, task_id): self._invalidate_plan_validators(); return self.execute_query("DELETE FROM tasks WHERE task_id = ?", (task_id,))
     def get_shift_by_id(self, shift_id): return self.execute_query("SELECT * FROM shifts WHERE shift_id = ?", (shift_id,), fetch="one")
     def update_shift(self, shift_id, **kwargs):
+        self._invalidate_plan_validators()
+        if "shift_date" in kwargs or "start_time" in kwargs or "end_time" in kwargs:
+            current = self.get_shift_by_id(shift_id)
+            if current:
+                start_ts, end_ts = shift_interval(kwargs.get("shift_date", current["shift_date"]), kwargs.get("start_time", current["start_time"]), kwargs.get("end_time", current["end_time"]))
+                kwargs.update(duration_min=shift_duration(start_ts, end_ts), start_ts=start_ts, end_ts=end_ts)
         updates = ", ".join([f"{key} = ?" for key in kwargs])
         return self.execute_query(f"UPDATE shifts SET {updates} WHERE shift_id = ?", tuple(kwargs.values()) + (shift_id,))
-    def delete_shift(self, shift_id): return self.execute_query("DELETE FROM shifts WHERE shift_id = ?", (shift_id,))
-    def assign_person_to_shift(self, person_id, shift_id): return self.execute_query("INSERT INTO assignments (person_id, shift_id) VALUES (?, ?)", (person_id, shift_id))
+    def delete_shift(self, shift_id): self._invalidate_plan_validators(); return self.execute_query("DELETE FROM shifts WHERE shift_id = ?", (shift_id,))
+    def assign_person_to_shift(self, person_id, shift_id):
+        new_id = self.execute_query("INSERT INTO assignments (person_id, shift_id) VALUES (?, ?)", (person_id, shift_id))
+        if new_id is not None: self._apply_assignment_delta(person_id, shift_id, True)
+        return new_id
     def get_assigned_persons_for_shift(self, shift_id):
         return self.execute_query("SELECT p.person_id, p.display_name, COALESCE(pc.is_team_leader, 0) AS is_team_leader, CASE WHEN pc.person_id IS NOT NULL THEN 1 ELSE 0 END AS has_competence FROM assignments a JOIN persons p ON a.person_id = p.person_id JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id LEFT JOIN person_competencies pc ON p.person_id = pc.person_id AND t.duty_type_id = pc.duty_type_id WHERE a.shift_id = ? ORDER BY p.display_name", (shift_id,), fetch='all')
-    def remove_person_from_shift(self, person_id, shift_id): return self.execute_query("DELETE FROM assignments WHERE person_id = ? AND shift_id = ?", (person_id, shift_id))
+    def remove_person_from_shift(self, person_id, shift_id):
+        result = self.execute_query("DELETE FROM assignments WHERE person_id = ? AND shift_id = ?", (person_id, shift_id))
+        if result is not None: self._apply_assignment_delta(person_id, shift_id, False)
+        return result
 
     # --- Hilfsmethode Alter ---
     def _calculate_age_at_date(self, birth_date_str, event_date_str):
@@ -303,44 +579,39 @@ class DatabaseManager:
 
     # --- Helfer-Auswahl (mit Warnungen) ---
     def get_available_helpers_for_shift(self, shift_id):
-        shift_info = self.execute_query("SELECT s.shift_date, s.start_time, s.end_time, t.duty_type_id, t.event_id, t.name as task_name, dt.name as duty_name FROM shifts s JOIN tasks t ON s.task_id = t.task_id JOIN duty_types dt ON t.duty_type_id = dt.duty_type_id WHERE s.shift_id = ?", (shift_id,), fetch='one')
+        shift_info = self.execute_query("SELECT s.shift_date, s.start_ts, s.end_ts, t.duty_type_id, t.event_id, t.name as task_name, dt.name as duty_name, dt.min_age FROM shifts s JOIN tasks t ON s.task_id = t.task_id JOIN duty_types dt ON t.duty_type_id = dt.duty_type_id WHERE s.shift_id = ?", (shift_id,), fetch='one')
         if not shift_info: return []
         
         shift_date = shift_info['shift_date']
-        duty_name = shift_info['duty_name']
-        start_time, end_time, duty_type_id, event_id = shift_info['start_time'], shift_info['end_time'], shift_info['duty_type_id'], shift_info['event_id']
-        
-        new_start = datetime.strptime(f"{shift_date} {start_time}", "%Y-%m-%d %H:%M")
-        new_end = datetime.strptime(f"{shift_date} {end_time}", "%Y-%m-%d %H:%M")
-        if new_end <= new_start: new_end += timedelta(days=1)
+        min_age = shift_info['min_age'] or 0
+        new_start, new_end, duty_type_id = shift_info['start_ts'], shift_info['end_ts'], shift_info['duty_type_id']
 
-        potential_helpers = self.execute_query("""
+        potential_helpers = self.execute_query(f"""
             SELECT p.person_id, p.display_name, p.status, p.birth_date 
             FROM persons p 
             WHERE p.status IN ('Aktiv', 'Passiv') 
               AND NOT EXISTS (SELECT 1 FROM person_duty_restrictions WHERE person_id = p.person_id AND duty_type_id = ?) 
-              AND NOT EXISTS (SELECT 1 FROM assignments WHERE person_id = p.person_id AND shift_id = ?)
-        """, (duty_type_id, shift_id), fetch='all')
+              AND p.person_id NOT IN (SELECT person_id FROM assignments WHERE shift_id = ?)
+              AND p.person_id NOT IN ({self.unavailability.person_subquery()})
+        """, (duty_type_id, shift_id, new_end, new_start), fetch='all')
         
         if not potential_helpers: return []
 
         all_scores = self.calculate_scores(include_inactive=True)
         score_map = {s['person_id']: s['total_score'] for s in all_scores}
 
-        all_assignments = self.execute_query("SELECT a.person_id, s.shift_date, s.start_time, s.end_time FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ?", (event_id,), fetch='all')
+        # Belegung über alle Events (Zeitindex): wer in einem parallelen Event eingeteilt ist, ist hier nicht verfügbar
+        all_assignments = busy_in_window(self, new_start - MAX_SHIFT_MINUTES, new_end + MAX_SHIFT_MINUTES)
         person_schedule = defaultdict(list)
         duties_per_day = defaultdict(lambda: defaultdict(int))
         for row in all_assignments:
-            s_start = datetime.strptime(f"{row['shift_date']} {row['start_time']}", "%Y-%m-%d %H:%M")
-            s_end = datetime.strptime(f"{row['shift_date']} {row['end_time']}", "%Y-%m-%d %H:%M")
-            if s_end <= s_start: s_end += timedelta(days=1)
-            person_schedule[row['person_id']].append((s_start, s_end))
+            person_schedule[row['person_id']].append((row['start_ts'], row['end_ts']))
             duties_per_day[row['person_id']][row['shift_date']] += 1
 
-        settings = SettingsManager()
-        min_age = 0
-        if duty_name == "Bar": min_age = settings.get_min_age_bar()
-        elif duty_name == "Kasse": min_age = settings.get_min_age_kasse()
+        eligibility = self.get_age_eligibility(shift_info['event_id']) if min_age > 0 else None
+
+        competence_rows = self.execute_query("SELECT person_id, is_team_leader FROM person_competencies WHERE duty_type_id = ?", (duty_type_id,), fetch='all') or []
+        competencies = {row['person_id']: row['is_team_leader'] for row in competence_rows}
 
         final_list = []
         for helper in potential_helpers:
@@ -354,36 +625,47 @@ class DatabaseManager:
                     consecutive_warning = True
             if has_overlap: continue
 
-            warnings = []
-            if consecutive_warning: warnings.append("Keine Pause")
+            warnings = WARN_NO_BREAK if consecutive_warning else 0
             daily_count = duties_per_day[pid][shift_date]
-            if daily_count >= 2: warnings.append(f"{daily_count} Dienste heute")
-
-            if min_age > 0:
-                age = self._calculate_age_at_date(helper['birth_date'], shift_date)
-                if age < min_age: warnings.append(f"Zu jung ({age})")
-
-            competence = self.execute_query("SELECT is_team_leader FROM person_competencies WHERE person_id = ? AND duty_type_id = ?", (pid, duty_type_id), fetch='one')
-            
-            final_list.append({
-                'person_id': pid,
-                'display_name': helper['display_name'],
-                'status': helper['status'],
-                'score': score_map.get(pid, 0),
-                'has_competence': 1 if competence else 0,
-                'is_team_leader': competence['is_team_leader'] if competence else 0,
-                'warnings': ", ".join(warnings)
-            })
-        
-        final_list.sort(key=lambda x: (-x['is_team_leader'], -x['has_competence'], -(len(x['warnings']) == 0), x['display_name']))
+            if daily_count >= 2: warnings |= WARN_DAILY_LIMIT
+            age = 0
+            if eligibility is not None and not eligibility.is_eligible(pid, min_age, shift_date):
+                age = self._calculate_age_at_date(helper['birth_date'], shift_date)   # nur für den Warntext
+                warnings |= WARN_TOO_YOUNG
+
+            final_list.append(HelperCandidate(pid, helper['display_name'], status_code(helper['status']), score_map.get(pid, 0), competence_flags(competencies.get(pid)), warnings, daily_count, age))
+
+        final_list.sort(key=HelperCandidate.sort_key)
         return final_list
 
     def update_assignment_status(self, assignment_id, status, substitute_id=None):
-        return self.execute_query("UPDATE assignments SET attendance_status = ?, substitute_person_id = ? WHERE assignment_id = ?", (status, substitute_id, assignment_id))
+        result = self.execute_query("UPDATE assignments SET attendance_status = ?, substitute_person_id = ? WHERE assignment_id = ?", (status, substitute_id, assignment_id))
+        if result is not None: self._invalidate_plan_validators_for(self._assignment_event_ids([assignment_id]))
+        return result
 
-    def calculate_scores(self, include_inactive=False, limit=None):
-        query = "SELECT p.person_id, p.display_name, p.status, a.attendance_status, a.substitute_person_id, e.start_date FROM persons p LEFT JOIN assignments a ON p.person_id = a.person_id OR p.person_id = a.substitute_person_id LEFT JOIN shifts s ON a.shift_id = s.shift_id LEFT JOIN tasks t ON s.task_id = t.task_id LEFT JOIN events e ON t.event_id = e.event_id ORDER BY p.person_id, e.start_date DESC"
-        all_assignments = self.execute_query(query, fetch="all")
+    def update_assignment_statuses(self, changes, label="Nachbereitung"):
+        """Schreibt [(status, substitute_id, assignment_id), ...] in einer Transaktion (eine Aktion im Journal)."""
+        if not changes: return True
+        try:
+            cursor = self._cursor()
+            cursor.execute("BEGIN TRANSACTION")
+            self.journal.begin_group(cursor, label)
+            cursor.executemany("UPDATE assignments SET attendance_status = ?, substitute_person_id = ? WHERE assignment_id = ?", changes)
+            cursor.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"Datenbankfehler beim Speichern der Nachbereitung: {e}")
+            if self.conn: self.conn.rollback()
+            return False
+        self._invalidate_plan_validators_for(self._assignment_event_ids(change[2] for change in changes))
+        return True
+
+    def calculate_scores(self, include_inactive=False, limit=None, exclude_event_ids=()):
+        """Punktestand pro Person; Zuweisungen in exclude_event_ids zählen nicht (Neuplanung eines Events).
+        Eigene Dienste und Vertretungen kommen als UNION ALL (ein Join mit OR vergliche jede Person mit jeder Zuweisung)."""
+        exclude = tuple(exclude_event_ids)
+        skip = f" AND shift_id NOT IN (SELECT s2.shift_id FROM shifts s2 JOIN tasks t2 ON s2.task_id = t2.task_id WHERE t2.event_id IN ({', '.join('?' * len(exclude))}))" if exclude else ""
+        query = f"WITH roles AS (SELECT person_id AS role_person_id, shift_id, attendance_status, substitute_person_id FROM assignments WHERE 1{skip} UNION ALL SELECT substitute_person_id, shift_id, attendance_status, substitute_person_id FROM assignments WHERE substitute_person_id IS NOT NULL AND substitute_person_id <> person_id{skip}) SELECT p.person_id, p.display_name, p.status, a.attendance_status, a.substitute_person_id, e.start_date FROM persons p LEFT JOIN roles a ON a.role_person_id = p.person_id LEFT JOIN shifts s ON a.shift_id = s.shift_id LEFT JOIN tasks t ON s.task_id = t.task_id LEFT JOIN events e ON t.event_id = e.event_id ORDER BY p.person_id, e.start_date DESC"
+        all_assignments = self.execute_query(query, exclude * 2, fetch="all")
         if not all_assignments: return []
         scores = {}; person_duties_count = {}
         for row in all_assignments:
@@ -404,16 +686,41 @@ class DatabaseManager:
         final_scores.sort(key=lambda x: x["total_score"], reverse=True)
         return final_scores
 
+    def get_staffing_rollup(self, event_ids):
+        """Besetzung je Event und Tag aus einer Aggregat-Abfrage:
+        {event_id: {"total": Kennzahlen, "days": {datum: Kennzahlen}}} mit den Kennzahlen
+        required, assigned, open (unbesetzte Plätze) und missing_tl (besetzte Schichten ohne Teamleiter).
+        Zwischengespeichert, bis über diese Verbindung wieder etwas geändert wird."""
+        ids = event_id_list(event_ids)
+        key = (self.conn.total_changes, tuple(sorted(ids)))
+        if self._staffing_cache.get("key") == key: return self._staffing_cache["rollup"]
+        rollup = {eid: {"total": dict.fromkeys(STAFFING_KEYS, 0), "days": {}} for eid in ids}
+        if ids:
+            placeholders = ", ".join("?" * len(ids))
+            rows = self.execute_query(f"""
+                SELECT t.event_id, s.shift_date, SUM(s.required_people) AS required, SUM(s.assigned_count) AS assigned,
+                       SUM(MAX(s.required_people - s.assigned_count, 0)) AS open, SUM(s.assigned_count > 0 AND s.tl_count = 0) AS missing_tl
+                FROM shifts s JOIN tasks t ON s.task_id = t.task_id
+                WHERE t.event_id IN ({placeholders}) GROUP BY t.event_id, s.shift_date ORDER BY t.event_id, s.shift_date""", tuple(ids), fetch="all") or []
+            for row in rows:
+                entry = rollup[row["event_id"]]
+                entry["days"][row["shift_date"]] = {k: row[k] for k in STAFFING_KEYS}
+                for k in STAFFING_KEYS: entry["total"][k] += row[k]
+        self._staffing_cache = {"key": key, "rollup": rollup}
+        return rollup
+
     def get_event_staffing_summary(self, event_id):
-        s = self.execute_query("SELECT (SELECT COALESCE(SUM(s.required_people), 0) FROM shifts s JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ?) AS total_required, (SELECT COALESCE(COUNT(a.assignment_id), 0) FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ?) AS total_assigned", (event_id, event_id), fetch="one")
-        return (s["total_required"], s["total_assigned"]) if s else (0, 0)
+        """(benötigt, besetzt) für ein Event oder die Summe über mehrere."""
+        totals = [entry["total"] for entry in self.get_staffing_rollup(event_id).values()]
+        return sum(t["required"] for t in totals), sum(t["assigned"] for t in totals)
 
     def check_team_leader_compliance(self, event_id):
-        rows = self.execute_query("SELECT s.shift_id FROM shifts s JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ? AND (SELECT COUNT(a.assignment_id) FROM assignments a WHERE a.shift_id = s.shift_id) > 0 AND NOT EXISTS (SELECT 1 FROM assignments a JOIN persons p ON a.person_id = p.person_id JOIN person_competencies pc ON p.person_id = pc.person_id WHERE a.shift_id = s.shift_id AND pc.duty_type_id = t.duty_type_id AND pc.is_team_leader = 1)", (event_id,), fetch="all")
+        rows = self.execute_query("SELECT s.shift_id FROM shifts s JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ? AND s.assigned_count > 0 AND s.tl_count = 0", (event_id,), fetch="all")
         return [row["shift_id"] for row in rows]
 
     def clear_assignments_for_event(self, event_id):
-        self.execute_query("DELETE FROM assignments WHERE shift_id IN (SELECT s.shift_id FROM shifts s JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ?)", (event_id,))
+        self._execute_change("Plan leeren", "DELETE FROM assignments WHERE shift_id IN (SELECT s.shift_id FROM shifts s JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ?)", (event_id,))
+        self._invalidate_plan_validators_for(event_id)
 
     # --- Anhänge ---
     def add_attachment(self, event_id, file_path):
@@ -436,8 +743,11 @@ class DatabaseManager:
                 old_end = datetime.strptime(source_event['end_date'], "%Y-%m-%d")
                 new_end = old_end + delta
                 new_end_date_str = new_end.strftime("%Y-%m-%d")
-            cursor = self.conn.cursor()
+            day_offset = f"{delta.days:+d} days"
+            minute_offset = delta.days * 24 * 60
+            cursor = self._cursor()
             cursor.execute("BEGIN TRANSACTION")
+            self.journal.begin_group(cursor, f"Event kopieren ({new_name})")
             cursor.execute("INSERT INTO events (name, start_date, end_date, status) VALUES (?, ?, ?, 'In Planung')", (new_name, new_start_date_str, new_end_date_str))
             new_event_id = cursor.lastrowid
             cursor.execute("SELECT * FROM event_attachments WHERE event_id = ? ORDER BY position", (source_event_id,))
@@ -451,164 +761,130 @@ class DatabaseManager:
                 cursor.execute("INSERT INTO tasks (event_id, duty_type_id, name, description) VALUES (?, ?, ?, ?)", (new_event_id, task['duty_type_id'], task['name'], task['description']))
                 new_task_id = cursor.lastrowid
                 if mode == 'structure': continue
-                cursor.execute("SELECT * FROM shifts WHERE task_id = ?", (task['task_id'],))
+                cursor.execute("SELECT shift_id FROM shifts WHERE task_id = ?", (task['task_id'],))
                 shifts = cursor.fetchall()
                 for shift in shifts:
-                    old_shift_date = datetime.strptime(shift['shift_date'], "%Y-%m-%d")
-                    new_shift_date = old_shift_date + delta
-                    new_shift_date_str = new_shift_date.strftime("%Y-%m-%d")
-                    cursor.execute("INSERT INTO shifts (task_id, shift_date, start_time, end_time, required_people) VALUES (?, ?, ?, ?, ?)", (new_task_id, new_shift_date_str, shift['start_time'], shift['end_time'], shift['required_people']))
+                    # Datum und Epoch-Minuten werden in SQL verschoben, ohne die Texte erneut zu parsen
+                    cursor.execute("INSERT INTO shifts (task_id, shift_date, start_time, end_time, required_people, duration_min, start_ts, end_ts) SELECT ?, date(shift_date, ?), start_time, end_time, required_people, duration_min, start_ts + ?, end_ts + ? FROM shifts WHERE shift_id = ?", (new_task_id, day_offset, minute_offset, minute_offset, shift['shift_id']))
                     new_shift_id = cursor.lastrowid
                     if mode != 'full': continue
                     cursor.execute("SELECT * FROM assignments WHERE shift_id = ?", (shift['shift_id'],))
                     assignments = cursor.fetchall()
                     for assign in assignments: cursor.execute("INSERT INTO assignments (shift_id, person_id, attendance_status) VALUES (?, ?, 'Geplant')", (new_shift_id, assign['person_id']))
             cursor.execute("COMMIT")
+            self._invalidate_plan_validators_for(new_event_id)
             return True, f"Event erfolgreich als '{new_name}' kopiert.", new_event_id, attachments_copied
         except Exception as e:
             if self.conn: self.conn.rollback()
             return False, str(e), None, False
 
     # --- Automatische Planung ---
-    def generate_planning_proposal(self, event_id, limit=None):
-        all_scores = self.calculate_scores(include_inactive=True, limit=limit)
-        score_map = {score['name']: score['total_score'] for score in all_scores}
-        duties_per_person = defaultdict(int)
-        person_shift_times = defaultdict(list) 
-        existing_assignments = self.get_assignments_for_event(event_id)
-        for assign in existing_assignments:
-            pid = self.execute_query("SELECT person_id FROM persons WHERE display_name = ?", (assign['person_name'],), fetch='one')
-            if pid:
-                pid = pid[0]; duties_per_person[pid] += 1
-                s_start = datetime.strptime(f"{assign['shift_date']} {assign['start_time']}", "%Y-%m-%d %H:%M")
-                s_end = datetime.strptime(f"{assign['shift_date']} {assign['end_time']}", "%Y-%m-%d %H:%M")
-                if s_end <= s_start: s_end += timedelta(days=1)
-                person_shift_times[pid].append((s_start, s_end))
-        all_shifts_query = "SELECT s.shift_id, s.shift_date, s.start_time, s.end_time FROM shifts s JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ? ORDER BY s.shift_date, s.start_time"
-        all_shifts = self.execute_query(all_shifts_query, (event_id,), fetch='all')
-        def get_datetime_range(date_str, start_str, end_str):
-            start_dt = datetime.strptime(f"{date_str} {start_str}", "%Y-%m-%d %H:%M")
-            end_dt = datetime.strptime(f"{date_str} {end_str}", "%Y-%m-%d %H:%M")
-            if end_dt <= start_dt: end_dt += timedelta(days=1)
-            return start_dt, end_dt
-        def calculate_candidate_score(candidate, current_start, current_end, is_tl_search=False):
-            person_id = candidate['person_id']
-            historical_score = score_map.get(candidate['display_name'], 0)
-            base_points = historical_score * -1 * 10 
-            current_event_duties = duties_per_person[person_id]
-            fairness_malus = current_event_duties * 25
-            if current_event_duties >= 2: fairness_malus += 10000 
-            consecutive_malus = 0
-            for s_start, s_end in person_shift_times[person_id]:
-                if current_start < s_end and current_end > s_start: return -99999
-                if current_start == s_end or current_end == s_start: consecutive_malus += 10000
-            status_bonus = 5 if candidate['status'] == 'Aktiv' else 0
-            competence_bonus = 0
-            if not is_tl_search and candidate['has_competence']: competence_bonus = 3
-            tl_waste_malus = 0
-            if not is_tl_search and candidate['is_team_leader']: tl_waste_malus = 500
-            if "Zu jung" in candidate.get('warnings', ''): return -99999 # Jugendschutz
-            return base_points - fairness_malus - consecutive_malus + status_bonus + competence_bonus - tl_waste_malus
-
-        for shift_row in all_shifts:
-            shift_id = shift_row['shift_id']
-            current_start, current_end = get_datetime_range(shift_row['shift_date'], shift_row['start_time'], shift_row['end_time'])
-            assigned_persons = self.get_assigned_persons_for_shift(shift_id)
-            has_tl = any(p['is_team_leader'] for p in assigned_persons)
-            shift_details = self.get_shift_by_id(shift_id)
-            is_full = len(assigned_persons) >= shift_details['required_people']
-            if has_tl or is_full: continue
-            available_helpers = self.get_available_helpers_for_shift(shift_id)
-            tl_candidates = [h for h in available_helpers if h['is_team_leader']]
-            if not tl_candidates: continue
-            scored_candidates = []
-            for candidate in tl_candidates:
-                score = calculate_candidate_score(candidate, current_start, current_end, is_tl_search=True)
-                scored_candidates.append((score, candidate))
-            scored_candidates.sort(key=lambda x: x[0], reverse=True)
-            if scored_candidates:
-                best_score = scored_candidates[0][0]
-                if best_score < -5000: continue 
-                top_tier = [c for s, c in scored_candidates if s >= best_score - 5]
-                chosen_one = random.choice(top_tier)
-                person_id = chosen_one['person_id']
-                self.assign_person_to_shift(person_id, shift_id)
-                duties_per_person[person_id] += 1
-                person_shift_times[person_id].append((current_start, current_end))
-
-        for shift_row in all_shifts:
-            shift_id = shift_row['shift_id']
-            current_start, current_end = get_datetime_range(shift_row['shift_date'], shift_row['start_time'], shift_row['end_time'])
-            shift_details = self.get_shift_by_id(shift_id)
-            assigned_count = len(self.get_assigned_persons_for_shift(shift_id))
-            num_open = shift_details['required_people'] - assigned_count
-            if num_open <= 0: continue
-            for _ in range(num_open):
-                available_helpers = self.get_available_helpers_for_shift(shift_id)
-                if not available_helpers: break
-                scored_candidates = []
-                for helper in available_helpers:
-                    score = calculate_candidate_score(helper, current_start, current_end, is_tl_search=False)
-                    scored_candidates.append((score, helper))
-                scored_candidates.sort(key=lambda x: x[0], reverse=True)
-                if scored_candidates:
-                    best_score = scored_candidates[0][0]
-                    if best_score < -5000: break
-                    top_tier = [c for s, c in scored_candidates if s >= best_score - 8]
-                    chosen_one = random.choice(top_tier)
-                    person_id = chosen_one['person_id']
-                    self.assign_person_to_shift(person_id, shift_id)
-                    duties_per_person[person_id] += 1
-                    person_shift_times[person_id].append((current_start, current_end))
+    def generate_planning_proposal(self, event_id, limit=None, trace=False, seed=None, restarts=1, workers=1, improve_seconds=None, improve_iterations=None):
+        """Füllt offene Plätze automatisch (siehe compute_planning_proposal) und speichert den Plan."""
+        result = self.compute_planning_proposal(event_id, limit, trace, seed, restarts, workers, improve_seconds, improve_iterations)
+        self.add_assignments(result.assignments)
         total_required, total_assigned = self.get_event_staffing_summary(event_id)
         return total_assigned, total_required
 
+    def compute_planning_proposal(self, event_id, limit=None, trace=False, seed=None, restarts=1, workers=1, improve_seconds=None, improve_iterations=None, progress=None, draft=None, replace=False):
+        """Berechnet einen Planungsvorschlag, ohne ihn zu speichern (siehe utils/planner.py).
+        Gleicher seed ergibt denselben Plan; bei restarts > 1 wird der beste von mehreren Durchläufen
+        übernommen, mit workers > 1 in parallelen Prozessen. improve_seconds/improve_iterations schalten
+        die Nachoptimierung (utils/local_search.py) ein. Mit trace=True wird der gewählte Durchlauf
+        protokolliert (self.last_planning_trace, JSONL im Ordner planning_traces neben der Datenbank).
+        progress(phase, bruchteil, beste_kosten, offene_plätze, plätze_gesamt) meldet den Fortschritt;
+        gibt es False zurück, wird mit dem bis dahin besten Plan abgeschlossen. Während eines Durchlaufs
+        wird je Schicht gemeldet, beste_kosten ist dann NaN (noch kein fertiger Plan).
+        Mit replace=True wird ohne die bestehenden Zuweisungen des Events geplant; gespeichert wird das
+        Ergebnis dann mit add_assignments(..., replace_event_id=event_id).
+        Mit draft (PlanDraft) wird auf dem Stand des Entwurfs statt der Datenbank geplant.
+        event_id darf eine Liste von Events sein: sie werden gemeinsam geplant (eine Person wird nie
+        zeitgleich in zwei Events eingeteilt). Zuweisungen in anderen Events gelten immer als belegt."""
+        trace = PlanningTrace(event_id, {"limit": limit, "restarts": restarts}) if trace else None
+        if trace is not None: trace.begin_phase(PHASE_PREPARE)
+        problem = PlanningProblem.load(self, event_id, limit, replace)
+        if draft is not None: draft.prepare_problem(problem)
+        total_slots = sum(s.required for s in problem.shifts)
+        stopped = False
+        def report(phase, fraction, cost, open_slots):
+            nonlocal stopped
+            if stopped or progress(phase, fraction, cost, open_slots, total_slots) is False: stopped = True
+            return not stopped
+        if trace is not None: trace.begin_phase(PHASE_SEARCH)
+        on_restart = (lambda fraction, best: report(PHASE_SEARCH, fraction, best.cost, best.unfilled)) if progress is not None else None
+        on_shift = (lambda fraction, open_slots: report(PHASE_SEARCH, fraction, float("nan"), open_slots)) if progress is not None else None
+        result = search_best_plan(problem, seed, restarts, workers, on_restart, on_shift)
+        if trace is not None:
+            trace.params["seed"] = result.seed
+            run_greedy(problem, result.seed, trace)  # Gleicher Seed -> derselbe Plan, diesmal mit Protokoll
+        if (improve_seconds or improve_iterations) and not stopped:
+            if trace is not None: trace.begin_phase(PHASE_IMPROVE)
+            on_step = (lambda fraction, cost, open_slots: report(PHASE_IMPROVE, fraction, cost, open_slots)) if progress is not None else None
+            result = improve_plan(problem, result, improve_seconds, improve_iterations, progress=on_step)
+            if trace is not None:
+                trace.end_phase()
+                before = result.improved_from or result
+                trace.params["improvement"] = {"cost_before": round(before.cost, 3), "cost_after": round(result.cost, 3)}
+        self.last_planning_result = result
+        if trace is not None:
+            self.last_planning_trace = trace
+            try: trace.write_jsonl(default_trace_path(self.db_path, event_id))
+            except OSError as e: print(f"Planungsprotokoll konnte nicht gespeichert werden: {e}")
+        return result
+
+    def add_assignments(self, assignments, label="Planungsvorschlag", replace_event_id=None):
+        """Schreibt [(person_id, shift_id), ...] in einer Transaktion und spielt sie in die Live-Prüfung ein.
+        Im Änderungsjournal ist das eine Aktion (label), die als Ganzes rückgängig gemacht wird.
+        Mit replace_event_id werden vorher in derselben Transaktion alle Zuweisungen dieses Events gelöscht
+        ("Alles löschen und neu berechnen": scheitert das Speichern, bleibt der alte Plan erhalten)."""
+        if not assignments and replace_event_id is None: return True
+        try:
+            cursor = self._cursor()
+            cursor.execute("BEGIN TRANSACTION")
+            self.journal.begin_group(cursor, label)
+            if replace_event_id is not None: cursor.execute("DELETE FROM assignments WHERE shift_id IN (SELECT s.shift_id FROM shifts s JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ?)", (replace_event_id,))
+            cursor.executemany("INSERT INTO assignments (person_id, shift_id) VALUES (?, ?)", assignments)
+            cursor.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"Datenbankfehler beim Speichern des Planungsvorschlags: {e}")
+            if self.conn: self.conn.rollback()
+            return False
+        if replace_event_id is not None: self._invalidate_plan_validators_for(replace_event_id)
+        for person_id, shift_id in assignments: self._apply_assignment_delta(person_id, shift_id, True)
+        return True
+
+    # --- Entwürfe (Was-wäre-wenn) ---
+    def create_plan_draft(self, event_id):
+        """Legt einen Entwurf mit den aktuellen Zuweisungen des Events an (nur im Speicher)."""
+        return PlanDraft(self, event_id)
+
+    def commit_plan_draft(self, draft):
+        """Übernimmt einen Entwurf in einer Transaktion: der Plan des Events entspricht danach dem Entwurf."""
+        added, removed = draft.diff()
+        try:
+            cursor = self._cursor()
+            cursor.execute("BEGIN TRANSACTION")
+            self.journal.begin_group(cursor, "Entwurf übernehmen")
+            for person_id, shift_id in removed:
+                cursor.execute("DELETE FROM assignments WHERE assignment_id = (SELECT assignment_id FROM assignments WHERE person_id = ? AND shift_id = ? ORDER BY assignment_id DESC LIMIT 1)", (person_id, shift_id))
+            cursor.executemany("INSERT INTO assignments (person_id, shift_id) VALUES (?, ?)", added)
+            cursor.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"Datenbankfehler beim Übernehmen des Entwurfs: {e}")
+            if self.conn: self.conn.rollback()
+            return False
+        for person_id, shift_id in removed: self._apply_assignment_delta(person_id, shift_id, False)
+        for person_id, shift_id in added: self._apply_assignment_delta(person_id, shift_id, True)
+        draft.base = draft.live_assignments()
+        return True
+
+    def get_plan_violations(self, event_id):
+        """Prüft den Dienstplan und liefert strukturierte Regelverstöße (RuleViolation).
+        Die Prüfung bleibt pro Event erhalten und wird bei Zuweisungsänderungen live nachgeführt."""
+        return self.get_constraint_engine(event_id).validate()
+
     def validate_event_plan(self, event_id):
-        warnings = []
-        query_occupancy = "SELECT t.name AS task_name, s.shift_date, s.start_time, s.required_people, (SELECT COUNT(*) FROM assignments a WHERE a.shift_id = s.shift_id) AS current_count FROM shifts s JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ? ORDER BY s.shift_date, s.start_time"
-        shifts_status = self.execute_query(query_occupancy, (event_id,), fetch='all')
-        for shift in shifts_status:
-            if shift['current_count'] == 0: warnings.append(f"🔴 Schicht '{shift['task_name']}' ({shift['start_time']}) ist komplett leer.")
-            elif shift['current_count'] < shift['required_people']: warnings.append(f"⚠️ Schicht '{shift['task_name']}' ({shift['start_time']}) ist unterbesetzt ({shift['current_count']}/{shift['required_people']}).")
-        query_assignments = "SELECT p.person_id, p.display_name, p.birth_date, s.shift_date, s.start_time, s.end_time, t.name as task_name, t.duty_type_id, dt.name as duty_name, s.shift_id FROM assignments a JOIN persons p ON a.person_id = p.person_id JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id JOIN duty_types dt ON t.duty_type_id = dt.duty_type_id WHERE t.event_id = ? ORDER BY p.display_name, s.shift_date, s.start_time"
-        assignments = self.execute_query(query_assignments, (event_id,), fetch='all')
-        settings = SettingsManager()
-        min_age_bar = settings.get_min_age_bar(); min_age_kasse = settings.get_min_age_kasse()
-        person_shifts = defaultdict(list)
-        for row in assignments:
-            start_dt = datetime.strptime(f"{row['shift_date']} {row['start_time']}", "%Y-%m-%d %H:%M")
-            end_dt = datetime.strptime(f"{row['shift_date']} {row['end_time']}", "%Y-%m-%d %H:%M")
-            if end_dt <= start_dt: end_dt += timedelta(days=1)
-            shift_data = {'start': start_dt, 'end': end_dt, 'task': row['task_name'], 'duty_id': row['duty_type_id'], 'shift_id': row['shift_id'], 'date': row['shift_date']}
-            person_shifts[row['person_id']].append(shift_data)
-            restrictions = self.get_person_restrictions(row['person_id'])
-            if row['duty_type_id'] in restrictions: warnings.append(f"🔴 {row['display_name']} ist für '{row['task_name']}' eingeteilt, obwohl eine Einschränkung vorliegt.")
-            min_age = 0
-            if row['duty_name'] == "Bar": min_age = min_age_bar
-            elif row['duty_name'] == "Kasse": min_age = min_age_kasse
-            if min_age > 0:
-                age = self._calculate_age_at_date(row['birth_date'], row['shift_date'])
-                if age < min_age: warnings.append(f"🔞 {row['display_name']} ist für '{row['task_name']}' eingeteilt, ist aber erst {age} Jahre alt (Min: {min_age}).")
-        for person_id, shifts in person_shifts.items():
-            name = next(x['display_name'] for x in assignments if x['person_id'] == person_id)
-            shifts.sort(key=lambda x: x['start'])
-            daily_counts = defaultdict(int)
-            for i in range(len(shifts)):
-                current = shifts[i]
-                daily_counts[current['date']] += 1
-                for j in range(i + 1, len(shifts)):
-                    other = shifts[j]
-                    if current['start'] < other['end'] and current['end'] > other['start']: warnings.append(f"🔴 {name} hat zeitgleiche Schichten: '{current['task']}' und '{other['task']}'.")
-                    if current['end'] == other['start']: warnings.append(f"⚠️ {name} arbeitet durchgehend (ohne Pause): '{current['task']}' -> '{other['task']}'.")
-            for date_str, count in daily_counts.items():
-                if count > 2:
-                    formatted_date = datetime.strptime(date_str, "%Y-%m-%d").strftime("%d.%m.")
-                    warnings.append(f"⚠️ {name} hat am {formatted_date} {count} Schichten (Empfohlen: Max 2).")
-        missing_tl_shifts = self.check_team_leader_compliance(event_id)
-        for shift_id in missing_tl_shifts:
-            details = self.execute_query("SELECT t.name, s.shift_date, s.start_time FROM shifts s JOIN tasks t ON s.task_id = t.task_id WHERE s.shift_id = ?", (shift_id,), fetch='one')
-            warnings.append(f"⚠️ Schicht '{details['name']}' ({details['start_time']}) hat keinen zugewiesenen Teamleiter.")
-        return warnings
+        return [v.message for v in self.get_plan_violations(event_id)]
 
     def get_plan_matrix_data(self, event_id):
         return self.execute_query("SELECT t.name AS task_name, s.shift_date, s.start_time, s.end_time, s.required_people, p.display_name AS helper_name, COALESCE(pc.is_team_leader, 0) AS is_team_leader, CASE WHEN pc.person_id IS NOT NULL THEN 1 ELSE 0 END AS has_competence FROM tasks t JOIN shifts s ON t.task_id = s.task_id LEFT JOIN assignments a ON s.shift_id = a.shift_id LEFT JOIN persons p ON a.person_id = p.person_id LEFT JOIN person_competencies pc ON p.person_id = pc.person_id AND t.duty_type_id = pc.duty_type_id WHERE t.event_id = ? ORDER BY t.name, s.shift_date, s.start_time;", (event_id,), fetch='all')
@@ -624,10 +900,10 @@ class DatabaseManager:
         return self.execute_query("SELECT t.name AS task_name, s.shift_date, s.start_time, s.end_time, GROUP_CONCAT(p.display_name, ', ') AS assigned_helpers FROM tasks t JOIN shifts s ON t.task_id = s.task_id LEFT JOIN assignments a ON s.shift_id = a.shift_id LEFT JOIN persons p ON a.person_id = p.person_id WHERE t.event_id = ? GROUP BY s.shift_id ORDER BY t.name, s.shift_date, s.start_time;", (event_id,), fetch="all")
 
     def get_assignments_for_event(self, event_id):
-        return self.execute_query("SELECT a.assignment_id, t.name AS task_name, s.shift_date, s.start_time, s.end_time, p.display_name AS person_name, a.attendance_status, sub_p.display_name AS substitute_name FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id JOIN persons p ON a.person_id = p.person_id LEFT JOIN persons sub_p ON a.substitute_person_id = sub_p.person_id WHERE t.event_id = ? ORDER BY s.shift_date, s.start_time, t.name, p.display_name;", (event_id,), fetch="all")
+        return self.execute_query("SELECT a.assignment_id, t.name AS task_name, s.shift_date, s.start_time, s.end_time, p.display_name AS person_name, a.attendance_status, a.substitute_person_id, sub_p.display_name AS substitute_name FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id JOIN persons p ON a.person_id = p.person_id LEFT JOIN persons sub_p ON a.substitute_person_id = sub_p.person_id WHERE t.event_id = ? ORDER BY s.shift_date, s.start_time, t.name, p.display_name;", (event_id,), fetch="all")
 
     def get_post_event_data(self, event_id, filter_task_id=None):
-        q = "SELECT t.name AS task_name, s.shift_date, s.start_time, s.end_time, p.display_name AS helper_name FROM assignments a JOIN persons p ON a.person_id = p.person_id JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ?"; p = [event_id]
+        q = "SELECT a.assignment_id, t.name AS task_name, s.shift_date, s.start_time, s.end_time, p.display_name AS helper_name FROM assignments a JOIN persons p ON a.person_id = p.person_id JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ?"; p = [event_id]
         if filter_task_id: q += " AND t.task_id = ?"; p.append(filter_task_id)
         q += " ORDER BY t.name, s.shift_date, s.start_time, p.display_name;"
         return self.execute_query(q, tuple(p), fetch='all')
@@ -653,11 +929,20 @@ class DatabaseManager:
         return self.execute_query("SELECT * FROM events WHERE status IN ('Abgeschlossen', 'Aktiv') ORDER BY start_date DESC", fetch='all')
 
     def get_hours_and_duties_summary(self, time_filter='all'):
-        q = "WITH worked_shifts AS (SELECT a.person_id, s.start_time, s.end_time, e.start_date FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id JOIN events e ON t.event_id = e.event_id WHERE a.attendance_status = 'Erledigt' UNION ALL SELECT a.substitute_person_id AS person_id, s.start_time, s.end_time, e.start_date FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id JOIN events e ON t.event_id = e.event_id WHERE a.attendance_status = 'Erledigt (durch Vertreter)') SELECT p.display_name AS name, COUNT(*) as duty_count, SUM(CASE WHEN ws.end_time < ws.start_time THEN (strftime('%s', '2000-01-02 ' || ws.end_time || ':00') - strftime('%s', '2000-01-01 ' || ws.start_time || ':00')) / 3600.0 ELSE (strftime('%s', '2000-01-01 ' || ws.end_time || ':00') - strftime('%s', '2000-01-01 ' || ws.start_time || ':00')) / 3600.0 END) AS total_hours FROM persons p JOIN worked_shifts ws ON p.person_id = ws.person_id {where} GROUP BY p.person_id ORDER BY total_hours DESC, name ASC;"
-        w = "WHERE strftime('%Y', ws.start_date) = strftime('%Y', 'now')" if time_filter == 'current_year' else ""
+        """Geleistete Stunden und Anzahl Dienste pro Person (eigene erledigte Dienste + Vertretungen) in einer Abfrage."""
+        q = "WITH worked_shifts AS (SELECT a.person_id, s.duration_min, e.start_date FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id JOIN events e ON t.event_id = e.event_id WHERE a.attendance_status = 'Erledigt'{where} UNION ALL SELECT a.substitute_person_id AS person_id, s.duration_min, e.start_date FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id JOIN events e ON t.event_id = e.event_id WHERE a.attendance_status = 'Erledigt (durch Vertreter)' AND a.substitute_person_id IS NOT NULL{where}) SELECT p.display_name AS name, COUNT(*) as duty_count, SUM(ws.duration_min) / 60.0 AS total_hours FROM persons p JOIN worked_shifts ws ON p.person_id = ws.person_id GROUP BY p.person_id ORDER BY total_hours DESC, name ASC;"
+        w = CURRENT_YEAR_FILTER if time_filter == 'current_year' else ""
         rows = self.execute_query(q.format(where=w), fetch='all')
         return [dict(row) for row in rows] if rows else []
-    
+    calculate_worked_hours = get_hours_and_duties_summary
+
+    def get_detailed_member_summary(self, time_filter='all'):
+        """Stunden sowie Anzahl erledigt / als Vertreter / entschuldigt / nicht erschienen pro Person in einer Abfrage."""
+        q = "WITH roles AS (SELECT a.person_id, a.attendance_status AS status, 0 AS is_substitute, s.duration_min, e.start_date FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id JOIN events e ON t.event_id = e.event_id WHERE a.attendance_status IN ('Erledigt', 'Entschuldigt', 'Nicht Erschienen'){where} UNION ALL SELECT a.substitute_person_id, a.attendance_status, 1, s.duration_min, e.start_date FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id JOIN events e ON t.event_id = e.event_id WHERE a.attendance_status = 'Erledigt (durch Vertreter)' AND a.substitute_person_id IS NOT NULL{where}) SELECT p.display_name AS name, COALESCE(SUM(CASE WHEN r.is_substitute = 1 OR r.status = 'Erledigt' THEN r.duration_min END), 0) / 60.0 AS total_hours, SUM(r.is_substitute = 0 AND r.status = 'Erledigt') AS total_done, SUM(r.is_substitute) AS total_substitute, SUM(r.is_substitute = 0 AND r.status = 'Entschuldigt') AS total_excused, SUM(r.is_substitute = 0 AND r.status = 'Nicht Erschienen') AS total_absent FROM roles r JOIN persons p ON p.person_id = r.person_id GROUP BY p.person_id ORDER BY total_hours DESC, name ASC"
+        w = CURRENT_YEAR_FILTER if time_filter == 'current_year' else ""
+        rows = self.execute_query(q.format(where=w), fetch='all')
+        return [dict(row) for row in rows] if rows else []
+
     def get_mandatory_hours_status(self):
         """
         Holt für ALLE aktiven Mitglieder die geleisteten Stunden im aktuellen Jahr.
@@ -665,14 +950,7 @@ class DatabaseManager:
         query = """
             SELECT 
                 p.display_name AS name,
-                COALESCE(SUM(
-                    CASE
-                        WHEN s.end_time < s.start_time THEN
-                            (strftime('%s', '2000-01-02 ' || s.end_time || ':00') - strftime('%s', '2000-01-01 ' || s.start_time || ':00')) / 3600.0
-                        ELSE
-                            (strftime('%s', '2000-01-01 ' || s.end_time || ':00') - strftime('%s', '2000-01-01 ' || s.start_time || ':00')) / 3600.0
-                    END
-                ), 0) AS worked_hours
+                COALESCE(SUM(s.duration_min), 0) / 60.0 AS worked_hours
             FROM persons p
             LEFT JOIN assignments a ON (p.person_id = a.person_id OR p.person_id = a.substitute_person_id) 
                 AND a.attendance_status IN ('Erledigt', 'Erledigt (durch Vertreter)')
@@ -6,6 +6,7 @@ Startpunkt der Anwendung. Verwaltet den Anwendungs-Loop und Neustarts.
 """
 import sys
 import os
+import multiprocessing
 
 from PyQt5.QtWidgets import QApplication, QMessageBox, QDialog
 from database_manager import DatabaseManager
@@ -137,4 +138,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Für die parallele Planung im gepackten Programm
     main()
\ No newline at end of file
@@ -2,7 +2,6 @@
 """
 main_window.py (Finale Version mit Wächter-Logik)
 """
-import shutil
 from datetime import datetime
 import os
 
@@ -11,17 +10,13 @@ from PyQt5.QtWidgets import (
     QListWidgetItem, QLabel, QStatusBar, QAction, QMessageBox, QFileDialog
 )
 from PyQt5.QtCore import Qt, pyqtSignal, QTimer
-from PyQt5.QtGui import QFont
-
-from widgets.stammdaten_widget import StammdatenWidget
-from widgets.duty_types_widget import DutyTypesWidget
-from widgets.events_widget import EventsWidget
-from widgets.planning_widget import PlanningWidget
-from widgets.plan_matrix_widget import PlanMatrixWidget
-from widgets.post_event_widget import PostEventWidget
-from widgets.ranking_widget import RankingWidget
-from widgets.settings_dialog import SettingsDialog
-from widgets.help_dialog import HelpDialog
+from PyQt5.QtGui import QFont, QKeySequence
+
+from widgets.backup_worker import BackupWorker, BackupProgressDialog
+from utils.backup_manager import SnapshotManager, REASON_DAILY
+
+# Die Seiten-Widgets (und mit ihnen NumPy, ReportLab, pandas ...) werden erst in den
+# Seiten-Fabriken importiert, wenn die Seite zum ersten Mal aufgerufen wird.
 
 class MainWindow(QMainWindow):
     restart_requested = pyqtSignal(str)
@@ -46,6 +41,9 @@ class MainWindow(QMainWindow):
             self.resize(width, height)
         self._create_menu_bar()
         self._init_ui()
+        self._restore_last_event()
+        self._snapshot_worker = None
+        QTimer.singleShot(3000, self._start_daily_snapshot)
 
     def _create_menu_bar(self):
             menu_bar = self.menuBar()
@@ -84,12 +82,30 @@ class MainWindow(QMainWindow):
             exit_action.triggered.connect(self.close)
             file_menu.addAction(exit_action)
 
+            edit_menu = menu_bar.addMenu("&Bearbeiten")
+            edit_menu.setFont(font)
+            edit_menu.aboutToShow.connect(self._update_undo_actions)
+
+            self.undo_action = QAction("Rückgängig", self)
+            self.undo_action.setShortcut(QKeySequence.Undo)
+            self.undo_action.triggered.connect(self.undo_last_change)
+            edit_menu.addAction(self.undo_action)
+
+            self.redo_action = QAction("Wiederholen", self)
+            self.redo_action.setShortcuts([QKeySequence("Ctrl+Y"), QKeySequence.Redo])
+            self.redo_action.triggered.connect(self.redo_last_change)
+            edit_menu.addAction(self.redo_action)
+
             help_menu = menu_bar.addMenu("&Hilfe")
             help_menu.setFont(font)
             
             show_help_action = QAction("Hilfe anzeigen", self)
             show_help_action.triggered.connect(self.show_help)
             help_menu.addAction(show_help_action)
+
+            diagnostics_action = QAction("Diagnose...", self)
+            diagnostics_action.triggered.connect(self.show_diagnostics)
+            help_menu.addAction(diagnostics_action)
             
             help_menu.addSeparator()
             
@@ -123,45 +139,87 @@ class MainWindow(QMainWindow):
         self.status_label = QLabel("Bereit.")
         self.statusBar().addWidget(self.status_label)
         self.statusBar().setStyleSheet("font-size: 10pt; padding: 3px;")
-        self.pages = {} 
+        self.pages = {}            # Bereits gebaute Seiten
+        self._page_names = []      # Reihenfolge der Navigation (= Index im Stack)
+        self._page_factories = {}  # Seitenname -> Fabrik, die das Widget beim ersten Aufruf baut
+        self._stale_pages = set()  # Versteckte Seiten, die das aktuelle Event noch nicht kennen
         self.create_pages()
         self.nav_list.currentRowChanged.connect(self.on_page_changed)
         self.nav_list.setCurrentRow(0)
 
     def create_pages(self):
-            stammdaten_page = StammdatenWidget(self.db_manager, self.settings, self)
-            self.add_page(stammdaten_page, "Stammdaten")
-            duty_types_page = DutyTypesWidget(self.db_manager, self)
-            self.add_page(duty_types_page, "Dienst-Typen")
-            
-            event_page = EventsWidget(self.db_manager, self.settings, self)
-            event_page.event_selection_changed.connect(self.on_event_selected)
-            self.add_page(event_page, "Events verwalten")
-            
-            plan_page = PlanningWidget(self.db_manager, self.settings, self)
-            plan_page.plan_changed.connect(self.update_status_bar)
-            self.add_page(plan_page, "Schichtplanung")
-            matrix_page = PlanMatrixWidget(self.db_manager, self)
-            self.add_page(matrix_page, "Grafische Übersicht")
-            post_event_page = PostEventWidget(self.db_manager, self)
-            self.add_page(post_event_page, "Nachbereitung")
-            ranking_page = RankingWidget(self.db_manager, self.settings, self)
-            self.add_page(ranking_page, "Auswertungen")
-
-            planning_widget = self.pages["Schichtplanung"]
-            matrix_widget = self.pages["Grafische Übersicht"]
-            post_event_widget = self.pages["Nachbereitung"]
-            planning_widget.event_selection_changed.connect(self.on_event_selected)
-            matrix_widget.event_selection_changed.connect(self.on_event_selected)
-            post_event_widget.event_selection_changed.connect(self.on_event_selected)
-
-    def add_page(self, widget, name):
-        self.stack.addWidget(widget)
-        self.pages[name] = widget
+            # Seiten werden nur registriert; Modul-Import und Aufbau erst beim ersten Aufruf (jede lädt dabei Daten aus der DB)
+            self.add_page("Stammdaten", self._create_stammdaten_page)
+            self.add_page("Dienst-Typen", self._create_duty_types_page)
+            self.add_page("Events verwalten", self._create_events_page)
+            self.add_page("Schichtplanung", self._create_planning_page)
+            self.add_page("Grafische Übersicht", self._create_plan_matrix_page)
+            self.add_page("Nachbereitung", self._create_post_event_page)
+            self.add_page("Auswertungen", self._create_ranking_page)
+
+    def _create_stammdaten_page(self):
+        from widgets.stammdaten_widget import StammdatenWidget
+        return StammdatenWidget(self.db_manager, self.settings, self)
+
+    def _create_duty_types_page(self):
+        from widgets.duty_types_widget import DutyTypesWidget
+        return DutyTypesWidget(self.db_manager, self)
+
+    def _create_events_page(self):
+        from widgets.events_widget import EventsWidget
+        return EventsWidget(self.db_manager, self.settings, self)
+
+    def _create_planning_page(self):
+        from widgets.planning_widget import PlanningWidget
+        plan_page = PlanningWidget(self.db_manager, self.settings, self)
+        plan_page.plan_changed.connect(self.update_status_bar)
+        return plan_page
+
+    def _create_plan_matrix_page(self):
+        from widgets.plan_matrix_widget import PlanMatrixWidget
+        return PlanMatrixWidget(self.db_manager, self)
+
+    def _create_post_event_page(self):
+        from widgets.post_event_widget import PostEventWidget
+        return PostEventWidget(self.db_manager, self)
+
+    def _create_ranking_page(self):
+        from widgets.ranking_widget import RankingWidget
+        return RankingWidget(self.db_manager, self.settings, self)
+
+    def add_page(self, name, factory):
+        """Registriert eine Seite; im Stack steht bis zum ersten Aufruf nur ein Platzhalter."""
+        self.stack.addWidget(QWidget())
+        self._page_names.append(name)
+        self._page_factories[name] = factory
         list_item = QListWidgetItem(name)
         list_item.setTextAlignment(Qt.AlignCenter)
         self.nav_list.addItem(list_item)
 
+    def get_page(self, name):
+        """Liefert die Seite und baut sie beim ersten Zugriff."""
+        page = self.pages.get(name)
+        if page is not None:
+            return page
+        index = self._page_names.index(name)
+        page = self._page_factories[name]()
+        placeholder = self.stack.widget(index)
+        self.stack.insertWidget(index, page)
+        self.stack.removeWidget(placeholder)
+        placeholder.deleteLater()
+        self.pages[name] = page
+        if hasattr(page, 'event_selection_changed'):
+            page.event_selection_changed.connect(self.on_event_selected)
+        if self.current_event_id != -1 and hasattr(page, 'set_current_event'):
+            page.set_current_event(self.current_event_id)
+        return page
+
+    def _restore_last_event(self):
+        """Stellt das zuletzt gewählte Event wieder her (unabhängig davon, welche Seiten schon gebaut sind)."""
+        last_id = self.settings.get_last_event_id()
+        if last_id != -1 and self.db_manager.get_event_by_id(last_id):
+            QTimer.singleShot(0, lambda: self.on_event_selected(last_id))
+
     def on_page_changed(self, index):
         page_name = self.nav_list.item(index).text()
         
@@ -194,12 +252,17 @@ class MainWindow(QMainWindow):
                             return
                 return
 
+        page = self.get_page(page_name)
         self.stack.setCurrentIndex(index)
-        if hasattr(self.pages[page_name], 'refresh_view'):
-            self.pages[page_name].refresh_view()
+        if page_name in self._stale_pages:
+            self._stale_pages.discard(page_name)
+            if hasattr(page, 'set_current_event'):
+                page.set_current_event(self.current_event_id)
+        if hasattr(page, 'refresh_view'):
+            page.refresh_view()
 
     def _select_event_in_manager(self, event_id):
-        events_widget = self.pages.get("Events verwalten")
+        events_widget = self.get_page("Events verwalten")
         if events_widget and hasattr(events_widget, 'select_event_by_id'):
             events_widget.select_event_by_id(event_id)
 
@@ -212,20 +275,26 @@ class MainWindow(QMainWindow):
             event_name = event['name'] if event else "Unbekannt"
             self.update_status_bar(event_id, event_name)
             
+            # Nur die sichtbare Seite sofort nachziehen, versteckte Seiten beim nächsten Aufruf
             sender_widget = self.sender()
+            visible_widget = self.stack.currentWidget()
             for page_name, page_widget in self.pages.items():
-                if page_widget != sender_widget and hasattr(page_widget, 'set_current_event'):
+                if page_widget == sender_widget or not hasattr(page_widget, 'set_current_event'):
+                    continue
+                if page_widget == visible_widget:
                     page_widget.set_current_event(event_id)
+                else:
+                    self._stale_pages.add(page_name)
 
     def update_status_bar(self, event_id, event_name):
         if event_id == -1:
             self.status_label.setText("Kein Event ausgewählt.")
             self.statusBar().setStyleSheet("background-color: #f0f0f0;")
             return
-        required, assigned = self.db_manager.get_event_staffing_summary(event_id)
-        open_slots = required - assigned
-        missing_tl_shifts = self.db_manager.check_team_leader_compliance(event_id)
-        num_missing_tl = len(missing_tl_shifts)
+        # Besetzung aus der zwischengespeicherten Übersicht, Fehler/Warnungen aus der Live-Prüfung
+        staffing = self.db_manager.get_staffing_rollup(event_id)[event_id]["total"]
+        live = self.db_manager.get_live_plan_status(event_id)
+        required, open_slots, num_missing_tl = staffing["required"], staffing["open"], staffing["missing_tl"]
         if required == 0:
             status_text = f"Event '{event_name}': Noch keine Schichten geplant."
             color = "#f0f0f0"
@@ -238,6 +307,8 @@ class MainWindow(QMainWindow):
         else:
             status_text = f"Event '{event_name}': Planung abgeschlossen! Alle {required} Plätze besetzt und TLs vorhanden. ✅"
             color = "#28a745"
+        if required > 0 and (live["errors"] or live["warnings"]):
+            status_text += f"  |  🔴 {live['errors']} Fehler, ⚠️ {live['warnings']} Warnungen"
         self.status_label.setText(status_text)
         self.statusBar().setStyleSheet(f"background-color: {color}; font-size: 10pt; padding: 3px;")
 
@@ -253,6 +324,44 @@ class MainWindow(QMainWindow):
             self.restart_requested.emit(path)
             self.close()
             
+    def _update_undo_actions(self):
+        # Die Aktionen bleiben aktiv, damit die Tastenkürzel immer greifen; das Menü zeigt, was passieren würde
+        undo_label, redo_label = self.db_manager.undo_label(), self.db_manager.redo_label()
+        self.undo_action.setText(f"Rückgängig: {undo_label}" if undo_label else "Rückgängig")
+        self.redo_action.setText(f"Wiederholen: {redo_label}" if redo_label else "Wiederholen")
+
+    def undo_last_change(self):
+        self._replay_change(self.db_manager.undo, self.db_manager.undo_label(), "Rückgängig gemacht", "Nichts zum Rückgängigmachen.")
+
+    def redo_last_change(self):
+        self._replay_change(self.db_manager.redo, self.db_manager.redo_label(), "Wiederholt", "Nichts zum Wiederholen.")
+
+    def _replay_change(self, action, label, done_text, empty_text):
+        if label is None:
+            self.statusBar().showMessage(empty_text, 3000)
+            return
+        if action() is None:
+            QMessageBox.warning(self, "Fehler", f"'{label}' konnte nicht ausgeführt werden. Die Daten wurden seitdem anderweitig geändert.")
+            return
+        self._reload_pages()
+        self.statusBar().showMessage(f"{done_text}: {label}", 5000)
+
+    def _reload_pages(self):
+        """Lädt alle gebauten Seiten nach einer Änderung durch Rückgängig/Wiederholen neu."""
+        if self.current_event_id != -1 and not self.db_manager.get_event_by_id(self.current_event_id):
+            self.current_event_id = -1
+        for page in self.pages.values():
+            if hasattr(page, 'refresh_view'):
+                page.refresh_view()
+            elif hasattr(page, 'load_events_data'):
+                page.load_events_data()
+                if self.current_event_id != -1: page.set_current_event(self.current_event_id)
+        if self.current_event_id != -1:
+            event = self.db_manager.get_event_by_id(self.current_event_id)
+            self.update_status_bar(self.current_event_id, event['name'])
+        else:
+            self.update_status_bar(-1, "")
+
     def show_db_path(self):
         QMessageBox.information(self, "Datenbank-Pfad", f"Die aktuell verwendete Datenbank befindet sich unter:\n{self.db_manager.db_path}")
 
@@ -263,19 +372,32 @@ class MainWindow(QMainWindow):
             return
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         default_filename = f"vereinsplaner_backup_{timestamp}.db"
-        path, _ = QFileDialog.getSaveFileName(self, "Backup speichern unter...", default_filename, "Datenbankdateien (*.db)")
+        path, _ = QFileDialog.getSaveFileName(self, "Backup speichern unter...", default_filename, "Datenbankdateien (*.db);;Komprimierte Datenbank (*.db.gz)")
         if path:
-            try:
-                shutil.copy2(current_db_path, path)
+            # Online-Sicherung über die SQLite-Backup-API (konsistent auch während geschrieben wird)
+            dialog = BackupProgressDialog(BackupWorker(current_db_path, dest_path=path, parent=self), self)
+            dialog.exec_()
+            if dialog.error:
+                QMessageBox.critical(self, "Backup fehlgeschlagen", f"Das Backup konnte nicht erstellt werden:\n{dialog.error}")
+            else:
                 QMessageBox.information(self, "Backup erfolgreich", f"Ein Backup der Datenbank wurde erfolgreich unter\n{path}\ngespeichert.")
-            except Exception as e:
-                QMessageBox.critical(self, "Backup fehlgeschlagen", f"Das Backup konnte nicht erstellt werden:\n{e}")
+
+    def _start_daily_snapshot(self):
+        """Legt im Hintergrund den täglichen Schnappschuss an, falls es heute noch keinen gibt."""
+        if not self.settings.get_auto_snapshots() or self._snapshot_worker is not None: return
+        keep = self.settings.get_snapshot_keep()
+        if SnapshotManager(self.db_manager.db_path, keep).has_snapshot_today(): return
+        self._snapshot_worker = BackupWorker(self.db_manager.db_path, reason=REASON_DAILY, keep=keep, parent=self)
+        self._snapshot_worker.succeeded.connect(lambda path: self.statusBar().showMessage(f"Täglicher Schnappschuss gespeichert: {os.path.basename(path)}", 5000))
+        self._snapshot_worker.failed.connect(lambda message: print(f"Täglicher Schnappschuss fehlgeschlagen: {message}"))
+        self._snapshot_worker.start()
 
     def open_settings(self):
             # WICHTIG: Reihenfolge muss exakt zur __init__ passen!
             # 1. self (das Parent-Fenster)
             # 2. self.settings
             # 3. self.db_manager
+            from widgets.settings_dialog import SettingsDialog
             dialog = SettingsDialog(self, self.settings, self.db_manager)
             
             dialog.settings_changed.connect(self.request_full_restart)
@@ -288,11 +410,16 @@ class MainWindow(QMainWindow):
 
     def show_help(self):
         if not hasattr(self, 'help_dialog'):
+            from widgets.help_dialog import HelpDialog
             self.help_dialog = HelpDialog(self)
         self.help_dialog.show()
         self.help_dialog.raise_()
         self.help_dialog.activateWindow()
 
+    def show_diagnostics(self):
+        from widgets.diagnostics_dialog import DiagnosticsDialog
+        DiagnosticsDialog(self, self.db_manager).exec_()
+
     def show_about_dialog(self):
             about_text = """
                 <h2>EquiShift</h2>
@@ -336,4 +463,5 @@ class MainWindow(QMainWindow):
             self.settings.set_window_size(size.width(), size.height())
             self.settings.set_last_event_id(self.current_event_id)
         self.settings.save_settings()
+        if self._snapshot_worker is not None: self._snapshot_worker.wait()
         event.accept()
\ No newline at end of file
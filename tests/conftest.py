@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Gemeinsame Fixtures: Datenbank und Einstellungen in einem temporären Verzeichnis."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import settings_manager  # noqa: E402
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    """SettingsManager mit eigener config.ini (nicht die im Arbeitsverzeichnis)."""
+    monkeypatch.setattr(settings_manager, "CONFIG_FILE", str(tmp_path / "config.ini"))
+    return settings_manager.SettingsManager()
+
+
+@pytest.fixture
+def db(tmp_path, settings):
+    from database_manager import DatabaseManager
+    manager = DatabaseManager(str(tmp_path / "test.db"))
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def small_event(db):
+    """Ein Event mit einer Aufgabe, zwei Schichten und zwei eingeteilten Helfern."""
+    duty_type_id = db.add_duty_type("Grill")
+    event_id = db.add_event("Sommerfest", "2026-07-05", "2026-07-05")
+    task_id = db.add_task(event_id, duty_type_id, "Grillstand")
+    shifts = [db.add_shift(task_id, "2026-07-05", "10:00", "12:00", 2), db.add_shift(task_id, "2026-07-05", "12:00", "14:30", 2)]
+    persons = [db.add_person(first_name=f"Helfer{i}", last_name="Test", display_name=f"Helfer{i} T.", status="Aktiv", birth_date="1990-01-01") for i in range(2)]
+    db.add_assignments([(persons[0], shifts[0]), (persons[1], shifts[1])])
+    return {"event_id": event_id, "task_id": task_id, "shifts": shifts, "persons": persons}
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""Mindestalter je Dienst-Typ und das Jugendschutz-Bitset."""
+from datetime import date, timedelta
+
+from utils.age_eligibility import AgeEligibility
+from utils.event_model import age_at_date
+
+
+def test_update_duty_type_sets_all_fields(db):
+    duty_type_id = db.add_duty_type("Ausschank", "alt", 16)
+    db.update_duty_type(duty_type_id, "Theke", "neu", 18)
+    row = db.get_duty_type_by_id(duty_type_id)
+    assert (row["name"], row["description"], row["min_age"]) == ("Theke", "neu", 18)
+    db.update_duty_type(duty_type_id, "Theke", "neu")
+    assert db.get_duty_type_by_id(duty_type_id)["min_age"] == 18
+
+
+def test_protected_duty_keeps_name_but_takes_min_age(db):
+    bar = db.get_duty_type_by_name("Bar")
+    db.update_duty_type(bar["duty_type_id"], "Umbenannt", "Getränke", 16)
+    row = db.get_duty_type_by_id(bar["duty_type_id"])
+    assert (row["name"], row["description"], row["min_age"]) == ("Bar", "Getränke", 16)
+
+
+def test_bitset_matches_age_at_date():
+    births = {1: "2008-02-29", 2: "2010-07-05", 3: "1990-01-01", 4: None, 5: "kaputt"}
+    days = [(date(2025, 12, 1) + timedelta(d)).isoformat() for d in range(0, 1200, 7)]
+    eligibility = AgeEligibility(days[::2], births, [16])
+    for pid, birth in births.items():
+        for min_age in (0, 16, 18):
+            for day in days:
+                assert eligibility.is_eligible(pid, min_age, day) == (min_age <= 0 or age_at_date(birth, day) >= min_age)
+
+
+def test_birth_date_change_invalidates_bitset(db, small_event):
+    duty_type_id = db.get_duty_type_by_name("Grill")["duty_type_id"]
+    db.update_duty_type(duty_type_id, "Grill", "", 18)
+    person_id = small_event["persons"][0]
+    db.update_person(person_id, birth_date="2010-01-01")
+    assert not db.get_age_eligibility(small_event["event_id"]).is_eligible(person_id, 18, "2026-07-05")
+    db.update_person(person_id, birth_date="2000-01-01")
+    assert db.get_age_eligibility(small_event["event_id"]).is_eligible(person_id, 18, "2026-07-05")
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Schnappschüsse: vollständig, rotierend und ohne Pausen zwischen den Backup-Schritten."""
+import gzip
+import sqlite3
+
+from utils import backup_manager
+from utils.backup_manager import SnapshotManager, PAGES_PER_STEP, REASON_PLANNING
+
+real_backup = backup_manager.backup_database
+
+
+def _large_db(path, pages):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA page_size = 1024")
+    conn.execute("CREATE TABLE blobs (data BLOB)")
+    conn.executemany("INSERT INTO blobs VALUES (?)", ((b"x" * 1000,) for _ in range(pages)))
+    conn.commit()
+    count = conn.execute("PRAGMA page_count").fetchone()[0]
+    conn.close()
+    return count
+
+
+def test_snapshot_does_not_sleep_between_steps(tmp_path, monkeypatch):
+    # sqlite3 pausiert nur nach Schritten, in denen die Quelle gesperrt war; daher wird das Argument geprüft
+    calls = []
+    monkeypatch.setattr(backup_manager, "backup_database", lambda *args, **kwargs: calls.append(kwargs) or real_backup(*args, **kwargs))
+    db_path = str(tmp_path / "gross.db")
+    pages = _large_db(db_path, 10 * PAGES_PER_STEP)
+    steps = []
+    path = SnapshotManager(db_path, keep=2).create(REASON_PLANNING, lambda done, total: steps.append(done))
+    assert calls == [{"sleep": 0}]
+    assert len(steps) >= pages // PAGES_PER_STEP
+    restored = tmp_path / "restored.db"
+    restored.write_bytes(gzip.open(path).read())
+    assert sqlite3.connect(str(restored)).execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 10 * PAGES_PER_STEP
+
+
+def test_snapshots_rotate(tmp_path):
+    db_path = str(tmp_path / "klein.db")
+    _large_db(db_path, 10)
+    manager = SnapshotManager(db_path, keep=2)
+    for i in range(3):
+        (tmp_path / "backups").mkdir(exist_ok=True)
+        (tmp_path / "backups" / f"klein_2020010{i}_000000_planung.db.gz").write_bytes(b"")
+    manager.create(REASON_PLANNING)
+    assert len(manager.snapshots()) == 2
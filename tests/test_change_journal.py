@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""Änderungsjournal: nur Änderungen an protokollierten Tabellen verwerfen die Wiederholen-Liste."""
+from utils.change_journal import is_journaled_write
+
+
+def test_journaled_write_detects_target_table():
+    assert is_journaled_write("INSERT OR IGNORE INTO assignments (person_id, shift_id) VALUES (?, ?)")
+    assert is_journaled_write('UPDATE "shifts" SET required_people = 2')
+    assert not is_journaled_write("UPDATE duty_types SET min_age = 16")
+    assert not is_journaled_write("DELETE FROM persons WHERE person_id = ?")
+    assert not is_journaled_write("SELECT * FROM events")
+
+
+def test_untracked_writes_keep_redo(db):
+    event_id = db.add_event("Sommerfest", "2026-07-05", "2026-07-05")
+    assert db.undo() is not None
+    assert db.redo_label() is not None
+    db.add_duty_type("Grill")
+    db.add_person(first_name="Anna", last_name="Test", display_name="Anna T.", status="Aktiv", birth_date="1990-01-01")
+    assert db.redo_label() is not None
+    assert db.redo() is not None and db.get_event_by_id(event_id) is not None
+    assert db.undo() is not None
+    db.add_event("Herbstfest", "2026-10-04", "2026-10-04")
+    assert db.redo_label() is None
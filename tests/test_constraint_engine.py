@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Laufende Summen und Deltas der Live-Prüfung gegen eine vollständige Neuprüfung."""
+import random
+from collections import Counter
+
+import pytest
+
+from utils.plan_validator import PlanValidator
+
+
+def _recount(engine):
+    return sum(s.required for s in engine.model.shifts.values()), sum(len(p) for p in engine.model.shift_persons.values())
+
+
+def test_staffing_totals_follow_deltas(db, small_event):
+    event_id, shifts, persons = small_event["event_id"], small_event["shifts"], small_event["persons"]
+    engine = db.get_constraint_engine(event_id)
+    assert engine.staffing() == (4, 2)
+    db.assign_person_to_shift(persons[1], shifts[0])
+    assert engine.staffing() == (4, 3) == _recount(engine)
+    db.remove_person_from_shift(persons[0], shifts[0])
+    db.remove_person_from_shift(persons[0], shifts[0])  # schon entfernt: keine Änderung
+    assert engine.staffing() == (4, 2) == _recount(engine)
+    status = db.get_live_plan_status(event_id)
+    assert (status["required"], status["assigned"]) == (4, 2)
+
+
+def test_staffing_totals_after_incremental_reload(db, small_event):
+    engine = db.get_constraint_engine(small_event["event_id"])
+    db.execute_query("INSERT INTO assignments (person_id, shift_id) VALUES (?, ?)", (small_event["persons"][0], small_event["shifts"][1]))
+    engine.mark_dirty(small_event["shifts"][1])
+    engine.validate()
+    assert engine.staffing() == (4, 3) == _recount(engine)
+
+
+def _key(v):
+    return v.rule_id, v.severity, v.shift_id, v.person_id, v.message
+
+
+@pytest.fixture
+def crowded_day(db):
+    """Ein Event mit überlappenden, angrenzenden, gleichen und Nacht-Schichten; ein zweites Event am selben Tag."""
+    grill = db.add_duty_type("Grill", "", 18)
+    event_id = db.add_event("Sommerfest", "2026-07-05", "2026-07-06")
+    other = db.add_event("Flohmarkt", "2026-07-05", "2026-07-05")
+    task = db.add_task(event_id, grill, "Grillstand")
+    other_task = db.add_task(other, grill, "Stand")
+    times = [("10:00", "12:00"), ("12:00", "14:00"), ("11:00", "13:00"), ("10:00", "12:00"), ("14:00", "14:00"), ("22:00", "02:00"), ("08:00", "10:00")]
+    shifts = [db.add_shift(task, "2026-07-05", start, end, 2) for start, end in times] + [db.add_shift(task, "2026-07-06", "01:00", "03:00", 1)]
+    external = db.add_shift(other_task, "2026-07-05", "14:00", "16:00", 1)
+    persons = [db.add_person(first_name=f"Helfer{i}", last_name="Test", display_name=f"Helfer{i} T.", status="Aktiv", birth_date=birth) for i, birth in enumerate(("1990-01-01", "2010-03-01", "1985-05-05"))]
+    db.set_person_restrictions(persons[2], [grill])
+    return {"event_id": event_id, "shifts": shifts, "external": external, "persons": persons}
+
+
+def test_deltas_match_full_validation(db, crowded_day):
+    event_id, shifts, persons = crowded_day["event_id"], crowded_day["shifts"], crowded_day["persons"]
+    engine = db.get_constraint_engine(event_id)
+    rng = random.Random(27)
+    for step in range(300):
+        person_id = rng.choice(persons)
+        if rng.random() < 0.05:
+            db.assign_person_to_shift(person_id, crowded_day["external"])
+        elif rng.random() < 0.55:
+            db.assign_person_to_shift(person_id, rng.choice(shifts))  # auch doppelt
+        else:
+            db.remove_person_from_shift(person_id, rng.choice(shifts))
+        live = engine.validate()
+        full = PlanValidator(db, event_id).validate()
+        assert sorted(map(_key, live)) == sorted(map(_key, full)), step
+        assert +engine.rule_counts == Counter(v.rule_id for v in full)
+        assert +engine.severity_counts == Counter(v.severity for v in full)
+        assert +engine.shift_badges == Counter(v.shift_id for v in full if v.shift_id is not None)
+        for sid in shifts: assert sorted(map(_key, engine.violations_for_shift(sid))) == sorted(_key(v) for v in full if v.shift_id == sid)
+
+
+def test_delta_does_not_recheck_whole_person(db, crowded_day, monkeypatch):
+    event_id, shifts, persons = crowded_day["event_id"], crowded_day["shifts"], crowded_day["persons"]
+    engine = db.get_constraint_engine(event_id)
+    monkeypatch.setattr(engine, "_refresh_person", lambda *args: pytest.fail("Delta prüft die ganze Person neu"))
+    for sid in shifts: db.assign_person_to_shift(persons[0], sid)
+    for sid in shifts[::2]: db.remove_person_from_shift(persons[0], sid)
+    assert engine.rule_counts["OVERLAP"] > 0 and engine.rule_counts["DAILY_CAP"] == 1
+
+
+def test_bulk_changes_refresh_neighbouring_events(db, crowded_day):
+    event_id, shifts, persons = crowded_day["event_id"], crowded_day["shifts"], crowded_day["persons"]
+    external = lambda name: [v for v in db.get_plan_violations(event_id) if f"'{name}: " in v.message]
+    db.assign_person_to_shift(persons[0], shifts[1])
+    db.assign_person_to_shift(persons[0], crowded_day["external"])
+    assert external("Flohmarkt")  # 12-14 Uhr grenzt an 14-16 Uhr im Flohmarkt
+    other = db.execute_query("SELECT event_id FROM tasks t JOIN shifts s ON s.task_id = t.task_id WHERE s.shift_id = ?", (crowded_day["external"],), fetch="one")[0]
+    db.clear_assignments_for_event(other)
+    assert not external("Flohmarkt")
+    ok, _, copy_id, _ = db.copy_event(event_id, "Sommerfest (Kopie)", "2026-07-05", "full")
+    assert ok and external("Sommerfest (Kopie)")
+    db.get_plan_violations(copy_id)
+    db.add_assignments([], replace_event_id=copy_id)
+    assert not external("Sommerfest (Kopie)")
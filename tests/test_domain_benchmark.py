@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""Benchmark der Fachobjekte: Helfer-Liste einer Schicht mit 1.500 Personen gegen die frühere
+Variante (Dict je Helfer, eine Kompetenz-Abfrage je Helfer, korrelierte Abfragen für Punkte und
+bestehende Zuweisungen) und Speicherbedarf der Kandidaten-Pools."""
+import random
+import time
+import tracemalloc
+from collections import defaultdict
+
+import pytest
+
+from database_manager import DatabaseManager
+from utils import settings_manager
+from utils.domain import Candidate, HAS_COMPETENCE, TEAM_LEADER
+from utils.event_model import busy_in_window, shift_duration, shift_interval, MAX_SHIFT_MINUTES
+
+N_PERSONS = 1500
+# Frühere Punkte-Abfrage: Join mit OR vergleicht jede Person mit jeder Zuweisung
+OLD_SCORES = "SELECT p.person_id, p.display_name, p.status, a.attendance_status, a.substitute_person_id, e.start_date FROM persons p LEFT JOIN assignments a ON p.person_id = a.person_id OR p.person_id = a.substitute_person_id LEFT JOIN shifts s ON a.shift_id = s.shift_id LEFT JOIN tasks t ON s.task_id = t.task_id LEFT JOIN events e ON t.event_id = e.event_id ORDER BY p.person_id, e.start_date DESC"
+
+
+@pytest.fixture(scope="module")
+def crowded(tmp_path_factory):
+    """1.500 Mitglieder (die Hälfte mit Kompetenz), ein Tag mit 40 Schichten und 3.000 Zuweisungen."""
+    directory = tmp_path_factory.mktemp("crowded")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings_manager, "CONFIG_FILE", str(directory / "config.ini"))
+        db = DatabaseManager(str(directory / "crowded.db"))
+    rng = random.Random(47)
+    cursor = db.conn.cursor()
+    cursor.execute("BEGIN TRANSACTION")
+    cursor.execute("UPDATE journal_state SET enabled = 0")
+    cursor.execute("INSERT INTO duty_types (name, min_age) VALUES ('Ausschank', 16)")
+    duty_type_id = cursor.lastrowid
+    cursor.executemany("INSERT INTO persons (first_name, last_name, display_name, status, birth_date) VALUES (?, 'Test', ?, ?, ?)",
+                       ((f"P{i}", f"Person {i:04d}", rng.choice(("Aktiv", "Aktiv", "Passiv")), f"{rng.randint(1960, 2012)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}") for i in range(N_PERSONS)))
+    person_ids = [row[0] for row in cursor.execute("SELECT person_id FROM persons")]
+    cursor.executemany("INSERT INTO person_competencies (person_id, duty_type_id, is_team_leader) VALUES (?, ?, ?)", ((pid, duty_type_id, int(rng.random() < 0.2)) for pid in person_ids if rng.random() < 0.5))
+    cursor.execute("INSERT INTO events (name, start_date, end_date) VALUES ('Großes Fest', '2026-07-04', '2026-07-04')")
+    cursor.execute("INSERT INTO tasks (event_id, duty_type_id, name) VALUES (?, ?, 'Ausschank')", (cursor.lastrowid, duty_type_id))
+    task_id = cursor.lastrowid
+    rows = []
+    for i in range(40):
+        start, end = f"{8 + i % 12:02d}:00", f"{10 + i % 12:02d}:00"
+        start_ts, end_ts = shift_interval("2026-07-04", start, end)
+        rows.append((task_id, start, end, shift_duration(start_ts, end_ts), start_ts, end_ts))
+    cursor.executemany("INSERT INTO shifts (task_id, shift_date, start_time, end_time, required_people, duration_min, start_ts, end_ts) VALUES (?, '2026-07-04', ?, ?, 5, ?, ?, ?)", rows)
+    shift_ids = [row[0] for row in cursor.execute("SELECT shift_id FROM shifts")]
+    statuses = ("Geplant", "Erledigt", "Nicht Erschienen", "Erledigt (durch Vertreter)")
+    cursor.executemany("INSERT INTO assignments (person_id, shift_id, attendance_status, substitute_person_id) VALUES (?, ?, ?, ?)",
+                       ((rng.choice(person_ids), rng.choice(shift_ids), status, rng.choice(person_ids) if status == statuses[-1] else None) for status in (rng.choice(statuses) for _ in range(3000))))
+    cursor.execute("UPDATE journal_state SET enabled = 1")
+    cursor.execute("COMMIT")
+    yield db, shift_ids
+    db.close()
+
+
+def _old_scores(db):
+    """Punktestand wie calculate_scores(include_inactive=True), aber über die frühere OR-Abfrage."""
+    scores = {}
+    for row in db.execute_query(OLD_SCORES, fetch="all"):
+        pid = row["person_id"]
+        scores.setdefault(pid, 0)
+        if not row["attendance_status"]: continue
+        if row["substitute_person_id"] == pid: scores[pid] += 1
+        elif row["attendance_status"] == "Erledigt": scores[pid] += 1
+        elif row["attendance_status"] == "Nicht Erschienen": scores[pid] -= 2
+    return scores
+
+
+def _helpers_per_row(db, shift_id):
+    """Frühere Helfer-Liste: Dict je Helfer, Kompetenz per Einzelabfrage, Warnungen als Text."""
+    shift = db.execute_query("SELECT s.shift_date, s.start_ts, s.end_ts, t.duty_type_id, dt.min_age FROM shifts s JOIN tasks t ON s.task_id = t.task_id JOIN duty_types dt ON t.duty_type_id = dt.duty_type_id WHERE s.shift_id = ?", (shift_id,), fetch="one")
+    new_start, new_end, duty_type_id, shift_date, min_age = shift["start_ts"], shift["end_ts"], shift["duty_type_id"], shift["shift_date"], shift["min_age"]
+    helpers = db.execute_query(f"SELECT p.person_id, p.display_name, p.status, p.birth_date FROM persons p WHERE p.status IN ('Aktiv', 'Passiv') AND NOT EXISTS (SELECT 1 FROM person_duty_restrictions WHERE person_id = p.person_id AND duty_type_id = ?) AND NOT EXISTS (SELECT 1 FROM assignments WHERE person_id = p.person_id AND shift_id = ?) AND p.person_id NOT IN ({db.unavailability.person_subquery()})", (duty_type_id, shift_id, new_end, new_start), fetch="all")
+    score_map = _old_scores(db)
+    schedule, per_day = defaultdict(list), defaultdict(lambda: defaultdict(int))
+    for row in busy_in_window(db, new_start - MAX_SHIFT_MINUTES, new_end + MAX_SHIFT_MINUTES):
+        schedule[row["person_id"]].append((row["start_ts"], row["end_ts"]))
+        per_day[row["person_id"]][row["shift_date"]] += 1
+    result = []
+    for helper in helpers:
+        pid = helper["person_id"]
+        if any(new_start < e and new_end > s for s, e in schedule.get(pid, [])): continue
+        warnings = []
+        if any(new_start == e or new_end == s for s, e in schedule.get(pid, [])): warnings.append("Keine Pause")
+        daily_count = per_day[pid][shift_date]
+        if daily_count >= 2: warnings.append(f"{daily_count} Dienste heute")
+        age = db._calculate_age_at_date(helper["birth_date"], shift_date)
+        if age < min_age: warnings.append(f"Zu jung ({age})")
+        competence = db.execute_query("SELECT is_team_leader FROM person_competencies WHERE person_id = ? AND duty_type_id = ?", (pid, duty_type_id), fetch="one")
+        result.append({"person_id": pid, "display_name": helper["display_name"], "status": helper["status"], "score": score_map.get(pid, 0), "has_competence": 1 if competence else 0, "is_team_leader": competence["is_team_leader"] if competence else 0, "warnings": ", ".join(warnings)})
+    result.sort(key=lambda x: (-x["is_team_leader"], -x["has_competence"], -(len(x["warnings"]) == 0), x["display_name"]))
+    return result
+
+
+def _timed(func, runs=3):
+    best, result = None, None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def test_helper_list_matches_and_is_faster(crowded):
+    db, shift_ids = crowded
+    sample = shift_ids[::20]
+    old, old_time = _timed(lambda: [_helpers_per_row(db, sid) for sid in sample], runs=1)
+    new, new_time = _timed(lambda: [db.get_available_helpers_for_shift(sid) for sid in sample])
+    for before, after in zip(old, new):
+        assert len(after) > N_PERSONS // 2
+        assert [(h["person_id"], h["is_team_leader"], h["has_competence"], h["warnings"], h["score"]) for h in before] == \
+               [(h.person_id, int(h.is_team_leader), int(h.has_competence), h.warning_text, h.score) for h in after]
+    assert new_time * 5 < old_time  # gemessen etwa 0,05 s gegen 0,9 s je Schicht
+
+
+def test_scores_match_or_join(crowded):
+    db, _ = crowded
+    assert {s["person_id"]: s["total_score"] for s in db.calculate_scores(include_inactive=True)} == _old_scores(db)
+
+
+def test_slotted_candidates_need_less_memory():
+    rng = random.Random(47)
+    rows = [(pid, f"Person {pid:04d}", rng.randint(0, 1), rng.randint(-5, 5), rng.choice((0, HAS_COMPETENCE, HAS_COMPETENCE | TEAM_LEADER))) for pid in range(20_000)]
+
+    def measure(build):
+        tracemalloc.start()
+        objects = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        assert len(objects) == len(rows)
+        return size
+
+    as_dicts = measure(lambda: [{"person_id": p, "display_name": n, "status": s, "history": h, "flags": f} for p, n, s, h, f in rows])
+    as_slots = measure(lambda: [Candidate(p, n, s, h, f) for p, n, s, h, f in rows])
+    assert as_slots < as_dicts * 0.6
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""Stundenauswertung: eigene Dienste, Vertretungen, Schichten über Mitternacht und Jahresfilter."""
+import random
+import time
+from collections import defaultdict
+
+import pytest
+
+from database_manager import DatabaseManager
+from utils import settings_manager
+from utils.event_model import shift_duration, shift_interval
+
+# Bisherige Abfrage (strftime je Zeile) als Referenz für die synthetische Historie
+OLD_SUMMARY = "WITH worked_shifts AS (SELECT a.person_id, s.start_time, s.end_time, e.start_date FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id JOIN events e ON t.event_id = e.event_id WHERE a.attendance_status = 'Erledigt' UNION ALL SELECT a.substitute_person_id AS person_id, s.start_time, s.end_time, e.start_date FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id JOIN events e ON t.event_id = e.event_id WHERE a.attendance_status = 'Erledigt (durch Vertreter)') SELECT p.display_name AS name, COUNT(*) as duty_count, SUM(CASE WHEN ws.end_time < ws.start_time THEN (strftime('%s', '2000-01-02 ' || ws.end_time || ':00') - strftime('%s', '2000-01-01 ' || ws.start_time || ':00')) / 3600.0 ELSE (strftime('%s', '2000-01-01 ' || ws.end_time || ':00') - strftime('%s', '2000-01-01 ' || ws.start_time || ':00')) / 3600.0 END) AS total_hours FROM persons p JOIN worked_shifts ws ON p.person_id = ws.person_id {where} GROUP BY p.person_id ORDER BY total_hours DESC, name ASC;"
+STATUSES = ("Geplant", "Erledigt", "Erledigt (durch Vertreter)", "Entschuldigt", "Nicht Erschienen")
+HISTORY_ASSIGNMENTS = 100_000
+
+
+def _assignment_id(db, person_id, shift_id):
+    return db.execute_query("SELECT assignment_id FROM assignments WHERE person_id = ? AND shift_id = ?", (person_id, shift_id), fetch="one")[0]
+
+
+@pytest.fixture
+def worked(db):
+    """Anna: 2 h erledigt (dieses Jahr) + 7 h Nachtschicht (2020); Ben: vertritt 2,5 h für Carl (dieses Jahr)."""
+    this_year = db.execute_query("SELECT strftime('%Y', 'now')", fetch="one")[0]
+    duty_type_id = db.add_duty_type("Aufbau")
+    persons = {name: db.add_person(first_name=name, last_name="Test", display_name=name, status="Aktiv", birth_date="1990-01-01") for name in ("Anna", "Ben", "Carl", "Dora")}
+    current = db.add_event("Fest", f"{this_year}-06-01", f"{this_year}-06-01")
+    old = db.add_event("Altes Fest", "2020-06-01", "2020-06-02")
+    task = db.add_task(current, duty_type_id, "Aufbau")
+    old_task = db.add_task(old, duty_type_id, "Nachtwache")
+    day = db.add_shift(task, f"{this_year}-06-01", "10:00", "12:00")
+    late = db.add_shift(task, f"{this_year}-06-01", "12:00", "14:30")
+    night = db.add_shift(old_task, "2020-06-01", "22:00", "05:00")
+    empty = db.add_shift(task, f"{this_year}-06-01", "08:00", "08:00")
+    db.add_assignments([(persons["Anna"], day), (persons["Anna"], night), (persons["Carl"], late), (persons["Dora"], empty), (persons["Dora"], day)])
+    db.update_assignment_status(_assignment_id(db, persons["Anna"], day), "Erledigt")
+    db.update_assignment_status(_assignment_id(db, persons["Anna"], night), "Erledigt")
+    db.update_assignment_status(_assignment_id(db, persons["Carl"], late), "Erledigt (durch Vertreter)", persons["Ben"])
+    db.update_assignment_status(_assignment_id(db, persons["Dora"], empty), "Erledigt")
+    db.update_assignment_status(_assignment_id(db, persons["Dora"], day), "Erledigt (durch Vertreter)")  # ohne Vertreter
+    return db
+
+
+def _by_name(rows):
+    return {row["name"]: (row["duty_count"], row["total_hours"]) for row in rows}
+
+
+def test_hours_all_time(worked):
+    expected = {"Anna": (2, 9.0), "Ben": (1, 2.5), "Dora": (1, 0.0)}
+    assert _by_name(worked.get_hours_and_duties_summary()) == expected
+    assert _by_name(worked.calculate_worked_hours()) == expected
+
+
+def test_hours_current_year(worked):
+    expected = {"Anna": (1, 2.0), "Ben": (1, 2.5), "Dora": (1, 0.0)}
+    assert _by_name(worked.get_hours_and_duties_summary("current_year")) == expected
+    assert _by_name(worked.calculate_worked_hours("current_year")) == expected
+
+
+def test_migration_resets_equal_times_to_zero(db, tmp_path):
+    duty_type_id = db.add_duty_type("Aufbau")
+    task = db.add_task(db.add_event("Fest", "2026-06-01", "2026-06-01"), duty_type_id, "Aufbau")
+    shift_id = db.add_shift(task, "2026-06-01", "08:00", "08:00")
+    db.execute_query("UPDATE shifts SET duration_min = 1440 WHERE shift_id = ?", (shift_id,))
+    db.execute_query("PRAGMA user_version = 9")
+    db.close()
+    reopened = DatabaseManager(str(tmp_path / "test.db"))
+    row = reopened.execute_query("SELECT duration_min, end_ts - start_ts FROM shifts WHERE shift_id = ?", (shift_id,), fetch="one")
+    assert tuple(row) == (0, 24 * 60)
+    reopened.close()
+
+
+def test_equal_times_count_zero_hours_but_block_a_full_day(db, small_event):
+    shift_id = db.add_shift(small_event["task_id"], "2026-07-05", "08:00", "08:00")
+    row = db.execute_query("SELECT duration_min, end_ts - start_ts FROM shifts WHERE shift_id = ?", (shift_id,), fetch="one")
+    assert tuple(row) == (0, 24 * 60)
+    db.assign_person_to_shift(small_event["persons"][0], shift_id)  # überschneidet sich mit 10:00-12:00
+    rules = {(v.rule_id, v.person_id) for v in db.get_constraint_engine(small_event["event_id"]).validate()}
+    assert ("OVERLAP", small_event["persons"][0]) in rules
+
+
+@pytest.fixture(scope="module")
+def history(tmp_path_factory):
+    """Synthetische Historie: 100k Zuweisungen über sechs Jahre, mit Nachtschichten, gleichen Anfangs-/Endzeiten,
+    Vertretungen (auch ohne eingetragenen Vertreter) und allen Anwesenheitsstatus."""
+    directory = tmp_path_factory.mktemp("history")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings_manager, "CONFIG_FILE", str(directory / "config.ini"))
+        db = DatabaseManager(str(directory / "history.db"))
+    rng = random.Random(28)
+    this_year = int(db.execute_query("SELECT strftime('%Y', 'now')", fetch="one")[0])
+    cursor = db.conn.cursor()
+    cursor.execute("BEGIN TRANSACTION")
+    cursor.execute("UPDATE journal_state SET enabled = 0")
+    cursor.execute("INSERT INTO duty_types (name) VALUES ('Historie')")
+    duty_type_id = cursor.lastrowid
+    cursor.executemany("INSERT INTO persons (first_name, last_name, display_name) VALUES (?, 'Test', ?)", ((f"P{i}", f"Person {i:03d}") for i in range(300)))
+    person_ids = [row[0] for row in cursor.execute("SELECT person_id FROM persons")]
+    shift_rows = []
+    for e in range(60):
+        day = f"{this_year - 5 + e % 6}-{1 + e % 12:02d}-{1 + e % 28:02d}"
+        cursor.execute("INSERT INTO events (name, start_date, end_date) VALUES (?, ?, ?)", (f"Event {e}", day, day))
+        cursor.execute("INSERT INTO tasks (event_id, duty_type_id, name) VALUES (?, ?, 'Dienst')", (cursor.lastrowid, duty_type_id))
+        task_id = cursor.lastrowid
+        for _ in range(25):
+            start = f"{rng.randrange(24):02d}:{rng.choice((0, 15, 30, 45)):02d}"
+            end = start if rng.random() < 0.05 else f"{rng.randrange(24):02d}:{rng.choice((0, 15, 30, 45)):02d}"
+            start_ts, end_ts = shift_interval(day, start, end)
+            shift_rows.append((task_id, day, start, end, shift_duration(start_ts, end_ts), start_ts, end_ts))
+    cursor.executemany("INSERT INTO shifts (task_id, shift_date, start_time, end_time, required_people, duration_min, start_ts, end_ts) VALUES (?, ?, ?, ?, 1, ?, ?, ?)", shift_rows)
+    shift_ids = [row[0] for row in cursor.execute("SELECT shift_id FROM shifts")]
+    rows = []
+    for _ in range(HISTORY_ASSIGNMENTS):
+        status = rng.choice(STATUSES)
+        substitute = (rng.choice(person_ids) if rng.random() < 0.9 else None) if status == "Erledigt (durch Vertreter)" else None
+        rows.append((rng.choice(shift_ids), rng.choice(person_ids), substitute, status))
+    cursor.executemany("INSERT INTO assignments (shift_id, person_id, substitute_person_id, attendance_status) VALUES (?, ?, ?, ?)", rows)
+    cursor.execute("UPDATE journal_state SET enabled = 1")
+    cursor.execute("COMMIT")
+    yield db, this_year
+    db.close()
+
+
+def _old_summary(db, time_filter):
+    w = "WHERE strftime('%Y', ws.start_date) = strftime('%Y', 'now')" if time_filter == "current_year" else ""
+    return [dict(row) for row in db.execute_query(OLD_SUMMARY.format(where=w), fetch="all")]
+
+
+def _best_of(runs, func):
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+@pytest.mark.parametrize("time_filter", ["all", "current_year"])
+def test_history_matches_old_summary_and_is_faster(history, time_filter):
+    db, _ = history
+    old, old_time = _best_of(3, lambda: _old_summary(db, time_filter))
+    new, new_time = _best_of(3, lambda: db.get_hours_and_duties_summary(time_filter))
+    assert len(new) == len(old) > 0
+    assert {r["name"]: r["duty_count"] for r in new} == {r["name"]: r["duty_count"] for r in old}
+    assert {r["name"]: r["total_hours"] for r in new} == pytest.approx({r["name"]: r["total_hours"] for r in old})
+    assert new_time < old_time
+
+
+def _hours(start, end):
+    """Stunden wie in der bisherigen Berechnung: Ende vor Beginn = Folgetag, gleiche Zeiten = 0."""
+    minutes = lambda t: int(t[:2]) * 60 + int(t[3:])
+    diff = minutes(end) - minutes(start)
+    return (diff + 1440 if diff < 0 else diff) / 60
+
+
+@pytest.mark.parametrize("time_filter", ["all", "current_year"])
+def test_history_detailed_summary(history, time_filter):
+    db, this_year = history
+    expected = defaultdict(lambda: {"total_hours": 0.0, "total_done": 0, "total_substitute": 0, "total_excused": 0, "total_absent": 0})
+    rows = db.execute_query("SELECT p.display_name, sp.display_name AS substitute, a.attendance_status, s.start_time, s.end_time, e.start_date FROM assignments a JOIN persons p ON a.person_id = p.person_id LEFT JOIN persons sp ON a.substitute_person_id = sp.person_id JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id JOIN events e ON t.event_id = e.event_id", fetch="all")
+    for name, substitute, status, start, end, start_date in rows:
+        if time_filter == "current_year" and int(start_date[:4]) != this_year: continue
+        if status == "Erledigt":
+            expected[name]["total_done"] += 1; expected[name]["total_hours"] += _hours(start, end)
+        elif status == "Entschuldigt": expected[name]["total_excused"] += 1
+        elif status == "Nicht Erschienen": expected[name]["total_absent"] += 1
+        elif status == "Erledigt (durch Vertreter)" and substitute is not None:
+            expected[substitute]["total_substitute"] += 1; expected[substitute]["total_hours"] += _hours(start, end)
+    started = time.perf_counter()
+    result = db.get_detailed_member_summary(time_filter)
+    assert time.perf_counter() - started < 2.0
+    assert {r["name"] for r in result} == set(expected)
+    for r in result:
+        want = expected[r["name"]]
+        assert r["total_hours"] == pytest.approx(want["total_hours"])
+        assert (r["total_done"], r["total_substitute"], r["total_excused"], r["total_absent"]) == (want["total_done"], want["total_substitute"], want["total_excused"], want["total_absent"])
+    hours = [r["total_hours"] for r in result]
+    assert hours == sorted(hours, reverse=True)
+
+
+def test_detailed_summary_by_hand(worked):
+    dora = worked.execute_query("SELECT person_id FROM persons WHERE display_name = 'Dora'", fetch="one")[0]
+    shift = worked.execute_query("SELECT shift_id FROM shifts WHERE start_time = '12:00'", fetch="one")[0]
+    worked.add_assignments([(dora, shift)])
+    worked.update_assignment_status(_assignment_id(worked, dora, shift), "Nicht Erschienen")
+    rows = {r["name"]: (r["total_hours"], r["total_done"], r["total_substitute"], r["total_excused"], r["total_absent"]) for r in worked.get_detailed_member_summary()}
+    assert rows == {"Anna": (9.0, 2, 0, 0, 0), "Ben": (2.5, 0, 1, 0, 0), "Dora": (0.0, 1, 0, 0, 1)}
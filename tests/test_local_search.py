@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""Die Nachoptimierung darf keine Schichten ohne Pause oder über dem Tageslimit neu erzeugen."""
+import pytest
+
+from utils.local_search import improve_plan
+from utils.planner import PlanningProblem, PlanState, run_greedy
+
+
+@pytest.fixture
+def tight_event(db):
+    """Ein Tag mit sechs direkt aufeinanderfolgenden Schichten und zu wenigen Helfern."""
+    duty_type_id = db.add_duty_type("Flohmarktstand")
+    event_id = db.add_event("Flohmarkt", "2026-08-01", "2026-08-01")
+    task_id = db.add_task(event_id, duty_type_id, "Stand")
+    shifts = [db.add_shift(task_id, "2026-08-01", f"{h:02d}:00", f"{h + 2:02d}:00", 2) for h in range(8, 20, 2)]
+    persons = [db.add_person(first_name=f"Kassierer{i}", last_name="Test", display_name=f"Kassierer{i} T.", status="Aktiv", birth_date="1990-01-01") for i in range(4)]
+    return event_id, shifts, persons
+
+
+def _violations(result):
+    return result.no_break + result.over_cap
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_improve_never_adds_violations(db, tight_event, seed):
+    problem = PlanningProblem.load(db, tight_event[0])
+    start = run_greedy(problem, seed)
+    improved = improve_plan(problem, start, max_iterations=3000, seed=seed)
+    assert _violations(improved) <= _violations(start)
+    assert improved.cost <= start.cost
+
+
+def test_can_add_rejects_adjacent_and_over_cap(db, tight_event):
+    _, shifts, persons = tight_event
+    state = PlanState(PlanningProblem.load(db, tight_event[0]))
+    pid = persons[0]
+    state.add(pid, shifts[0])
+    assert not state.can_add(pid, shifts[1])  # schließt direkt an
+    assert state.can_add(pid, shifts[2])
+    state.add(pid, shifts[2])
+    assert not state.can_add(pid, shifts[4])  # dritte Schicht am selben Tag
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""Rauchtest der beiden PDF-Exporte (Dienstplan-Matrix und Nachbereitungs-Bögen)."""
+from utils.exporter import Exporter
+
+
+def _is_pdf(path):
+    with open(path, "rb") as f:
+        return f.read(5) == b"%PDF-"
+
+
+def test_plan_matrix_pdf(db, settings, small_event, tmp_path):
+    path = tmp_path / "plan.pdf"
+    data = db.get_export_data_for_event(small_event["event_id"])
+    assert Exporter.export_to_pdf_matrix(data, "Sommerfest", str(path), settings)
+    assert _is_pdf(path)
+
+
+def test_post_event_sheets_pdf(db, settings, small_event, tmp_path):
+    path = tmp_path / "nachbereitung.pdf"
+    data = db.get_post_event_data(small_event["event_id"])
+    assert Exporter.export_post_event_sheets(data, "Sommerfest", str(path), settings)
+    assert _is_pdf(path)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Planungsvorschlag: Neuplanung ohne vorheriges Löschen und Fortschritt innerhalb eines Durchlaufs."""
+from utils.planner import PlanningProblem, run_greedy
+
+
+def _plan(db, event_id):
+    return sorted(tuple(r) for r in db.execute_query("SELECT a.person_id, a.shift_id FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ?", (event_id,), fetch="all"))
+
+
+def test_replace_plans_without_touching_the_database(db, small_event):
+    event_id = small_event["event_id"]
+    before = _plan(db, event_id)
+    result = db.compute_planning_proposal(event_id, seed=1, replace=True)
+    assert _plan(db, event_id) == before
+    assert result.assignments
+    assert db.add_assignments(result.assignments, replace_event_id=event_id)
+    assert _plan(db, event_id) == sorted(result.assignments)
+    assert db.get_live_plan_status(event_id)["assigned"] == len(result.assignments)
+    db.undo()
+    assert _plan(db, event_id) == before
+
+
+def test_failed_replace_keeps_the_old_plan(db, small_event):
+    event_id = small_event["event_id"]
+    before = _plan(db, event_id)
+    assert not db.add_assignments([(small_event["persons"][0], None)], replace_event_id=event_id)
+    assert _plan(db, event_id) == before
+
+
+def test_single_run_reports_progress_per_shift(db, small_event):
+    problem = PlanningProblem.load(db, small_event["event_id"], replace=True)
+    reports = []
+    run_greedy(problem, 1, progress=lambda fraction, open_slots: reports.append((fraction, open_slots)))
+    assert len(reports) == 2 * len(problem.shifts)
+    assert reports[0] == (0.25, 4) and reports[-1][0] == 1.0
+    fractions = [f for f, _ in reports]
+    assert fractions == sorted(fractions)
+
+
+def test_stopping_a_run_returns_the_partial_plan(db, small_event):
+    problem = PlanningProblem.load(db, small_event["event_id"], replace=True)
+    partial = run_greedy(problem, 1, progress=lambda fraction, open_slots: fraction < 0.5)
+    assert len(partial.assignments) < len(run_greedy(problem, 1).assignments)
+
+
+def test_proposal_progress_within_one_run(db, small_event):
+    phases = []
+    db.compute_planning_proposal(small_event["event_id"], seed=1, replace=True, progress=lambda *args: phases.append(args))
+    in_run = [p for p in phases if p[2] != p[2]]  # NaN: Meldung aus dem laufenden Durchlauf
+    assert len(in_run) == 4
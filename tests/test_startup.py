@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Kaltstart: `python -X importtime -c "import main"` darf weder die Seiten-Widgets noch die schweren
+Bibliotheken laden und muss im Zeitbudget bleiben."""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COLD_START_BUDGET_US = 1_000_000  # Kumulierte Importzeit von main in Mikrosekunden
+DEFERRED = ("numpy", "pandas", "reportlab", "pypdf", "PIL", "cv2",
+            "widgets.stammdaten_widget", "widgets.duty_types_widget", "widgets.events_widget", "widgets.planning_widget",
+            "widgets.plan_matrix_widget", "widgets.post_event_widget", "widgets.ranking_widget", "utils.exporter")
+
+
+def _importtime(statement):
+    """{modul: kumulierte Importzeit in µs} aus der Ausgabe von -X importtime (frischer Prozess, kalte Caches für Python-Module)."""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cold_start_defers_pages_and_heavy_libraries():
+    times = _importtime("import main")
+    assert "main_window" in times
+    loaded = sorted(name for name in times if name.split(".")[0] in DEFERRED or name in DEFERRED)
+    assert loaded == []
+
+
+def test_cold_start_budget():
+    _importtime("import main")  # Erster Lauf füllt __pycache__, gemessen wird der zweite
+    assert _importtime("import main")["main"] < COLD_START_BUDGET_US
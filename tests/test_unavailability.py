@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""Abwesenheiten: Speichern als eine Transaktion und Filter in Helfer-Auswahl und Planung."""
+
+
+def _periods(db, person_id):
+    return [(r["start_date"], r["start_time"], r["end_date"], r["end_time"], r["reason"]) for r in db.get_person_unavailability(person_id)]
+
+
+def test_set_person_unavailability_replaces_all_or_nothing(db, small_event):
+    person_id = small_event["persons"][0]
+    old = [("2026-07-05", "00:00", "2026-07-05", "23:59", "Urlaub")]
+    assert db.set_person_unavailability(person_id, old)
+    db.execute_query("CREATE TRIGGER fail_insert BEFORE INSERT ON person_unavailability WHEN NEW.reason = 'boom' BEGIN SELECT RAISE(ABORT, 'boom'); END")
+    new = [("2026-08-01", "00:00", "2026-08-01", "23:59", "ok"), ("2026-08-02", "00:00", "2026-08-02", "23:59", "boom")]
+    assert not db.set_person_unavailability(person_id, new)
+    assert _periods(db, person_id) == old
+
+
+def test_absent_members_are_filtered(db, small_event):
+    first_shift = small_event["shifts"][0]
+    absent = db.add_person(first_name="Weg", last_name="Test", display_name="Weg T.", status="Aktiv", birth_date="1990-01-01")
+    db.set_person_unavailability(absent, [("2026-07-05", "09:00", "2026-07-05", "11:00", "")])
+    assert db.get_unavailable_shift_pairs(small_event["event_id"]) == {(absent, first_shift)}
+    assert absent not in {h.person_id for h in db.get_available_helpers_for_shift(first_shift)}
+    assert absent in {h.person_id for h in db.get_available_helpers_for_shift(small_event["shifts"][1])}
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Regressionskorpus: VectorRanking liefert dieselbe Reihenfolge wie ScalarRanking/candidate_score –
+mit Gleichständen, ausgeschlossenen (zu jungen) Kandidaten und der Spitzengruppe (tier)."""
+import random
+
+import pytest
+
+from utils.domain import Candidate, Person, Shift, HAS_COMPETENCE, TEAM_LEADER, TOO_YOUNG, STATUS_ACTIVE, STATUS_PASSIVE
+from utils.planner import PlanningProblem, ScalarRanking, VectorRanking, TOP_TIER_TL, TOP_TIER_FILL
+
+np = pytest.importorskip("numpy")
+
+CORPUS_SEEDS = range(40)
+
+
+def random_problem(seed):
+    """Zufälliges Problem im Speicher: wenige Punktestände (viele Gleichstände), direkt anschließende
+    und überlappende Schichten, bestehende Zuweisungen und Belegungen in anderen Events."""
+    rng = random.Random(seed)
+    problem = PlanningProblem(1)
+    n_persons = rng.randint(3, 25)
+    problem.persons = {pid: Person(pid, f"Person {pid:02d}", rng.choice((STATUS_ACTIVE, STATUS_PASSIVE)), "1990-01-01") for pid in range(1, n_persons + 1)}
+    day = 29_000_000
+    for sid in range(1, rng.randint(2, 30) + 1):
+        start = day + rng.choice((0, 60, 120, 180, 240, 300))
+        end = start + rng.choice((60, 120, 180))
+        problem.shifts.append(Shift(sid, 1, 1, "2025-06-01", "", "", start, end, rng.randint(1, 4), rng.randint(1, 3), "Aufgabe", "Dienst"))
+        pool = []
+        for pid, person in sorted(problem.persons.items()):
+            if rng.random() < 0.2: continue
+            flags = rng.choice((0, HAS_COMPETENCE, HAS_COMPETENCE | TEAM_LEADER))
+            if rng.random() < 0.1: flags |= TOO_YOUNG
+            pool.append(Candidate(pid, person.display_name, person.status, rng.choice((-2, -1, 0, 0, 1)), flags))
+            if flags & TEAM_LEADER: problem.competencies[(pid, problem.shifts[-1].duty_type_id)] = 1
+        problem.pools[sid] = pool
+    for shift in rng.sample(problem.shifts, k=len(problem.shifts) // 4):
+        problem.assigned[shift.shift_id] = rng.sample(sorted(problem.persons), k=1)
+    for pid in rng.sample(sorted(problem.persons), k=n_persons // 3):
+        start = day + rng.choice((-60, 0, 120, 360))
+        problem.external_busy[pid] = [(start, start + rng.choice((60, 120)))]
+    problem.shifts.sort(key=lambda s: (s.shift_date, s.start, s.shift_id))
+    return problem
+
+
+@pytest.mark.parametrize("seed", CORPUS_SEEDS)
+def test_vector_ranking_matches_scalar(seed):
+    problem = random_problem(seed)
+    scalar, vector = ScalarRanking(problem), VectorRanking(problem, np)
+    shifts = {s.shift_id: s for s in problem.shifts}
+    assigned = {s.shift_id: list(problem.assigned.get(s.shift_id, [])) for s in problem.shifts}
+    for sid, pids in problem.assigned.items():
+        for pid in pids: scalar.add(pid, shifts[sid]); vector.add(pid, shifts[sid])
+    rng = random.Random(seed)
+    compared = 0
+    for is_tl_search, tier in ((True, TOP_TIER_TL), (False, TOP_TIER_FILL)):
+        for shift in problem.shifts:
+            taken = assigned[shift.shift_id]
+            while len(taken) < shift.required:
+                scored, best, top = scalar.rank(shift, taken, is_tl_search, tier)
+                count, v_best, v_top = vector.rank(shift, taken, is_tl_search, tier)
+                assert count == len(scored)
+                assert v_best == best
+                assert [c.person_id for c in v_top] == [c.person_id for c in top]
+                compared += 1
+                if not top: break
+                chosen = rng.choice(top)
+                taken.append(chosen.person_id)
+                scalar.add(chosen.person_id, shift); vector.add(chosen.person_id, shift)
+                if is_tl_search: break
+    assert compared > 0
+
+
+def test_corpus_covers_ties_and_exclusions():
+    """Der Korpus enthält tatsächlich Gleichstände in der Spitzengruppe und ausgeschlossene Kandidaten."""
+    ties = excluded = 0
+    for seed in CORPUS_SEEDS:
+        problem = random_problem(seed)
+        ranking = ScalarRanking(problem)
+        for shift in problem.shifts:
+            scored, best, top = ranking.rank(shift, [], False, TOP_TIER_FILL)
+            scores = [score for score, _, _ in scored]
+            ties += len(scores) != len(set(scores))
+            excluded += any(c.flags & TOO_YOUNG for _, _, c in scored)
+    assert ties > 0 and excluded > 0
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+utils/age_eligibility.py
+
+Jugendschutz als vorberechnetes Bitset: je Person und Mindestalter ein int,
+dessen Bit i gesetzt ist, wenn die Person am i-ten Tag des Events alt genug ist.
+Das Geburtsdatum wird einmal je Person geprüft; danach ist jede Altersprüfung
+ein Bit-Test statt zweier strptime-Aufrufe. Ab welchem Tag jemand n Jahre alt
+ist, ergibt sich als Datums-String (Geburtstag + n Jahre) und lässt sich
+lexikografisch mit den Schichtdaten vergleichen – mit derselben Regel wie
+age_at_date (auch für den 29. Februar).
+"""
+from bisect import bisect_left
+from datetime import datetime
+
+
+def _valid_birth_date(birth_date):
+    """(Jahr, 'MM-TT') oder None für fehlende/ungültige Daten (gilt wie age_at_date als Alter 0)."""
+    if not birth_date: return None
+    try: datetime.strptime(birth_date, "%Y-%m-%d")
+    except ValueError: return None
+    return int(birth_date[:4]), birth_date[5:]
+
+
+class AgeEligibility:
+    """Person × Event-Tag-Bitsets für die Mindestalter der Dienste eines Events."""
+
+    def __init__(self, days, birth_dates, min_ages=()):
+        self.days = sorted(days)
+        self.day_index = {day: i for i, day in enumerate(self.days)}
+        self._all_days = (1 << len(self.days)) - 1
+        self._births = {pid: _valid_birth_date(b) for pid, b in birth_dates.items()}
+        self._bits = {}  # (person_id, min_age) -> int
+        for min_age in set(min_ages):
+            if min_age > 0:
+                for pid in self._births: self._bits[(pid, min_age)] = self._compute(pid, min_age)
+
+    def threshold(self, person_id, min_age):
+        """Erster Tag ('YYYY-MM-DD'), an dem die Person min_age Jahre alt ist; None = nie (kein Geburtsdatum)."""
+        birth = self._births.get(person_id)
+        return None if birth is None else f"{birth[0] + min_age:04d}-{birth[1]}"
+
+    def _compute(self, person_id, min_age):
+        first = self.threshold(person_id, min_age)
+        if first is None: return 0
+        return self._all_days & ~((1 << bisect_left(self.days, first)) - 1)
+
+    def is_eligible(self, person_id, min_age, day):
+        """Ist die Person am Tag alt genug? Tage außerhalb des Events werden direkt verglichen."""
+        if min_age <= 0: return True
+        index = self.day_index.get(day)
+        if index is None:
+            first = self.threshold(person_id, min_age)
+            return first is not None and day >= first
+        bits = self._bits.get((person_id, min_age))
+        if bits is None: bits = self._bits[(person_id, min_age)] = self._compute(person_id, min_age)
+        return bool(bits >> index & 1)
+
+    def knows(self, person_id):
+        return person_id in self._births
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+utils/backup_manager.py
+
+Sicherungen der Datenbank über die SQLite-Backup-API.
+Anders als eine Dateikopie ist die Sicherung auch bei gleichzeitigen Schreib-
+vorgängen konsistent; kopiert wird seitenweise in Schritten, sodass der Aufrufer
+den Fortschritt anzeigen kann und andere Verbindungen zwischendurch weiterarbeiten.
+Dazu kommen rotierende, gzip-komprimierte Schnappschüsse (z. B. vor jedem
+Planungsvorschlag und einmal täglich), von denen nur die neuesten N Generationen
+erhalten bleiben.
+"""
+import gzip
+import os
+import shutil
+import sqlite3
+from datetime import datetime
+
+PAGES_PER_STEP = 256         # Seiten pro Backup-Schritt (bei 4 KiB-Seiten 1 MiB)
+STEP_SLEEP = 0.25            # Pause zwischen zwei Schritten (Vorgabe von sqlite3), damit andere Verbindungen schreiben können
+SNAPSHOT_DIR_NAME = "backups"
+SNAPSHOT_SUFFIX = ".db.gz"
+DEFAULT_KEEP = 10
+
+# Anlässe für Schnappschüsse (Teil des Dateinamens)
+REASON_DAILY = "taeglich"
+REASON_PLANNING = "planung"
+REASON_MANUAL = "manuell"
+
+
+def backup_database(db_path, dest_path, progress=None, pages=PAGES_PER_STEP, sleep=STEP_SLEEP):
+    """Sichert db_path nach dest_path (endet der Pfad auf .gz, wird komprimiert).
+    progress(kopierte_seiten, seiten_gesamt) wird nach jedem Schritt aufgerufen; sleep ist die Pause
+    zwischen den Schritten in Sekunden (0, wenn der Benutzer auf die Sicherung wartet).
+    Geschrieben wird zunächst in eine temporäre Datei, das Ziel entsteht erst am Ende."""
+    compress = dest_path.endswith(".gz")
+    raw_tmp = (dest_path[:-3] if compress else dest_path) + ".tmp"
+    gz_tmp = dest_path + ".tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+    try:
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(raw_tmp)
+        try:
+            on_step = (lambda status, remaining, total: progress(total - remaining, total)) if progress is not None else None
+            source.backup(target, pages=pages, progress=on_step, sleep=sleep)
+        finally:
+            target.close()
+            source.close()
+        if compress:
+            with open(raw_tmp, "rb") as src, gzip.open(gz_tmp, "wb", compresslevel=6) as dst: shutil.copyfileobj(src, dst)
+            os.replace(gz_tmp, dest_path)
+        else:
+            os.replace(raw_tmp, dest_path)
+    finally:
+        for path in (raw_tmp, gz_tmp):
+            if os.path.exists(path): os.remove(path)
+    return dest_path
+
+
+class SnapshotManager:
+    """Rotierende, komprimierte Schnappschüsse im Ordner 'backups' neben der Datenbank."""
+
+    def __init__(self, db_path, keep=DEFAULT_KEEP, folder=None):
+        self.db_path = db_path
+        self.keep = max(1, keep)
+        self.folder = folder or os.path.join(os.path.dirname(os.path.abspath(db_path)), SNAPSHOT_DIR_NAME)
+        self.prefix = os.path.splitext(os.path.basename(db_path))[0] + "_"
+
+    def create(self, reason=REASON_MANUAL, progress=None):
+        """Legt einen Schnappschuss an, räumt alte Generationen auf und liefert den Pfad.
+        Ohne Pause zwischen den Schritten: vor der Planung wartet der Benutzer im modalen Dialog darauf."""
+        name = f"{self.prefix}{datetime.now().strftime('%Y%m%d_%H%M%S')}_{reason}{SNAPSHOT_SUFFIX}"
+        path = backup_database(self.db_path, os.path.join(self.folder, name), progress, sleep=0)
+        self.rotate()
+        return path
+
+    def snapshots(self):
+        """Vorhandene Schnappschüsse, neueste zuerst (Zeitstempel im Namen sortiert lexikografisch)."""
+        if not os.path.isdir(self.folder): return []
+        names = [n for n in os.listdir(self.folder) if n.startswith(self.prefix) and n.endswith(SNAPSHOT_SUFFIX)]
+        return [os.path.join(self.folder, n) for n in sorted(names, reverse=True)]
+
+    def rotate(self):
+        """Löscht alle Schnappschüsse jenseits der neuesten self.keep Generationen."""
+        for path in self.snapshots()[self.keep:]:
+            try: os.remove(path)
+            except OSError as e: print(f"Alter Schnappschuss konnte nicht gelöscht werden: {e}")
+
+    def has_snapshot_today(self):
+        today = datetime.now().strftime("%Y%m%d")
+        return any(os.path.basename(p)[len(self.prefix):].startswith(today) for p in self.snapshots())
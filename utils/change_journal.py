@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+utils/change_journal.py
+
+Änderungsjournal für Rückgängig/Wiederholen.
+Trigger auf Events, Anhänge, Aufgaben, Schichten und Zuweisungen schreiben jede Änderung
+(Operation, Tabelle, Zeilen-ID, Werte vorher/nachher als JSON) in dieselbe
+Transaktion wie die Änderung selbst. Zusammengehörige Änderungen bilden eine
+Gruppe (eine Benutzeraktion, z. B. ein kompletter Planungsvorschlag).
+Rückgängig/Wiederholen spielt eine Gruppe mengenbasiert zurück bzw. erneut ein:
+aufeinanderfolgende Einträge gleicher Tabelle und Operation werden mit je einer
+Anweisung behandelt, 300 Zuweisungen also mit einem DELETE.
+"""
+import re
+
+JOURNALED_TABLES = ("events", "event_attachments", "tasks", "shifts", "assignments")
+MAX_UNDO_GROUPS = 100       # so viele Aktionen können mindestens rückgängig gemacht werden
+MAX_JOURNAL_ROWS = 100000   # ältere Gruppen werden verworfen, sobald das Journal größer wird
+PRUNE_INTERVAL = 50         # Aufräumen nur bei jeder n-ten neuen Gruppe (Grenzen gelten daher ungefähr)
+
+OP_INSERT, OP_UPDATE, OP_DELETE = "INSERT", "UPDATE", "DELETE"
+
+# Von eigenen Triggern gepflegte Spalten (utils/shift_counters.py): nicht protokolliert, nicht zurückgespielt
+DERIVED_COLUMNS = {"shifts": ("assigned_count", "tl_count")}
+
+# Anzeigetexte für Gruppen ohne eigene Bezeichnung (abgeleitet aus dem Eintrag der obersten Tabelle,
+# damit z. B. eine gelöschte Aufgabe nicht nach ihren mitgelöschten Zuweisungen benannt wird)
+DEFAULT_LABELS = {
+    ("assignments", OP_INSERT): "Helfer zuweisen",
+    ("assignments", OP_DELETE): "Helfer entfernen",
+    ("assignments", OP_UPDATE): "Zuweisung ändern",
+    ("shifts", OP_INSERT): "Schicht anlegen",
+    ("shifts", OP_DELETE): "Schicht löschen",
+    ("shifts", OP_UPDATE): "Schicht ändern",
+    ("tasks", OP_INSERT): "Aufgabe anlegen",
+    ("tasks", OP_DELETE): "Aufgabe löschen",
+    ("tasks", OP_UPDATE): "Aufgabe ändern",
+    ("events", OP_INSERT): "Event anlegen",
+    ("events", OP_DELETE): "Event löschen",
+    ("events", OP_UPDATE): "Event ändern",
+    ("event_attachments", OP_INSERT): "Anhang hinzufügen",
+    ("event_attachments", OP_DELETE): "Anhang entfernen",
+    ("event_attachments", OP_UPDATE): "Anhänge sortieren",
+}
+
+_WRITE_RE = re.compile(r"^\s*(?:INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+_TARGET_RE = re.compile(r"^\s*(?:(?:INSERT|REPLACE)(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[\"`\[]?(\w+)", re.IGNORECASE)
+
+
+def is_write(query):
+    return _WRITE_RE.match(query) is not None
+
+
+def is_journaled_write(query):
+    """Schreibende Abfrage auf eine protokollierte Tabelle (nur sie braucht eine eigene Gruppe).
+    Von anderen Tabellen führt weder eine Kaskade noch ein Trigger in protokollierte Spalten;
+    ist die Zieltabelle nicht erkennbar, gilt die Abfrage vorsichtshalber als protokolliert."""
+    if not is_write(query): return False
+    match = _TARGET_RE.match(query)
+    return match is None or match.group(1).lower() in JOURNALED_TABLES
+
+
+def create_journal_schema(cursor):
+    """Legt Journal-Tabellen und Trigger an (Migration v4)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_groups (
+            group_id INTEGER PRIMARY KEY, label TEXT, created TEXT NOT NULL,
+            undone INTEGER NOT NULL DEFAULT 0
+        )""")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_journal (
+            change_id INTEGER PRIMARY KEY AUTOINCREMENT, group_id INTEGER NOT NULL,
+            op TEXT NOT NULL, table_name TEXT NOT NULL, row_id INTEGER NOT NULL,
+            before_json TEXT, after_json TEXT
+        )""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_journal_group ON change_journal (group_id)")
+    # Eine Zeile: laufende Gruppe, ihre Bezeichnung und ob die Trigger schreiben (beim Zurückspielen aus)
+    cursor.execute("CREATE TABLE IF NOT EXISTS journal_state (id INTEGER PRIMARY KEY CHECK (id = 1), current_group INTEGER NOT NULL, label TEXT, enabled INTEGER NOT NULL)")
+    cursor.execute("INSERT OR IGNORE INTO journal_state (id, current_group, label, enabled) VALUES (1, 0, NULL, 1)")
+    install_triggers(cursor)
+
+
+def _columns(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    rows = cursor.fetchall()
+    pk = next(r[1] for r in rows if r[5] == 1)
+    derived = DERIVED_COLUMNS.get(table, ())
+    return pk, [r[1] for r in rows if r[1] not in derived]
+
+
+def install_triggers(cursor):
+    """(Neu-)Anlage der Journal-Trigger. Muss nach jeder Migration laufen, die Spalten der
+    protokollierten Tabellen ändert, weil die Trigger die Spaltenliste fest enthalten."""
+    for table in JOURNALED_TABLES:
+        pk, cols = _columns(cursor, table)
+        new_json = "json_object(" + ", ".join(f"'{c}', NEW.{c}" for c in cols) + ")"
+        old_json = "json_object(" + ", ".join(f"'{c}', OLD.{c}" for c in cols) + ")"
+        group = "INSERT OR IGNORE INTO change_groups (group_id, label, created) SELECT current_group, label, datetime('now', 'localtime') FROM journal_state;"
+        when = "WHEN (SELECT enabled FROM journal_state) = 1"
+        for op, row_id, before, after in ((OP_INSERT, f"NEW.{pk}", "NULL", new_json), (OP_UPDATE, f"NEW.{pk}", old_json, new_json), (OP_DELETE, f"OLD.{pk}", old_json, "NULL")):
+            # Änderungen nur an abgeleiteten Spalten (Zähler) erzeugen keinen Eintrag
+            event = f"UPDATE OF {', '.join(cols)}" if op == OP_UPDATE else op
+            cursor.execute(f"DROP TRIGGER IF EXISTS journal_{table}_{op.lower()}")
+            cursor.execute(f"""
+                CREATE TRIGGER journal_{table}_{op.lower()} AFTER {event} ON {table} {when}
+                BEGIN
+                    {group}
+                    INSERT INTO change_journal (group_id, op, table_name, row_id, before_json, after_json)
+                    VALUES ((SELECT current_group FROM journal_state), '{op}', '{table}', {row_id}, {before}, {after});
+                END""")
+
+
+class ChangeJournal:
+    """Gruppenverwaltung sowie Rückgängig/Wiederholen auf einer Verbindung."""
+
+    def __init__(self, conn, cursor_factory=None, after_replay=None):
+        self.conn = conn
+        self.cursor_factory = cursor_factory or conn.cursor
+        self.after_replay = after_replay  # after_replay(cursor, group_id) noch in der Transaktion, z. B. für abgeleitete Spalten
+        self._columns = {}
+        self._groups_started = 0
+        cursor = conn.cursor()
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM change_groups WHERE undone = 1)")
+        self._redo_pending = bool(cursor.fetchone()[0])
+
+    def begin_group(self, cursor, label=None):
+        """Startet eine neue Gruppe in der laufenden Transaktion des Cursors.
+        Eine neue Aktion verwirft die Wiederholen-Liste; leere Gruppen hinterlassen keine Spuren."""
+        if self._redo_pending:
+            cursor.execute("DELETE FROM change_journal WHERE group_id IN (SELECT group_id FROM change_groups WHERE undone = 1)")
+            cursor.execute("DELETE FROM change_groups WHERE undone = 1")
+            self._redo_pending = False
+        cursor.execute("UPDATE journal_state SET current_group = current_group + 1, label = ?", (label,))
+        self._groups_started += 1
+        if self._groups_started % PRUNE_INTERVAL == 0: self._prune(cursor)
+
+    def _prune(self, cursor):
+        """Verwirft die ältesten Gruppen jenseits von MAX_UNDO_GROUPS bzw. MAX_JOURNAL_ROWS Einträgen (die jüngste Gruppe bleibt immer)."""
+        cursor.execute("SELECT group_id FROM change_groups ORDER BY group_id DESC LIMIT 1 OFFSET ?", (MAX_UNDO_GROUPS,))
+        row = cursor.fetchone()
+        cutoff = row[0] if row else 0
+        cursor.execute("""
+            SELECT group_id FROM (
+                SELECT group_id, SUM(cnt) OVER (ORDER BY group_id DESC) - cnt AS newer_rows
+                FROM (SELECT group_id, COUNT(*) AS cnt FROM change_journal GROUP BY group_id))
+            WHERE newer_rows >= ? ORDER BY group_id DESC LIMIT 1""", (MAX_JOURNAL_ROWS,))
+        row = cursor.fetchone()
+        if row: cutoff = max(cutoff, row[0])
+        if cutoff:
+            cursor.execute("DELETE FROM change_journal WHERE group_id <= ?", (cutoff,))
+            cursor.execute("DELETE FROM change_groups WHERE group_id <= ?", (cutoff,))
+
+    # --- Abfragen ---
+    def _peek(self, undone):
+        order = "DESC" if not undone else "ASC"
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT group_id, label FROM change_groups WHERE undone = ? ORDER BY group_id {order} LIMIT 1", (1 if undone else 0,))
+        row = cursor.fetchone()
+        if row is None: return None
+        if row[1]: return row[0], row[1]
+        rank = " ".join(f"WHEN '{t}' THEN {i}" for i, t in enumerate(JOURNALED_TABLES))
+        cursor.execute(f"SELECT table_name, op FROM change_journal WHERE group_id = ? ORDER BY CASE table_name {rank} END, change_id LIMIT 1", (row[0],))
+        first = cursor.fetchone()
+        return row[0], DEFAULT_LABELS.get(tuple(first) if first else None, "Änderung")
+
+    def undo_label(self):
+        group = self._peek(False)
+        return group[1] if group else None
+
+    def redo_label(self):
+        group = self._peek(True)
+        return group[1] if group else None
+
+    # --- Zurückspielen ---
+    def undo(self):
+        """Macht die jüngste Gruppe rückgängig; liefert ihre Bezeichnung oder None."""
+        return self._replay(False)
+
+    def redo(self):
+        """Spielt die zuletzt rückgängig gemachte Gruppe erneut ein; liefert ihre Bezeichnung oder None."""
+        return self._replay(True)
+
+    def _replay(self, redo):
+        group = self._peek(redo)
+        if group is None: return None
+        group_id, label = group
+        cursor = self.cursor_factory()
+        cursor.execute("SELECT change_id, op, table_name FROM change_journal WHERE group_id = ? ORDER BY change_id", (group_id,))
+        runs = []  # [(tabelle, op, erste_id, letzte_id)] – aufeinanderfolgende Einträge gleicher Art
+        for change_id, op, table in cursor.fetchall():
+            if runs and runs[-1][0] == table and runs[-1][1] == op: runs[-1][3] = change_id
+            else: runs.append([table, op, change_id, change_id])
+        try:
+            cursor.execute("BEGIN TRANSACTION")
+            cursor.execute("PRAGMA defer_foreign_keys = ON")  # Eltern/Kinder dürfen in beliebiger Reihenfolge zurückkehren
+            cursor.execute("UPDATE journal_state SET enabled = 0")
+            for table, op, first, last in (runs if redo else reversed(runs)):
+                self._apply_run(cursor, table, op, first, last, redo)
+            if self.after_replay is not None: self.after_replay(cursor, group_id)
+            cursor.execute("UPDATE change_groups SET undone = ? WHERE group_id = ?", (0 if redo else 1, group_id))
+            cursor.execute("UPDATE journal_state SET enabled = 1")
+            cursor.execute("COMMIT")
+        except Exception:
+            self.conn.rollback()
+            raise
+        if not redo: self._redo_pending = True
+        return label
+
+    def _table_columns(self, cursor, table):
+        if table not in self._columns: self._columns[table] = _columns(cursor, table)
+        return self._columns[table]
+
+    def _apply_run(self, cursor, table, op, first, last, redo):
+        pk, cols = self._table_columns(cursor, table)
+        run = "change_id BETWEEN ? AND ?"
+        ids = f"SELECT row_id FROM change_journal WHERE {run}"
+        col_list = ", ".join(cols)
+        if (op == OP_INSERT and not redo) or (op == OP_DELETE and redo):
+            cursor.execute(f"DELETE FROM {table} WHERE {pk} IN ({ids})", (first, last))
+        elif op in (OP_INSERT, OP_DELETE):
+            source = "after_json" if redo else "before_json"
+            values = ", ".join(f"json_extract({source}, '$.{c}')" for c in cols)
+            cursor.execute(f"INSERT INTO {table} ({col_list}) SELECT {values} FROM change_journal WHERE {run} ORDER BY change_id {'ASC' if redo else 'DESC'}", (first, last))
+        else:
+            # Mehrfach geänderte Zeilen: beim Rückgängigmachen der älteste Vorher-, beim Wiederholen der jüngste Nachher-Stand
+            source, pick = ("after_json", "DESC") if redo else ("before_json", "ASC")
+            values = ", ".join(f"json_extract(j.{source}, '$.{c}')" for c in cols)
+            cursor.execute(f"UPDATE {table} SET ({col_list}) = (SELECT {values} FROM change_journal j WHERE j.change_id BETWEEN ? AND ? AND j.row_id = {table}.{pk} ORDER BY j.change_id {pick} LIMIT 1) WHERE {pk} IN ({ids})", (first, last, first, last))
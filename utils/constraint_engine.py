@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+utils/constraint_engine.py
+
+Live-Prüfung des Dienstplans eines geöffneten Events.
+Statt bei jedem "Dienstplan prüfen" das ganze Event neu zu scannen, werden
+einzelne Zuweisungsänderungen (Helfer hinzugefügt/entfernt) direkt eingespielt:
+Pro Person liegt eine nach Startzeit sortierte Intervall-Liste (bisect). Eine
+Änderung wird sortiert eingefügt bzw. entfernt; neu geprüft werden nur die
+Schicht selbst, die Nachbarn, deren Zeitraum sie berührt (Schichten sind höchstens
+MAX_SHIFT_MINUTES lang), und der Tageszähler ihres Datums. Die Verstöße einer
+Person liegen dafür nach Ursache getrennt vor (Schicht, Schichtpaar, anderes
+Event, Tag). Die Zähler für Fehler, Warnungen und Schicht-Badges bleiben dabei aktuell.
+"""
+import bisect
+from collections import Counter, defaultdict
+
+from utils.event_model import MAX_SHIFT_MINUTES
+from utils.plan_validator import PlanValidator, SEVERITY_ERROR, TL_MISSING
+
+# Ursachen der Personen-Verstöße (erstes Element der Schlüssel), zugleich Ausgabereihenfolge
+PART_SHIFT, PART_PAIR, PART_EXTERNAL, PART_DAY = range(4)
+
+
+class ConstraintEngine(PlanValidator):
+    """Regelprüfung, die Zuweisungs-Deltas in-memory nachführt."""
+
+    def __init__(self, db_manager, event_id):
+        super().__init__(db_manager, event_id)
+        self._intervals = defaultdict(list)  # person_id -> [(start, end, shift_id), ...] sortiert
+        self._days = {}                      # person_id -> Counter(Datum -> eigene Schichten)
+        self._parts = defaultdict(dict)      # person_id -> {(Ursache, ...): [RuleViolation]}
+        self._stale_persons = set()          # Personen, deren Verstoß-Liste neu zusammenzusetzen ist
+        self.rule_counts = Counter()         # rule_id -> Anzahl
+        self.severity_counts = Counter()     # severity -> Anzahl
+        self.shift_badges = Counter()        # shift_id -> Anzahl Verstöße an dieser Schicht
+        self.required_total = sum(s.required for s in self.model.shifts.values())  # Schichten ändern sich nur mit neuer Engine
+        self.assigned_total = 0              # laufende Summe aller Zuweisungen, in den Deltas nachgeführt
+
+    def ensure_loaded(self):
+        """Führt die erste (vollständige) Prüfung aus, falls noch nicht geschehen."""
+        self.validate()
+
+    # --- Deltas ---
+    def apply_assignment(self, person_id, shift_id, added=True):
+        """Spielt eine einzelne Zuweisungsänderung ein. Liefert False, wenn die Schicht unbekannt ist."""
+        if self._needs_full_run: return True  # Wird beim ersten validate() ohnehin komplett geladen
+        shift = self.model.shifts.get(shift_id)
+        if shift is None: return False
+        if self._dirty_shifts: self._incremental_run()
+        pids = self.model.shift_persons[shift_id]
+        if added:
+            pids.append(person_id)
+            self.assigned_total += 1
+            if person_id not in self.model.persons: self.model.load_missing_persons(self.db_manager)
+            self._insert_interval(person_id, shift)
+        else:
+            if person_id not in pids: return True
+            while person_id in pids: pids.remove(person_id); self.assigned_total -= 1
+            self._remove_interval(person_id, shift)
+        self._set_shift_violations(shift_id, self._check_shift(shift_id))
+        return True
+
+    def _insert_interval(self, person_id, shift):
+        """Fügt die Schicht sortiert ein und prüft sie gegen die Nachbarn, deren Zeitraum sie berührt."""
+        intervals = self._intervals[person_id]
+        i = bisect.bisect_right(intervals, (shift.start, shift.end, shift.shift_id))
+        intervals.insert(i, (shift.start, shift.end, shift.shift_id))
+        days = self._days.setdefault(person_id, Counter())
+        days[shift.shift_date] += 1
+        person = self.model.persons.get(person_id)
+        if person is None: return
+        self._ensure_eligibility(person_id)
+        shifts = self.model.shifts
+        for k in range(bisect.bisect_left(intervals, (shift.start - MAX_SHIFT_MINUTES,)), i):
+            if intervals[k][1] >= shift.start: self._add_pair(person, shifts[intervals[k][2]], shift)
+        k = i + 1
+        while k < len(intervals) and intervals[k][0] <= shift.end:
+            self._add_pair(person, shift, shifts[intervals[k][2]]); k += 1
+        self._add_part(person_id, (PART_SHIFT, shift.shift_id), self._shift_rules(person, shift))
+        self._add_part(person_id, (PART_EXTERNAL, shift.shift_id), self._external_rules(person, shift))
+        self._update_day(person_id, shift.shift_date)
+
+    def _remove_interval(self, person_id, shift):
+        """Entfernt alle Einträge der Schicht samt den Verstößen, an denen sie beteiligt ist."""
+        intervals = self._intervals.get(person_id)
+        if not intervals: return
+        entry = (shift.start, shift.end, shift.shift_id)
+        i, j = bisect.bisect_left(intervals, entry), bisect.bisect_right(intervals, entry)
+        if i == j: return
+        del intervals[i:j]
+        sid = shift.shift_id
+        lo, hi = bisect.bisect_left(intervals, (shift.start - MAX_SHIFT_MINUTES,)), bisect.bisect_right(intervals, (shift.end, float("inf")))
+        for _, _, other in intervals[lo:hi]:
+            self._drop_part(person_id, (PART_PAIR, other, sid)); self._drop_part(person_id, (PART_PAIR, sid, other))
+        for key in ((PART_PAIR, sid, sid), (PART_SHIFT, sid), (PART_EXTERNAL, sid)): self._drop_part(person_id, key)
+        days = self._days[person_id]
+        days[shift.shift_date] -= j - i
+        if days[shift.shift_date] <= 0: del days[shift.shift_date]
+        self._update_day(person_id, shift.shift_date)
+        if not intervals: del self._intervals[person_id]; del self._days[person_id]
+
+    def _add_pair(self, person, first, second):
+        violation = self._pair_rule(person, first, second)
+        if violation: self._add_part(person.person_id, (PART_PAIR, first.shift_id, second.shift_id), [violation])
+
+    def _update_day(self, person_id, date_str):
+        """Tageslimit eines Datums aus dem Zähler neu bewerten."""
+        self._drop_part(person_id, (PART_DAY, date_str))
+        count = self._days.get(person_id, {}).get(date_str, 0)
+        person = self.model.persons.get(person_id)
+        if count and person:
+            violation = self._daily_rule(person, date_str, count + self._external_count(person_id, date_str))
+            if violation: self._add_part(person_id, (PART_DAY, date_str), [violation])
+
+    def _add_part(self, person_id, key, violations):
+        if not violations: return
+        self._parts[person_id].setdefault(key, []).extend(violations)
+        self._count(violations, 1)
+        self._stale_persons.add(person_id)
+
+    def _drop_part(self, person_id, key):
+        parts = self._parts.get(person_id)
+        violations = parts.pop(key, None) if parts else None
+        if violations:
+            self._count(violations, -1)
+            self._stale_persons.add(person_id)
+
+    def _flatten(self):
+        """Setzt die Verstoß-Listen geänderter Personen erst beim Abruf aus den Teilergebnissen zusammen."""
+        for pid in self._stale_persons:
+            parts = self._parts.get(pid)
+            if parts: self._person_violations[pid] = [v for key in sorted(parts, key=self._part_order) for v in parts[key]]
+            else: self._person_violations.pop(pid, None); self._parts.pop(pid, None)
+        self._stale_persons.clear()
+
+    def _part_order(self, key):
+        if key[0] == PART_DAY: return key
+        shifts = self.model.shifts
+        return (key[0],) + tuple((shifts[sid].start, shifts[sid].end, sid) for sid in reversed(key[1:]))
+
+    # --- Abfragen ---
+    def issue_counts(self):
+        """(Fehler, Warnungen) über das ganze Event."""
+        errors = self.severity_counts[SEVERITY_ERROR]
+        return errors, sum(self.severity_counts.values()) - errors
+
+    def staffing(self):
+        """(benötigt, besetzt) aus den laufenden Summen, ohne die Schichten erneut zu durchlaufen."""
+        return self.required_total, self.assigned_total
+
+    def missing_team_leaders(self):
+        return self.rule_counts[TL_MISSING]
+
+    def violations_for_shift(self, shift_id):
+        """Alle Verstöße, die an einer Schicht hängen (für Tooltips)."""
+        self._flatten()
+        result = list(self._shift_violations.get(shift_id, []))
+        for pid in set(self.model.shift_persons.get(shift_id, [])):
+            result.extend(v for v in self._person_violations.get(pid, []) if v.shift_id == shift_id)
+        return result
+
+    # --- Hooks der Basisklasse ---
+    def _full_run(self):
+        self.rule_counts.clear(); self.severity_counts.clear(); self.shift_badges.clear(); self._intervals.clear()
+        self._days.clear(); self._parts.clear(); self._stale_persons.clear()
+        super()._full_run()
+
+    def _collect(self):
+        self._flatten()
+        return super()._collect()
+
+    def _load_assignments(self, shift_ids=None):
+        if shift_ids is None:
+            super()._load_assignments()
+            self.assigned_total = sum(len(p) for p in self.model.shift_persons.values())
+            return
+        persons = self.model.shift_persons
+        self.assigned_total -= sum(len(persons.get(sid, [])) for sid in shift_ids)
+        super()._load_assignments(shift_ids)
+        self.assigned_total += sum(len(persons.get(sid, [])) for sid in shift_ids)
+
+    def _on_assignments_reloaded(self, person_shifts):
+        for pid, sids in person_shifts.items():
+            entries = sorted((self.model.shifts[sid].start, self.model.shifts[sid].end, sid) for sid in sids)
+            if entries: self._intervals[pid] = entries
+            else: self._intervals.pop(pid, None)
+
+    def _refresh_person(self, person_id, shift_ids):
+        """Baut die Teilergebnisse einer Person aus ihrer Intervall-Liste neu auf (Komplett- und Nachladelauf)."""
+        for violations in self._parts.pop(person_id, {}).values(): self._count(violations, -1)
+        self._stale_persons.add(person_id)
+        intervals = self._intervals.get(person_id, [])
+        shifts = self.model.shifts
+        days = Counter(shifts[sid].shift_date for _, _, sid in intervals)
+        if days: self._days[person_id] = days
+        else: self._days.pop(person_id, None)
+        person = self.model.persons.get(person_id)
+        if person is None: return
+        self._ensure_eligibility(person_id)
+        for i, (_, end, sid) in enumerate(intervals):
+            shift = shifts[sid]
+            self._add_part(person_id, (PART_SHIFT, sid), self._shift_rules(person, shift))
+            self._add_part(person_id, (PART_EXTERNAL, sid), self._external_rules(person, shift))
+            k = i + 1
+            while k < len(intervals) and intervals[k][0] <= end:
+                self._add_pair(person, shift, shifts[intervals[k][2]]); k += 1
+        for date_str in days: self._update_day(person_id, date_str)
+
+    def _set_shift_violations(self, shift_id, violations):
+        self._count(self._shift_violations.get(shift_id, []), -1)
+        self._count(violations, 1)
+        super()._set_shift_violations(shift_id, violations)
+
+    def _count(self, violations, sign):
+        for v in violations:
+            self.rule_counts[v.rule_id] += sign
+            self.severity_counts[v.severity] += sign
+            if v.shift_id is not None: self.shift_badges[v.shift_id] += sign
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+utils/domain.py
+
+Kompakte Fachobjekte für Prüfung und Planung: Schicht, Person, Kandidat und
+Helfer-Vorschlag. Die Objekte werden beim Laden einmal aus den sqlite3.Row-Zeilen
+gebaut und haben __slots__ statt eines __dict__; Status ist eine kleine Ganzzahl,
+Kompetenz/Teamleiter/Jugendschutz und Warnungen sind Bitflags. In den heißen
+Schleifen (Greedy, lokale Suche, Sweep-Line) werden so Attribute statt
+String-Schlüssel gelesen und Flags per & statt über mehrere Felder geprüft.
+Zuweisungen bleiben (person_id, shift_id)-Tupel.
+"""
+
+# Mitgliedsstatus als Code (Reihenfolge wie im Personen-Dialog)
+STATUS_NAMES = ("Aktiv", "Passiv", "Ruht", "Austritt")
+STATUS_ACTIVE, STATUS_PASSIVE = 0, 1
+STATUS_OTHER = len(STATUS_NAMES)
+_STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+
+# Kandidaten-Flags
+HAS_COMPETENCE = 1
+TEAM_LEADER = 2
+TOO_YOUNG = 4
+
+# Warnungen bei der manuellen Helfer-Auswahl
+WARN_NO_BREAK = 1
+WARN_DAILY_LIMIT = 2
+WARN_TOO_YOUNG = 4
+
+
+def status_code(name):
+    return _STATUS_CODES.get(name, STATUS_OTHER)
+
+
+def competence_flags(is_team_leader):
+    """Flags aus person_competencies.is_team_leader (None = keine Kompetenz)."""
+    if is_team_leader is None: return 0
+    return HAS_COMPETENCE | TEAM_LEADER if is_team_leader else HAS_COMPETENCE
+
+
+class Shift:
+    """Eine Schicht mit Zeiten in Epoch-Minuten (start/end) und den Angaben für Meldungen."""
+    __slots__ = ("shift_id", "task_id", "event_id", "shift_date", "start_time", "end_time", "start", "end", "required", "duty_type_id", "task_name", "duty_name", "min_age")
+
+    def __init__(self, shift_id, task_id, event_id, shift_date, start_time, end_time, start, end, required, duty_type_id, task_name, duty_name, min_age=0):
+        self.shift_id = shift_id
+        self.task_id = task_id
+        self.event_id = event_id
+        self.shift_date = shift_date
+        self.start_time = start_time
+        self.end_time = end_time
+        self.start = start
+        self.end = end
+        self.required = required
+        self.duty_type_id = duty_type_id
+        self.task_name = task_name
+        self.duty_name = duty_name
+        self.min_age = min_age   # Mindestalter des Dienstes (duty_types.min_age, 0 = keins)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row["shift_id"], row["task_id"], row["event_id"], row["shift_date"], row["start_time"], row["end_time"], row["start_ts"], row["end_ts"], row["required_people"], row["duty_type_id"], row["task_name"], row["duty_name"], row["min_age"])
+
+    @property
+    def label(self):
+        return f"{self.task_name} {self.shift_date} {self.start_time}-{self.end_time}"
+
+    def __repr__(self):
+        return f"Shift({self.shift_id}, {self.label})"
+
+
+class Person:
+    __slots__ = ("person_id", "display_name", "status", "birth_date")
+
+    def __init__(self, person_id, display_name, status, birth_date):
+        self.person_id = person_id
+        self.display_name = display_name
+        self.status = status          # Code, siehe STATUS_NAMES
+        self.birth_date = birth_date
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row["person_id"], row["display_name"], status_code(row["status"]), row["birth_date"])
+
+    @property
+    def plannable(self):
+        return self.status <= STATUS_PASSIVE
+
+    def __repr__(self):
+        return f"Person({self.person_id}, {self.display_name})"
+
+
+class Candidate:
+    """Eine Person im Kandidaten-Pool einer Schicht (statisch zulässig, ohne Zeitkonflikte)."""
+    __slots__ = ("person_id", "display_name", "status", "history", "flags")
+
+    def __init__(self, person_id, display_name, status, history, flags):
+        self.person_id = person_id
+        self.display_name = display_name
+        self.status = status
+        self.history = history   # Punktestand aus früheren Events
+        self.flags = flags       # HAS_COMPETENCE | TEAM_LEADER | TOO_YOUNG
+
+    @property
+    def is_team_leader(self): return bool(self.flags & TEAM_LEADER)
+
+    @property
+    def too_young(self): return bool(self.flags & TOO_YOUNG)
+
+    def __repr__(self):
+        return f"Candidate({self.person_id}, flags={self.flags})"
+
+
+class HelperCandidate:
+    """Vorschlag für die manuelle Helfer-Auswahl einer Schicht."""
+    __slots__ = ("person_id", "display_name", "status", "score", "flags", "warnings", "daily_count", "age")
+
+    def __init__(self, person_id, display_name, status, score, flags, warnings=0, daily_count=0, age=0):
+        self.person_id = person_id
+        self.display_name = display_name
+        self.status = status
+        self.score = score
+        self.flags = flags            # HAS_COMPETENCE | TEAM_LEADER
+        self.warnings = warnings      # WARN_* Bits
+        self.daily_count = daily_count
+        self.age = age
+
+    @property
+    def has_competence(self): return bool(self.flags & HAS_COMPETENCE)
+
+    @property
+    def is_team_leader(self): return bool(self.flags & TEAM_LEADER)
+
+    @property
+    def too_young(self): return bool(self.warnings & WARN_TOO_YOUNG)
+
+    @property
+    def warning_text(self):
+        parts = []
+        if self.warnings & WARN_NO_BREAK: parts.append("Keine Pause")
+        if self.warnings & WARN_DAILY_LIMIT: parts.append(f"{self.daily_count} Dienste heute")
+        if self.warnings & WARN_TOO_YOUNG: parts.append(f"Zu jung ({self.age})")
+        return ", ".join(parts)
+
+    def sort_key(self):
+        """Standard-Reihenfolge: Teamleiter, Kompetenz, ohne Warnung, Name."""
+        return (-(self.flags & TEAM_LEADER), -(self.flags & HAS_COMPETENCE), self.warnings != 0, self.display_name)
+
+    def __repr__(self):
+        return f"HelperCandidate({self.person_id}, flags={self.flags}, warnings={self.warnings})"
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+utils/event_model.py
+
+Speicher-Abbild eines Events für Prüfung und Planung.
+Alle Daten (Schichten, Zuweisungen, Personen, Einschränkungen, Kompetenzen)
+werden mit wenigen Bulk-Abfragen einmalig geladen, statt pro Zeile nachzufragen.
+Ein Modell kann mehrere Events umfassen (gemeinsame Planung); Zuweisungen in
+anderen, zeitlich überlappenden Events werden als feste Belegung mitgeladen.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from utils.domain import Person, Shift
+
+_EPOCH = datetime(1970, 1, 1)
+MAX_SHIFT_MINUTES = 24 * 60  # Längste mögliche Schicht (shift_interval verschiebt höchstens um einen Tag)
+
+
+def to_epoch_minutes(date_str, time_str):
+    """Wandelt 'YYYY-MM-DD' + 'HH:MM' in Minuten seit 1970-01-01 um."""
+    dt = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+    return int((dt - _EPOCH).total_seconds()) // 60
+
+
+def shift_interval(date_str, start_str, end_str):
+    """Liefert (start, ende) in Epoch-Minuten; Schichten über Mitternacht enden am Folgetag.
+    Gleiche Anfangs- und Endzeit belegt für Zeitkonflikte einen ganzen Tag (siehe shift_duration)."""
+    start = to_epoch_minutes(date_str, start_str)
+    end = to_epoch_minutes(date_str, end_str)
+    if end <= start: end += 24 * 60
+    return start, end
+
+
+def shift_duration(start, end):
+    """Dauer in Minuten für die Stundenauswertung (duration_min). Anders als das Intervall zählt eine
+    Schicht mit gleicher Anfangs- und Endzeit wie in der bisherigen Stundenberechnung 0 Minuten."""
+    return 0 if end - start >= MAX_SHIFT_MINUTES else end - start
+
+
+def age_at_date(birth_date_str, date_str):
+    """Alter in Jahren an einem Stichtag (0, falls kein/ungültiges Geburtsdatum)."""
+    if not birth_date_str or not date_str: return 0
+    try:
+        birth = datetime.strptime(birth_date_str, "%Y-%m-%d")
+        day = datetime.strptime(date_str, "%Y-%m-%d")
+        return day.year - birth.year - ((day.month, day.day) < (birth.month, birth.day))
+    except ValueError: return 0
+
+
+def event_id_list(event_id):
+    """Ein Event oder mehrere Events (Liste/Tupel/Menge) als Tupel von IDs."""
+    return tuple(event_id) if isinstance(event_id, (list, tuple, set, frozenset)) else (event_id,)
+
+
+def busy_in_window(db_manager, lo, hi, exclude_event_ids=()):
+    """Zuweisungen aller Events mit Schichten, die [lo, hi] (Epoch-Minuten, Grenzen einschließlich) berühren.
+    Die Bedingung auf start_ts nutzt den Index idx_shifts_time; Schichten sind höchstens MAX_SHIFT_MINUTES lang."""
+    exclude = tuple(exclude_event_ids)
+    event_filter = f"AND t.event_id NOT IN ({', '.join('?' * len(exclude))})" if exclude else ""
+    return db_manager.execute_query(f"SELECT a.person_id, s.shift_id, s.shift_date, s.start_ts, s.end_ts, t.name AS task_name, e.name AS event_name FROM shifts s JOIN assignments a ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id JOIN events e ON t.event_id = e.event_id WHERE s.start_ts BETWEEN ? AND ? AND s.end_ts >= ? {event_filter}", (lo - MAX_SHIFT_MINUTES, hi, lo) + exclude, fetch="all") or []
+
+
+class EventModel:
+    """Alle planungsrelevanten Daten eines oder mehrerer Events, per Bulk-Query geladen."""
+
+    def __init__(self, event_id):
+        self.event_id = event_id
+        self.event_ids = event_id_list(event_id)
+        self.shifts = {}                         # shift_id -> Shift
+        self.persons = {}                        # person_id -> Person
+        self.restrictions = set()                # {(person_id, duty_type_id)}
+        self.competencies = {}                   # (person_id, duty_type_id) -> is_team_leader
+        self.shift_persons = defaultdict(list)   # shift_id -> [person_id, ...]
+        self.external_busy = {}                  # person_id -> [(start, end, datum, bezeichnung)] in anderen Events
+        self.window = None                       # (frühester Beginn, spätestes Ende) aller Schichten
+
+    @classmethod
+    def load(cls, db_manager, event_id, all_persons=False):
+        """Lädt das Event (oder mehrere Events). Mit all_persons=True werden auch nicht eingeteilte Mitglieder geladen."""
+        model = cls(event_id)
+        events = model._event_filter()
+        rows = db_manager.execute_query(f"SELECT s.shift_id, s.task_id, s.shift_date, s.start_time, s.end_time, s.start_ts, s.end_ts, s.required_people, t.name AS task_name, t.duty_type_id, dt.name AS duty_name, dt.min_age, t.event_id FROM shifts s JOIN tasks t ON s.task_id = t.task_id JOIN duty_types dt ON t.duty_type_id = dt.duty_type_id WHERE t.event_id {events} ORDER BY s.shift_date, s.start_time", model.event_ids, fetch="all") or []
+        for row in rows:
+            model.shifts[row["shift_id"]] = Shift.from_row(row)
+
+        if all_persons:
+            person_filter = ""
+            params = ()
+        else:
+            person_filter = f"WHERE p.person_id IN (SELECT a.person_id FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id {events})"
+            params = model.event_ids
+        for row in db_manager.execute_query(f"SELECT p.person_id, p.display_name, p.status, p.birth_date FROM persons p {person_filter}", params, fetch="all") or []:
+            model.persons[row["person_id"]] = Person.from_row(row)
+        for row in db_manager.execute_query(f"SELECT r.person_id, r.duty_type_id FROM person_duty_restrictions r JOIN persons p ON r.person_id = p.person_id {person_filter}", params, fetch="all") or []:
+            model.restrictions.add((row["person_id"], row["duty_type_id"]))
+        for row in db_manager.execute_query(f"SELECT c.person_id, c.duty_type_id, c.is_team_leader FROM person_competencies c JOIN persons p ON c.person_id = p.person_id {person_filter}", params, fetch="all") or []:
+            model.competencies[(row["person_id"], row["duty_type_id"])] = row["is_team_leader"]
+
+        model.reload_assignments(db_manager)
+        model.load_external_busy(db_manager)
+        return model
+
+    def _event_filter(self):
+        return "= ?" if len(self.event_ids) == 1 else f"IN ({', '.join('?' * len(self.event_ids))})"
+
+    def load_external_busy(self, db_manager):
+        """Lädt die Zuweisungen anderer Events, die zeitlich an die Schichten dieses Modells heranreichen."""
+        self.external_busy = {}
+        if not self.shifts: return
+        self.window = (min(s.start for s in self.shifts.values()), max(s.end for s in self.shifts.values()))
+        for row in busy_in_window(db_manager, self.window[0], self.window[1], self.event_ids):
+            label = f"{row['event_name']}: {row['task_name']}"
+            self.external_busy.setdefault(row["person_id"], []).append((row["start_ts"], row["end_ts"], row["shift_date"], label))
+
+    def reload_assignments(self, db_manager, shift_ids=None):
+        """Lädt die Zuweisungen neu – komplett oder nur für die angegebenen Schichten."""
+        if shift_ids is None:
+            self.shift_persons.clear()
+            rows = db_manager.execute_query(f"SELECT a.shift_id, a.person_id FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id {self._event_filter()} ORDER BY a.assignment_id", self.event_ids, fetch="all") or []
+        else:
+            shift_ids = list(shift_ids)
+            for sid in shift_ids: self.shift_persons.pop(sid, None)
+            if not shift_ids: return
+            placeholders = ", ".join("?" * len(shift_ids))
+            rows = db_manager.execute_query(f"SELECT a.shift_id, a.person_id FROM assignments a WHERE a.shift_id IN ({placeholders}) ORDER BY a.assignment_id", tuple(shift_ids), fetch="all") or []
+        for row in rows:
+            if row["shift_id"] in self.shifts:
+                self.shift_persons[row["shift_id"]].append(row["person_id"])
+        self.load_missing_persons(db_manager)
+
+    def load_missing_persons(self, db_manager):
+        """Ergänzt Personen, die neu eingeteilt wurden, aber noch nicht geladen sind."""
+        missing = {pid for pids in self.shift_persons.values() for pid in pids if pid not in self.persons}
+        if not missing: return
+        placeholders = ", ".join("?" * len(missing))
+        params = tuple(missing)
+        for row in db_manager.execute_query(f"SELECT person_id, display_name, status, birth_date FROM persons WHERE person_id IN ({placeholders})", params, fetch="all") or []:
+            self.persons[row["person_id"]] = Person.from_row(row)
+        for row in db_manager.execute_query(f"SELECT person_id, duty_type_id FROM person_duty_restrictions WHERE person_id IN ({placeholders})", params, fetch="all") or []:
+            self.restrictions.add((row["person_id"], row["duty_type_id"]))
+        for row in db_manager.execute_query(f"SELECT person_id, duty_type_id, is_team_leader FROM person_competencies WHERE person_id IN ({placeholders})", params, fetch="all") or []:
+            self.competencies[(row["person_id"], row["duty_type_id"])] = row["is_team_leader"]
+
+    def person_shift_ids(self):
+        """Liefert {person_id: [shift_id, ...]} für alle Zuweisungen des Events."""
+        result = defaultdict(list)
+        for sid, pids in self.shift_persons.items():
+            for pid in pids: result[pid].append(sid)
+        return result
+
+    def is_team_leader(self, person_id, duty_type_id):
+        return bool(self.competencies.get((person_id, duty_type_id), 0))
+
+    def has_competence(self, person_id, duty_type_id):
+        return (person_id, duty_type_id) in self.competencies
@@ -3,8 +3,9 @@
 utils/exporter.py
 
 Enthält die Logik zum Exportieren von Daten als XLSX und PDF.
+Schwere Bibliotheken (pandas, ReportLab, pypdf) werden erst beim ersten Export
+importiert, damit sie den Programmstart nicht verlangsamen.
 """
-import pandas as pd
 from collections import defaultdict
 from datetime import datetime
 import os
@@ -12,23 +13,9 @@ import re
 import io
 from urllib.parse import quote
 
-# ReportLab Imports
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT
-
 # GUI Imports für Fehlermeldungen
 from PyQt5.QtWidgets import QMessageBox
 
-# PyPDF Imports
-try:
-    from pypdf import PdfWriter, PdfReader
-except ImportError:
-    PdfWriter = None
-
 class Exporter:
     """Eine Klasse, die nur statische Methoden für den Export bereitstellt."""
 
@@ -46,6 +33,7 @@ class Exporter:
 
     @staticmethod
     def create_member_template(file_path):
+        import pandas as pd
         columns = ["first_name", "last_name", "display_name", "birth_date", "street", "postal_code", "city", "email", "phone1", "phone2", "status", "entry_date", "notes"]
         df = pd.DataFrame(columns=columns)
         try:
@@ -64,6 +52,7 @@ class Exporter:
 
     @staticmethod
     def export_members_to_xlsx(data, duty_type_names, file_path):
+        import pandas as pd
         if not data: return False
         df = pd.DataFrame(data)
         static_cols_map = {"first_name": "Vorname", "last_name": "Nachname", "display_name": "Anzeigename", "birth_date": "Geburtsdatum", "street": "Straße", "postal_code": "PLZ", "city": "Ort", "email": "E-Mail", "phone1": "Telefon 1", "phone2": "Telefon 2", "status": "Status", "entry_date": "Eintrittsdatum", "exit_date": "Austrittsdatum", "notes": "Notizen"}
@@ -88,6 +77,7 @@ class Exporter:
 
     @staticmethod
     def export_ranking_to_xlsx(data, file_path):
+        import pandas as pd
         if not data: return False
         df = pd.DataFrame(data)
         df = df[['name', 'total_score']]
@@ -108,6 +98,7 @@ class Exporter:
 
     @staticmethod
     def export_detailed_summary_to_xlsx(data, file_path):
+        import pandas as pd
         if not data: return False
         df = pd.DataFrame(data)
         df.columns = ["Name", "Geleistete Stunden", "Erledigt", "Als Vertreter", "Entschuldigt", "Nicht Erschienen"]
@@ -129,6 +120,7 @@ class Exporter:
 
     @staticmethod
     def export_mandatory_status_to_xlsx(data, file_path, target_hours):
+        import pandas as pd
         if not data: return False
         export_list = []
         for entry in data:
@@ -160,6 +152,7 @@ class Exporter:
 
     @staticmethod
     def export_hours_summary_to_xlsx(data, file_path, time_period):
+        import pandas as pd
         if not data: return False
         df = pd.DataFrame(data)
         df.columns = ["Name", "Geleistete Stunden", "Anzahl Dienste"]
@@ -180,6 +173,7 @@ class Exporter:
 
     @staticmethod
     def export_to_xlsx(data, event_name, file_path):
+        import pandas as pd
         if not data: return False
         data_list = [dict(row) for row in data]
         df = pd.DataFrame(data_list)
@@ -207,6 +201,13 @@ class Exporter:
 
     @staticmethod
     def export_to_pdf_matrix(data, event_name, file_path, settings, tasks_to_show=None, attachments=None):
+        # ReportLab erst bei Bedarf laden
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.lib.enums import TA_CENTER, TA_RIGHT
         if not data: return False
 
         # 1. Daten aufbereiten
@@ -337,6 +338,10 @@ class Exporter:
             print(f"Fehler beim Erstellen des Basis-PDFs: {e}")
             return False
 
+        try:
+            from pypdf import PdfWriter
+        except ImportError:
+            PdfWriter = None
         if PdfWriter is None:
             QMessageBox.warning(None, "Fehlende Komponente", "Die Bibliothek 'pypdf' ist nicht installiert.\nAnhänge können nicht hinzugefügt werden.\n\nBitte 'pip install pypdf' ausführen.")
             try:
@@ -371,8 +376,37 @@ class Exporter:
 
     @staticmethod
     def export_post_event_sheets(data, event_name, file_path, settings):
+        # ReportLab erst bei Bedarf laden
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+        from reportlab.platypus.flowables import Flowable
+        from utils import sheet_scanner as sheet
         if not data: return False
-        doc = SimpleDocTemplate(file_path, pagesize=landscape(A4), topMargin=1.5*inch, bottomMargin=1.5*inch)
+
+        class _CheckBox(Flowable):
+            """Leeres Kästchen, dessen Inneres beim Einlesen vermessen wird."""
+            def wrap(self, *args): return sheet.BOX_SIZE, sheet.BOX_SIZE
+            def draw(self):
+                self.canv.setLineWidth(0.8)
+                self.canv.rect(0, 0, sheet.BOX_SIZE, sheet.BOX_SIZE, stroke=1, fill=0)
+
+        class _RowCode(Flowable):
+            """Maschinenlesbarer Zeilencode mit der assignment_id (siehe utils/sheet_scanner.py)."""
+            def __init__(self, bits):
+                super().__init__()
+                self.bits = bits
+            def wrap(self, *args): return sheet.CODE_UNITS * sheet.UNIT, sheet.BAR_HEIGHT
+            def draw(self):
+                self.canv.setFillColor(colors.black)
+                for i, bit in enumerate(self.bits):
+                    if bit: self.canv.rect(i * sheet.UNIT, 0, sheet.UNIT, sheet.BAR_HEIGHT, stroke=0, fill=1)
+
+        # Ränder und Spaltenbreiten sind mit dem Scanner abgestimmt (Tabelle links am Rand)
+        doc = SimpleDocTemplate(file_path, pagesize=(sheet.PAGE_W, sheet.PAGE_H), leftMargin=sheet.MARGIN_X, rightMargin=sheet.MARGIN_X, topMargin=sheet.MARGIN_Y, bottomMargin=sheet.MARGIN_Y)
         story = []
         styles = getSampleStyleSheet()
         tasks = defaultdict(list)
@@ -384,7 +418,7 @@ class Exporter:
             title = Paragraph(f"Nachbereitung für: {task_name}", styles['h2'])
             story.append(title)
             story.append(Spacer(1, 0.2 * inch))
-            table_data = [["Schicht", "Geplanter Helfer", "Erledigt\n[ ]", "Vertreter\n[ ]", "Entschuldigt\n[ ]", "Gschwänzt\n[ ]", "Name des Vertreters"]]
+            table_data = [["Schicht", "Geplanter Helfer", "Erledigt", "Vertreter", "Entschuldigt", "Gschwänzt", "Name des Vertreters", "Code"]]
             style_commands = [('GRID', (0, 0), (-1, -1), 1, colors.black), ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'), ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey), ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'), ('ALIGN', (0, 0), (-1, -1), 'CENTER'), ('ALIGN', (1, 1), (1, -1), 'LEFT'), ('FONTSIZE', (0, 0), (-1, -1), 8)]
             last_shift_key = None; start_span_row = 1
             sorted_rows = sorted(rows, key=lambda r: (r['shift_date'], r['start_time']))
@@ -395,10 +429,11 @@ class Exporter:
                     if i - (start_span_row - 1) > 1: style_commands.append(('SPAN', (0, start_span_row), (0, i)))
                     start_span_row = i + 1
                 if i == 0: start_span_row = 1
-                table_data.append([shift_text, row['helper_name'], "", "", "", "", ""])
+                bits = sheet.encode_code(row['assignment_id'] if 'assignment_id' in row.keys() else None)
+                table_data.append([shift_text, row['helper_name'], _CheckBox(), _CheckBox(), _CheckBox(), _CheckBox(), "", _RowCode(bits) if bits else ""])
                 last_shift_key = current_shift_key
             if len(sorted_rows) - (start_span_row - 1) > 1: style_commands.append(('SPAN', (0, start_span_row), (0, len(sorted_rows))))
-            table = Table(table_data, colWidths=[1.5*inch, 2*inch, 0.8*inch, 0.8*inch, 1*inch, 1*inch, 2.5*inch], repeatRows=1)
+            table = Table(table_data, colWidths=list(sheet.COL_WIDTHS), repeatRows=1, hAlign='LEFT')
             table.setStyle(TableStyle(style_commands))
             story.append(table)
         club_name = settings.get_pdf_club_name()
@@ -406,6 +441,10 @@ class Exporter:
         footer_text = settings.get_pdf_footer_text()
         def _header_footer(canvas, doc):
             canvas.saveState()
+            # Passmarken für das Einlesen der ausgefüllten Bögen
+            canvas.setFillColor(colors.black)
+            for x, y in sheet.FIDUCIALS:
+                canvas.rect(x - sheet.FIDUCIAL_SIZE / 2, y - sheet.FIDUCIAL_SIZE / 2, sheet.FIDUCIAL_SIZE, sheet.FIDUCIAL_SIZE, stroke=0, fill=1)
             styles = getSampleStyleSheet()
             header_rect_height = 0.8 * inch
             header_y = doc.pagesize[1] - doc.topMargin + 0.2*inch
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+utils/local_search.py
+
+Nachoptimierung eines Planungsvorschlags per Simulated Annealing.
+Ausgehend vom Greedy-Ergebnis werden zufällig Plätze aufgefüllt, Helfer
+ersetzt, Zuweisungen zweier Helfer getauscht und Teamleiter in Schichten ohne
+Teamleiter verlegt. Jede Änderung wird über PlanState inkrementell bewertet und
+bei Ablehnung rückgängig gemacht. Bestehende (manuelle) Zuweisungen bleiben
+unangetastet. Alle Züge gehen über PlanState.can_add: Schichten ohne Pause und
+über dem Tageslimit entstehen dabei nicht neu, ein offener Platz wird also nie
+mit einem solchen Verstoß "erkauft".
+"""
+import math
+import random
+import time
+
+from utils.domain import TEAM_LEADER, TOO_YOUNG
+from utils.planner import PlanState
+
+START_TEMPERATURE = 50.0
+END_TEMPERATURE = 0.5
+CANDIDATE_TRIES = 8
+
+MOVE_FILL = "fill"
+MOVE_REPLACE = "replace"
+MOVE_SWAP = "swap"
+MOVE_TL = "tl"
+MOVES = (MOVE_FILL, MOVE_REPLACE, MOVE_SWAP, MOVE_TL)
+
+
+class LocalSearch:
+    """Simulated Annealing über den neuen Zuweisungen eines PlanResult."""
+
+    def __init__(self, problem, result, seed=None):
+        self.problem = problem
+        self.start_result = result
+        self.state = PlanState(problem, result.assignments)
+        self.rng = random.Random(result.seed if seed is None else seed)
+        self.shift_ids = [s.shift_id for s in problem.shifts]
+        self.iterations = 0
+        self.accepted = 0
+
+    def run(self, seconds=None, max_iterations=None, progress=None):
+        """Sucht, bis das Zeitbudget oder die Iterationszahl erreicht ist; liefert das beste PlanResult.
+        Reproduzierbar ist das Ergebnis nur mit max_iterations (ein Zeitbudget hängt vom Rechner ab).
+        progress(bruchteil, beste_kosten, offene_plätze) wird etwa alle 256 Schritte aufgerufen;
+        gibt es False zurück, wird abgebrochen und der bisher beste Plan geliefert."""
+        if seconds is None and max_iterations is None: return self.start_result
+        state = self.state
+        current = best = state.cost()
+        best_assignments = list(state.movable)
+        best_open = state.unfilled
+        started = time.perf_counter()
+        fraction = 0.0
+        while True:
+            if max_iterations is not None:
+                if self.iterations >= max_iterations: break
+                fraction = self.iterations / max_iterations
+            if seconds is not None and self.iterations % 64 == 0:
+                elapsed = time.perf_counter() - started
+                if elapsed >= seconds: break
+                fraction = max(fraction, elapsed / seconds)
+            if progress is not None and self.iterations % 256 == 0 and progress(fraction, best, best_open) is False: break
+            self.iterations += 1
+
+            undo = self._random_move()
+            if undo is None: continue
+            delta = state.cost() - current
+            temperature = START_TEMPERATURE * (END_TEMPERATURE / START_TEMPERATURE) ** fraction
+            if delta <= 0 or self.rng.random() < math.exp(-delta / temperature):
+                current += delta
+                self.accepted += 1
+                if current < best - 1e-9:
+                    best = current
+                    best_assignments = list(state.movable)
+                    best_open = state.unfilled
+            else:
+                self._undo(undo)
+
+        result = PlanState(self.problem, best_assignments).result(self.start_result.seed)
+        if result.cost >= self.start_result.cost: return self.start_result
+        result.improved_from = self.start_result
+        return result
+
+    # --- Züge ---
+    def _random_move(self):
+        move = self.rng.choice(MOVES)
+        if move == MOVE_FILL: return self._move_fill()
+        if move == MOVE_REPLACE: return self._move_replace()
+        if move == MOVE_SWAP: return self._move_swap()
+        return self._move_team_leader()
+
+    def _apply(self, removals, additions):
+        """Entfernt und ergänzt Zuweisungen; scheitert eine Ergänzung an harten Regeln, wird alles zurückgenommen."""
+        done = []
+        for pid, sid in removals:
+            self.state.remove(pid, sid)
+            done.append((False, pid, sid))
+        for pid, sid in additions:
+            if not self.state.can_add(pid, sid):
+                self._undo(done)
+                return None
+            self.state.add(pid, sid)
+            done.append((True, pid, sid))
+        return done
+
+    def _undo(self, done):
+        for added, pid, sid in reversed(done):
+            if added: self.state.remove(pid, sid)
+            else: self.state.add(pid, sid)
+
+    def _random_candidate(self, shift_id, team_leader_only=False):
+        pool = self.problem.pools.get(shift_id)
+        if not pool: return None
+        for _ in range(CANDIDATE_TRIES):
+            c = self.rng.choice(pool)
+            if team_leader_only and not c.flags & TEAM_LEADER: continue
+            if self.state.can_add(c.person_id, shift_id): return c.person_id
+        return None
+
+    def _move_fill(self):
+        """Einen offenen Platz besetzen."""
+        sid = self.rng.choice(self.shift_ids)
+        if len(self.state.members[sid]) >= self.state.shifts[sid].required: return None
+        pid = self._random_candidate(sid)
+        return None if pid is None else self._apply((), ((pid, sid),))
+
+    def _move_replace(self):
+        """Einen neu eingeteilten Helfer durch einen anderen ersetzen."""
+        if not self.state.movable: return None
+        pid, sid = self.rng.choice(self.state.movable)
+        new_pid = self._random_candidate(sid)
+        if new_pid is None or new_pid == pid: return None
+        return self._apply(((pid, sid),), ((new_pid, sid),))
+
+    def _move_swap(self):
+        """Zwei neu eingeteilte Helfer tauschen ihre Schichten."""
+        movable = self.state.movable
+        if len(movable) < 2: return None
+        (p1, s1), (p2, s2) = self.rng.sample(movable, 2)
+        if p1 == p2 or s1 == s2: return None
+        return self._apply(((p1, s1), (p2, s2)), ((p1, s2), (p2, s1)))
+
+    def _move_team_leader(self):
+        """Einen Teamleiter in eine besetzte Schicht ohne Teamleiter verlegen: er gibt dafür
+        überschneidende neue Schichten ab und ersetzt – falls die Schicht voll ist – einen Helfer."""
+        state = self.state
+        sid = self.rng.choice(self.shift_ids)
+        if not state.members[sid] or state.tl_count[sid] > 0: return None
+        shift = state.shifts[sid]
+        pool = [c for c in self.problem.pools.get(sid, []) if c.flags & (TEAM_LEADER | TOO_YOUNG) == TEAM_LEADER and c.person_id not in state.members[sid]]
+        if not pool: return None
+        pid = self.rng.choice(pool).person_id
+        removals = []
+        for other in state.person_shifts[pid]:
+            o = state.shifts[other]
+            if shift.start < o.end and shift.end > o.start:
+                if (pid, other) in state.fixed: return None
+                removals.append((pid, other))
+        if len(state.members[sid]) >= shift.required:
+            replaceable = [p for p in state.members[sid] if (p, sid) not in state.fixed]
+            if not replaceable: return None
+            removals.append((self.rng.choice(replaceable), sid))
+        return self._apply(removals, ((pid, sid),))
+
+
+def improve_plan(problem, result, seconds=None, max_iterations=None, seed=None, progress=None):
+    """Bequemer Aufruf: verbessert ein PlanResult und liefert das (ggf. unveränderte) beste Ergebnis."""
+    return LocalSearch(problem, result, seed).run(seconds, max_iterations, progress)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+utils/person_search.py
+
+Volltextsuche über Mitglieder (Vor-/Nachname, Anzeigename, Ort, E-Mail, Notizen).
+Grundlage ist ein FTS5-Index (persons_fts) mit externem Inhalt, den Trigger auf
+persons in derselben Transaktion aktuell halten. Der Tokenizer entfernt Akzente und
+Umlaut-Punkte, jedes Suchwort wird als Präfix gesucht: "mull" findet "Müller".
+Fehlt FTS5 in der SQLite-Version, wird der Index nicht angelegt und die Suche
+fällt auf LIKE über dieselben Spalten zurück (mit derselben Normalisierung,
+aber ohne Index).
+"""
+import unicodedata
+
+SEARCH_COLUMNS = ("first_name", "last_name", "display_name", "city", "email", "notes")
+FTS_TABLE = "persons_fts"
+
+
+def fold(text):
+    """Kleinschreibung ohne diakritische Zeichen ("Müller" -> "muller"), wie der FTS5-Tokenizer."""
+    if not text: return ""
+    return "".join(c for c in unicodedata.normalize("NFKD", text.casefold()) if not unicodedata.combining(c))
+
+
+def search_terms(text):
+    """Zerlegt die Eingabe in Suchwörter; Anführungszeichen werden entfernt."""
+    return [t for t in (part.replace('"', "") for part in (text or "").split()) if t]
+
+
+def fts5_available(cursor):
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts5_probe USING fts5(x)")
+        cursor.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except Exception:
+        return False
+
+
+def create_person_search_schema(cursor):
+    """Legt FTS-Index und Sync-Trigger an und befüllt den Index (Migration v6).
+    Liefert False, wenn FTS5 nicht verfügbar ist."""
+    if not fts5_available(cursor): return False
+    cols = ", ".join(SEARCH_COLUMNS)
+    new_cols = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+    old_cols = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            {cols}, content='persons', content_rowid='person_id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS persons_fts_insert AFTER INSERT ON persons BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, {cols}) VALUES (new.person_id, {new_cols});
+        END""")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS persons_fts_delete AFTER DELETE ON persons BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.person_id, {old_cols});
+        END""")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS persons_fts_update AFTER UPDATE OF {cols} ON persons BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.person_id, {old_cols});
+            INSERT INTO {FTS_TABLE} (rowid, {cols}) VALUES (new.person_id, {new_cols});
+        END""")
+    cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+class PersonSearch:
+    """Sucht Personen-IDs zu einer Eingabe; alle Suchwörter müssen (als Präfix) vorkommen."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,))
+        self.use_fts = cursor.fetchone() is not None
+        if not self.use_fts: conn.create_function("person_fold", 1, fold, deterministic=True)
+
+    def person_ids(self, text):
+        """Menge der passenden person_id; None bei leerer Eingabe (= kein Filter)."""
+        terms = search_terms(text)
+        if not terms: return None
+        cursor = self.conn.cursor()
+        if self.use_fts:
+            match = " ".join(f'"{t}"*' for t in terms)
+            cursor.execute(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?", (match,))
+        else:
+            haystack = " || ' ' || ".join(f"COALESCE({c}, '')" for c in SEARCH_COLUMNS)
+            where = " AND ".join(f"person_fold({haystack}) LIKE ? ESCAPE '\\'" for _ in terms)
+            params = ["%" + fold(t).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%" for t in terms]
+            cursor.execute(f"SELECT person_id FROM persons WHERE {where}", params)
+        return {row[0] for row in cursor.fetchall()}
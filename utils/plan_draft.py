@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+utils/plan_draft.py
+
+Was-wäre-wenn-Entwürfe für den Dienstplan eines Events.
+Ein Entwurf kopiert nur die Zuweisungen des Events in den Speicher
+(O(Größe des Events)), nicht die Datenbank. Auf dem Entwurf lassen sich
+Personen ausfallen lassen, der Planer und die Planprüfung ausführen und die
+Unterschiede zum aktuellen Plan anzeigen. Übernommen wird er in einer
+einzigen Transaktion (DatabaseManager.commit_plan_draft) – oder verworfen,
+ohne dass die Datenbank je berührt wurde.
+"""
+from collections import Counter
+
+from utils.plan_validator import PlanValidator
+
+
+class DraftValidator(PlanValidator):
+    """Planprüfung auf den Zuweisungen eines Entwurfs statt der Datenbank."""
+
+    def __init__(self, db_manager, draft):
+        self.draft = draft
+        super().__init__(db_manager, draft.event_id)
+
+    def validate(self):
+        self._needs_full_run = True  # Entwürfe sind klein, es wird immer komplett geprüft
+        return super().validate()
+
+    def _load_assignments(self, shift_ids=None):
+        self.model.shift_persons.clear()
+        for pid, sid in self.draft.assignments:
+            if sid in self.model.shifts: self.model.shift_persons[sid].append(pid)
+        self.model.load_missing_persons(self.db_manager)
+
+
+class PlanDraft:
+    """Speicher-Kopie der Zuweisungen eines Events."""
+
+    def __init__(self, db_manager, event_id):
+        self.db_manager = db_manager
+        self.event_id = event_id
+        self.base = self.live_assignments()      # Stand beim Anlegen (für Konfliktprüfung)
+        self.assignments = list(self.base)       # [(person_id, shift_id), ...]
+        self.unavailable = set()                 # {(person_id, datum oder None)}
+        self.shifts = {}                         # shift_id -> {label, shift_date, required}
+        rows = db_manager.execute_query("SELECT s.shift_id, s.shift_date, s.start_time, s.end_time, s.required_people, t.name AS task_name FROM shifts s JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ? ORDER BY s.shift_date, s.start_time", (event_id,), fetch="all") or []
+        for row in rows:
+            self.shifts[row["shift_id"]] = {"label": f"{row['task_name']} {row['shift_date']} {row['start_time']}-{row['end_time']}", "shift_date": row["shift_date"], "required": row["required_people"]}
+
+    def live_assignments(self):
+        rows = self.db_manager.execute_query("SELECT a.person_id, a.shift_id FROM assignments a JOIN shifts s ON a.shift_id = s.shift_id JOIN tasks t ON s.task_id = t.task_id WHERE t.event_id = ? ORDER BY a.assignment_id", (self.event_id,), fetch="all") or []
+        return [(row["person_id"], row["shift_id"]) for row in rows]
+
+    # --- Bearbeiten ---
+    def add(self, person_id, shift_id):
+        if shift_id in self.shifts and (person_id, shift_id) not in self.assignments: self.assignments.append((person_id, shift_id))
+
+    def remove(self, person_id, shift_id):
+        if (person_id, shift_id) in self.assignments: self.assignments.remove((person_id, shift_id))
+
+    def clear(self):
+        self.assignments = []
+
+    def reset(self):
+        """Verwirft alle Änderungen am Entwurf und übernimmt den aktuellen Plan."""
+        self.base = self.live_assignments()
+        self.assignments = list(self.base)
+        self.unavailable.clear()
+
+    def exclude_person(self, person_id, date=None):
+        """Person fällt aus (an einem Tag oder ganz): ihre Zuweisungen werden entfernt und der Planer
+        setzt sie dort nicht mehr ein. Liefert die Anzahl entfernter Zuweisungen."""
+        self.unavailable.add((person_id, date))
+        before = len(self.assignments)
+        self.assignments = [(pid, sid) for pid, sid in self.assignments if not (pid == person_id and (date is None or self.shifts[sid]["shift_date"] == date))]
+        return before - len(self.assignments)
+
+    def include_person(self, person_id, date=None):
+        self.unavailable.discard((person_id, date))
+
+    def is_unavailable(self, person_id, date):
+        return (person_id, None) in self.unavailable or (person_id, date) in self.unavailable
+
+    def shift_dates(self):
+        return sorted({s["shift_date"] for s in self.shifts.values()})
+
+    # --- Planer und Prüfung ---
+    def prepare_problem(self, problem):
+        """Setzt ein PlanningProblem auf den Stand des Entwurfs (Zuweisungen, Ausfälle)."""
+        assigned = {}
+        for pid, sid in self.assignments: assigned.setdefault(sid, []).append(pid)
+        problem.assigned = assigned
+        if self.unavailable:
+            dates = {s.shift_id: s.shift_date for s in problem.shifts}
+            for sid, pool in problem.pools.items():
+                problem.pools[sid] = [c for c in pool if not self.is_unavailable(c.person_id, dates.get(sid))]
+
+    def run_planner(self, **planning_args):
+        """Führt den Planer auf dem Entwurf aus und übernimmt das Ergebnis in den Entwurf."""
+        result = self.db_manager.compute_planning_proposal(self.event_id, draft=self, **planning_args)
+        self.assignments.extend(result.assignments)
+        return result
+
+    def validate(self):
+        """Regelverstöße des Entwurfs (RuleViolation, wie DatabaseManager.get_plan_violations)."""
+        return DraftValidator(self.db_manager, self).validate()
+
+    def staffing(self):
+        """(benötigt, besetzt) im Entwurf."""
+        return sum(s["required"] for s in self.shifts.values()), len(self.assignments)
+
+    # --- Vergleich ---
+    def diff(self, other=None):
+        """(hinzugefügt, entfernt) gegenüber dem aktuellen Plan (oder einer anderen Zuweisungsliste)."""
+        reference = Counter(self.live_assignments() if other is None else other)
+        current = Counter(self.assignments)
+        return list((current - reference).elements()), list((reference - current).elements())
+
+    def has_conflicts(self):
+        """True, wenn der aktuelle Plan seit dem Anlegen des Entwurfs anderweitig geändert wurde."""
+        return Counter(self.live_assignments()) != Counter(self.base)
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+utils/plan_validator.py
+
+Prüft den Dienstplan eines Events und liefert strukturierte Regelverstöße.
+Überschneidungen und Schichten ohne Pause werden pro Person mit einem
+Sweep-Line-Verfahren (sortierte Intervalle + Heap der Endzeiten) gefunden.
+Nach Änderungen werden nur die betroffenen Schichten und Personen neu geprüft.
+Zuweisungen in anderen, zeitlich überlappenden Events zählen bei Überschneidung,
+fehlender Pause und Tageslimit mit. Das Mindestalter kommt aus dem Dienst-Typ
+und wird über das Bitset des Events geprüft (utils/age_eligibility.py).
+"""
+import heapq
+from collections import defaultdict
+from datetime import datetime
+
+from utils.event_model import EventModel, age_at_date
+
+SEVERITY_ERROR = "error"
+SEVERITY_WARNING = "warning"
+
+# Regel-IDs
+SHIFT_EMPTY = "SHIFT_EMPTY"
+SHIFT_UNDERSTAFFED = "SHIFT_UNDERSTAFFED"
+RESTRICTION = "RESTRICTION"
+AGE_LIMIT = "AGE_LIMIT"
+OVERLAP = "OVERLAP"
+NO_BREAK = "NO_BREAK"
+DAILY_CAP = "DAILY_CAP"
+TL_MISSING = "TL_MISSING"
+
+MAX_SHIFTS_PER_DAY = 2
+
+
+class RuleViolation:
+    """Ein einzelner Regelverstoß im Dienstplan."""
+    __slots__ = ("rule_id", "severity", "shift_id", "person_id", "message")
+
+    def __init__(self, rule_id, severity, shift_id, person_id, message):
+        self.rule_id = rule_id
+        self.severity = severity
+        self.shift_id = shift_id
+        self.person_id = person_id
+        self.message = message
+
+    def __repr__(self):
+        return f"RuleViolation({self.rule_id}, shift={self.shift_id}, person={self.person_id})"
+
+
+class PlanValidator:
+    """Hält die Prüfergebnisse eines Events und aktualisiert sie inkrementell."""
+
+    def __init__(self, db_manager, event_id):
+        self.db_manager = db_manager
+        self.event_id = event_id
+        self.model = EventModel.load(db_manager, event_id)
+        self.eligibility = None       # AgeEligibility des Events, bei jedem Komplettlauf neu geholt
+        self._shift_violations = {}   # shift_id -> [RuleViolation]
+        self._person_violations = {}  # person_id -> [RuleViolation]
+        self._dirty_shifts = set()
+        self._needs_full_run = True
+
+    def mark_dirty(self, shift_id):
+        """Merkt eine Schicht vor, deren Zuweisungen sich geändert haben."""
+        if shift_id in self.model.shifts: self._dirty_shifts.add(shift_id)
+
+    def validate(self):
+        """Liefert alle Regelverstöße; prüft nur neu, was seit dem letzten Lauf geändert wurde."""
+        if self._needs_full_run:
+            self._full_run()
+        elif self._dirty_shifts:
+            self._incremental_run()
+        return self._collect()
+
+    def _full_run(self):
+        self.eligibility = self.db_manager.get_age_eligibility(self.event_id)
+        self._load_assignments()
+        self.model.load_external_busy(self.db_manager)
+        self._shift_violations, self._person_violations = {}, {}
+        person_shifts = self.model.person_shift_ids()
+        self._on_assignments_reloaded(person_shifts)
+        for sid in self.model.shifts: self._set_shift_violations(sid, self._check_shift(sid))
+        for pid, sids in person_shifts.items(): self._refresh_person(pid, sids)
+        self._dirty_shifts.clear()
+        self._needs_full_run = False
+
+    def _incremental_run(self):
+        dirty = self._dirty_shifts
+        affected = {pid for sid in dirty for pid in self.model.shift_persons.get(sid, [])}
+        self._load_assignments(dirty)
+        affected.update(pid for sid in dirty for pid in self.model.shift_persons.get(sid, []))
+        person_shifts = self.model.person_shift_ids()
+        self._on_assignments_reloaded({pid: person_shifts.get(pid, []) for pid in affected})
+        for sid in dirty:
+            self._set_shift_violations(sid, self._check_shift(sid))
+        for pid in affected:
+            self._refresh_person(pid, person_shifts.get(pid, []))
+        self._dirty_shifts = set()
+
+    # --- Hooks für Unterklassen (z. B. die Live-Prüfung) ---
+    def _load_assignments(self, shift_ids=None):
+        """Lädt die Zuweisungen ins Modell – komplett oder nur für die angegebenen Schichten."""
+        self.model.reload_assignments(self.db_manager, shift_ids)
+
+    def _on_assignments_reloaded(self, person_shifts):
+        """Wird nach dem Nachladen aufgerufen: {person_id: [shift_id, ...]} der betroffenen Personen."""
+
+    def _set_shift_violations(self, shift_id, violations):
+        self._shift_violations[shift_id] = violations
+
+    def _refresh_person(self, person_id, shift_ids):
+        """Prüft eine Person mit ihren Schichten im Event komplett neu (leer: nicht mehr eingeteilt)."""
+        self._set_person_violations(person_id, self._check_person(person_id, shift_ids) if shift_ids else [])
+
+    def _set_person_violations(self, person_id, violations):
+        if violations: self._person_violations[person_id] = violations
+        else: self._person_violations.pop(person_id, None)
+
+    def _sorted_person_shifts(self, person_id, shift_ids):
+        return sorted((self.model.shifts[sid] for sid in shift_ids), key=lambda s: (s.start, s.end, s.shift_id))  # wie die Intervall-Listen der Live-Prüfung
+
+    # --- Schicht-Regeln ---
+    def _check_shift(self, shift_id):
+        shift = self.model.shifts[shift_id]
+        pids = self.model.shift_persons.get(shift_id, [])
+        count, required = len(pids), shift.required
+        result = []
+        if count == 0:
+            result.append(RuleViolation(SHIFT_EMPTY, SEVERITY_ERROR, shift_id, None, f"🔴 Schicht '{shift.task_name}' ({shift.start_time}) ist komplett leer."))
+        elif count < required:
+            result.append(RuleViolation(SHIFT_UNDERSTAFFED, SEVERITY_WARNING, shift_id, None, f"⚠️ Schicht '{shift.task_name}' ({shift.start_time}) ist unterbesetzt ({count}/{required})."))
+        if count > 0 and not any(self.model.is_team_leader(pid, shift.duty_type_id) for pid in pids):
+            result.append(RuleViolation(TL_MISSING, SEVERITY_WARNING, shift_id, None, f"⚠️ Schicht '{shift.task_name}' ({shift.start_time}) hat keinen zugewiesenen Teamleiter."))
+        return result
+
+    # --- Personen-Regeln ---
+    def _check_person(self, person_id, shift_ids):
+        person = self.model.persons.get(person_id)
+        if not person: return []
+        shifts = self._sorted_person_shifts(person_id, shift_ids)
+        result = []
+        self._ensure_eligibility(person_id)
+
+        for shift in shifts:
+            result.extend(self._shift_rules(person, shift))
+
+        # Sweep-Line: aktive Schichten als Heap ihrer Endzeiten
+        active = []
+        touching_time, touching = None, []
+        daily_counts = defaultdict(int)
+        for idx, shift in enumerate(shifts):
+            daily_counts[shift.shift_date] += 1
+            while active and active[0][0] <= shift.start:
+                end, j = heapq.heappop(active)
+                if end == shift.start:
+                    if touching_time != end: touching_time, touching = end, []
+                    touching.append(j)
+            if touching_time == shift.start:
+                for j in touching: result.append(self._pair_rule(person, shifts[j], shift))
+            for _, j in sorted(active, key=lambda x: x[1]):
+                result.append(self._pair_rule(person, shifts[j], shift))
+            heapq.heappush(active, (shift.end, idx))
+
+        # Belegung in anderen Events (nur Tage, an denen die Person auch hier eingeteilt ist)
+        for shift in shifts:
+            result.extend(self._external_rules(person, shift))
+        for date_str in daily_counts:
+            daily_counts[date_str] += self._external_count(person_id, date_str)
+
+        for date_str, count in daily_counts.items():
+            violation = self._daily_rule(person, date_str, count)
+            if violation: result.append(violation)
+        return result
+
+    def _ensure_eligibility(self, person_id):
+        if not self.eligibility.knows(person_id): self.eligibility = self.db_manager.get_age_eligibility(self.event_id)  # Neu angelegte Person
+
+    def _shift_rules(self, person, shift):
+        """Einschränkung und Mindestalter einer Person für eine einzelne Schicht."""
+        result = []
+        name = person.display_name
+        if (person.person_id, shift.duty_type_id) in self.model.restrictions:
+            result.append(RuleViolation(RESTRICTION, SEVERITY_ERROR, shift.shift_id, person.person_id, f"🔴 {name} ist für '{shift.task_name}' eingeteilt, obwohl eine Einschränkung vorliegt."))
+        min_age = shift.min_age
+        if not self.eligibility.is_eligible(person.person_id, min_age, shift.shift_date):
+            age = age_at_date(person.birth_date, shift.shift_date)
+            result.append(RuleViolation(AGE_LIMIT, SEVERITY_ERROR, shift.shift_id, person.person_id, f"🔞 {name} ist für '{shift.task_name}' eingeteilt, ist aber erst {age} Jahre alt (Min: {min_age})."))
+        return result
+
+    def _pair_rule(self, person, first, second):
+        """Überschneidung oder fehlende Pause zwischen zwei Schichten (first beginnt nicht nach second), sonst None."""
+        if first.end > second.start:
+            return RuleViolation(OVERLAP, SEVERITY_ERROR, second.shift_id, person.person_id, f"🔴 {person.display_name} hat zeitgleiche Schichten: '{first.task_name}' und '{second.task_name}'.")
+        if first.end == second.start:
+            return RuleViolation(NO_BREAK, SEVERITY_WARNING, second.shift_id, person.person_id, f"⚠️ {person.display_name} arbeitet durchgehend (ohne Pause): '{first.task_name}' -> '{second.task_name}'.")
+        return None
+
+    def _external_rules(self, person, shift):
+        """Überschneidungen und fehlende Pausen einer Schicht mit Einsätzen in anderen Events."""
+        result = []
+        name = person.display_name
+        for start, end, date_str, label in self.model.external_busy.get(person.person_id, ()):
+            if shift.start < end and shift.end > start:
+                result.append(RuleViolation(OVERLAP, SEVERITY_ERROR, shift.shift_id, person.person_id, f"🔴 {name} ist zeitgleich in einem anderen Event eingeteilt: '{label}' und '{shift.task_name}'."))
+            elif shift.start == end or shift.end == start:
+                result.append(RuleViolation(NO_BREAK, SEVERITY_WARNING, shift.shift_id, person.person_id, f"⚠️ {name} arbeitet durchgehend (ohne Pause): '{label}' -> '{shift.task_name}'."))
+        return result
+
+    def _external_count(self, person_id, date_str):
+        """Einsätze der Person in anderen Events an diesem Tag."""
+        return sum(1 for busy in self.model.external_busy.get(person_id, ()) if busy[2] == date_str)
+
+    def _daily_rule(self, person, date_str, count):
+        """Tageslimit-Warnung, falls count Schichten an date_str zu viele sind, sonst None."""
+        if count <= MAX_SHIFTS_PER_DAY: return None
+        formatted_date = datetime.strptime(date_str, "%Y-%m-%d").strftime("%d.%m.")
+        return RuleViolation(DAILY_CAP, SEVERITY_WARNING, None, person.person_id, f"⚠️ {person.display_name} hat am {formatted_date} {count} Schichten (Empfohlen: Max 2).")
+
+    def _collect(self):
+        """Sortiert die Ergebnisse wie die bisherige Textausgabe: Besetzung, Personen (alphabetisch), Teamleiter."""
+        shift_order = list(self.model.shifts)
+        occupancy, tl_missing = [], []
+        for sid in shift_order:
+            for v in self._shift_violations.get(sid, []):
+                (tl_missing if v.rule_id == TL_MISSING else occupancy).append(v)
+        persons = sorted(self._person_violations, key=lambda pid: self.model.persons[pid].display_name if pid in self.model.persons else "")
+        per_person = [v for pid in persons for v in self._person_violations[pid]]
+        return occupancy + per_person + tl_missing
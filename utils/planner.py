@@ -0,0 +1,562 @@
+# -*- coding: utf-8 -*-
+"""
+utils/planner.py
+
+Automatischer Planungsvorschlag auf einem Speicher-Abbild des Events.
+Ein Durchlauf ist die bekannte Greedy-Strategie (erst Teamleiter, dann
+auffüllen, Zufallswahl aus der Spitzengruppe) – nur mit eigenem, gesätem
+Zufallsgenerator statt des globalen random-Moduls. Mehrere Durchläufe mit
+abgeleiteten Seeds laufen optional parallel in eigenen Prozessen; übernommen
+wird der Plan mit den geringsten Gesamtkosten. Gleicher Seed = gleicher Plan.
+Die Kosten werden in PlanState inkrementell geführt, damit die lokale Suche
+(utils/local_search.py) Änderungen ohne Neuberechnung bewerten kann.
+Mehrere Events lassen sich gemeinsam planen (event_id als Liste); Zuweisungen
+in anderen überlappenden Events blockieren die Person zu dieser Zeit.
+Die Kandidaten einer Schicht werden mit NumPy gemeinsam bewertet (VectorRanking);
+candidate_score bleibt die Referenz und wird für das Protokoll verwendet.
+Wer während einer Schicht abwesend ist (person_unavailability), kommt gar nicht
+erst in deren Kandidaten-Pool.
+"""
+import random
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.domain import Candidate, STATUS_ACTIVE, HAS_COMPETENCE, TEAM_LEADER, TOO_YOUNG, competence_flags
+from utils.event_model import EventModel
+from utils.plan_validator import MAX_SHIFTS_PER_DAY
+from utils.planning_trace import PHASE_TEAM_LEADER, PHASE_FILL
+
+# Gewichte der Zielfunktion (kleiner = besser)
+WEIGHT_UNFILLED = 1000      # pro unbesetztem Platz
+WEIGHT_MISSING_TL = 100     # pro besetzter Schicht ohne Teamleiter
+WEIGHT_NO_BREAK = 50        # pro Paar direkt aufeinanderfolgender Schichten einer Person
+WEIGHT_DAILY_CAP = 50       # pro Schicht über MAX_SHIFTS_PER_DAY an einem Tag
+WEIGHT_FAIRNESS = 10        # mal Varianz der Dienste pro Person
+
+EXCLUDED_SCORE = -99999
+EXCLUDED_LIMIT = -5000
+TOP_TIER_TL = 5
+TOP_TIER_FILL = 8
+
+
+class PlanningProblem:
+    """Alle Daten, die ein Planungslauf braucht – ohne Datenbank, daher an Worker-Prozesse übertragbar."""
+
+    def __init__(self, event_id):
+        self.event_id = event_id  # Ein Event oder Tupel von Events (gemeinsame Planung)
+        self.shifts = []          # [Shift] in Planungsreihenfolge
+        self.assigned = {}        # shift_id -> [person_id, ...] (bestehende Zuweisungen)
+        self.persons = {}         # person_id -> Person (nur Aktiv/Passiv)
+        self.competencies = {}    # (person_id, duty_type_id) -> is_team_leader
+        self.pools = {}           # shift_id -> [Kandidat, ...] (statisch zulässig, ohne Zeitkonflikte)
+        self.external_busy = {}   # person_id -> [(start, end), ...] in Events außerhalb der Planung
+        self._pool_index = {}     # shift_id -> {person_id: Kandidat}
+        self._slots = {}          # person_id -> Position in den Vektoren der Bewertung
+        self._pool_arrays = {}    # shift_id -> PoolArrays
+
+    @classmethod
+    def load(cls, db_manager, event_id, limit=None, replace=False):
+        """replace=True plant so, als wären die Events leer: ihre Zuweisungen zählen weder als gesetzt noch
+        in der Historie (sie werden erst beim Speichern in derselben Transaktion ersetzt)."""
+        model = EventModel.load(db_manager, event_id, all_persons=True)
+        eligibility = db_manager.get_age_eligibility(event_id)
+        unavailable = db_manager.get_unavailable_shift_pairs(event_id)
+        history = {s["person_id"]: s["total_score"] for s in db_manager.calculate_scores(include_inactive=True, limit=limit, exclude_event_ids=model.event_ids if replace else ())}
+        problem = cls(event_id)
+        problem.competencies = dict(model.competencies)
+        problem.persons = {pid: p for pid, p in model.persons.items() if p.plannable}
+        if not replace: problem.assigned = {sid: list(pids) for sid, pids in model.shift_persons.items() if pids}
+        problem.external_busy = {pid: [(start, end) for start, end, _, _ in busy] for pid, busy in model.external_busy.items()}
+        ordered = sorted(problem.persons.values(), key=lambda p: (p.display_name, p.person_id))
+        for shift in model.shifts.values():
+            sid, dtid = shift.shift_id, shift.duty_type_id
+            problem.shifts.append(shift)
+            min_age, day = shift.min_age, shift.shift_date
+            pool = []
+            for person in ordered:
+                pid = person.person_id
+                if (pid, dtid) in model.restrictions or (pid, sid) in unavailable: continue
+                flags = competence_flags(problem.competencies.get((pid, dtid)))
+                if not eligibility.is_eligible(pid, min_age, day): flags |= TOO_YOUNG
+                pool.append(Candidate(pid, person.display_name, person.status, history.get(pid, 0), flags))
+            problem.pools[sid] = pool
+        problem.shifts.sort(key=lambda s: (s.shift_date, s.start, s.shift_id))
+        return problem
+
+    def is_team_leader(self, person_id, duty_type_id):
+        return bool(self.competencies.get((person_id, duty_type_id), 0))
+
+    def candidate(self, shift_id, person_id):
+        """Kandidat einer Schicht (None, wenn die Person dafür nicht in Frage kommt)."""
+        index = self._pool_index.get(shift_id)
+        if index is None: index = self._pool_index[shift_id] = {c.person_id: c for c in self.pools.get(shift_id, [])}
+        return index.get(person_id)
+
+    def person_slot(self, person_id):
+        slot = self._slots.get(person_id)
+        if slot is None: slot = self._slots[person_id] = len(self._slots)
+        return slot
+
+    def pool_arrays(self, shift_id):
+        """Vektoren des Kandidaten-Pools (neu aufgebaut, wenn der Pool ersetzt wurde, z. B. durch einen Entwurf)."""
+        import numpy as np
+        pool = self.pools.get(shift_id, [])
+        arrays = self._pool_arrays.get(shift_id)
+        if arrays is None or arrays.pool is not pool: arrays = self._pool_arrays[shift_id] = PoolArrays(np, pool, self.person_slot)
+        return arrays
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_pool_index"] = {}  # Wird im Worker bei Bedarf neu aufgebaut
+        state["_slots"], state["_pool_arrays"] = {}, {}
+        return state
+
+
+class PlanResult:
+    """Ergebnis eines Durchlaufs: neue Zuweisungen und ihre Bewertung."""
+    __slots__ = ("seed", "assignments", "unfilled", "missing_tl", "no_break", "over_cap", "variance", "cost", "improved_from")
+
+    def __init__(self, seed, assignments, unfilled, missing_tl, no_break, over_cap, variance):
+        self.seed = seed
+        self.assignments = assignments   # [(person_id, shift_id), ...] in Zuweisungsreihenfolge
+        self.unfilled = unfilled
+        self.missing_tl = missing_tl
+        self.no_break = no_break
+        self.over_cap = over_cap
+        self.variance = variance
+        self.cost = plan_cost(unfilled, missing_tl, no_break, over_cap, variance)
+        self.improved_from = None        # PlanResult vor der lokalen Suche
+
+    def __repr__(self):
+        return f"PlanResult(seed={self.seed}, neu={len(self.assignments)}, offen={self.unfilled}, ohne_TL={self.missing_tl}, ohne_Pause={self.no_break}, über_Tageslimit={self.over_cap}, varianz={self.variance:.2f})"
+
+
+def plan_cost(unfilled, missing_tl, no_break, over_cap, variance):
+    return unfilled * WEIGHT_UNFILLED + missing_tl * WEIGHT_MISSING_TL + no_break * WEIGHT_NO_BREAK + over_cap * WEIGHT_DAILY_CAP + variance * WEIGHT_FAIRNESS
+
+
+class PlanState:
+    """Veränderbarer Plan mit inkrementell geführten Kosten.
+    add/remove kosten O(k) bei k Schichten der Person; cost() ist O(1)."""
+
+    def __init__(self, problem, assignments=()):
+        self.problem = problem
+        self.shifts = {s.shift_id: s for s in problem.shifts}
+        self.members = defaultdict(list)        # shift_id -> [person_id, ...]
+        self.person_shifts = defaultdict(list)  # person_id -> [shift_id, ...]
+        self.daily = Counter()                  # (person_id, datum) -> Anzahl Schichten
+        self.tl_count = Counter()               # shift_id -> Anzahl Teamleiter
+        self.duties = Counter()                 # person_id -> Anzahl Dienste (nur planbare Personen)
+        self.movable = []                       # Neue (änderbare) Zuweisungen [(person_id, shift_id)]
+        self._movable_pos = {}
+        self.fixed = {(pid, sid) for sid, pids in problem.assigned.items() for pid in pids}
+        self.unfilled = sum(s.required for s in problem.shifts)
+        self.missing_tl = self.no_break = self.over_cap = 0
+        self._sum = self._sum_sq = 0
+        self._n = len(problem.persons)
+        for sid, pids in problem.assigned.items():
+            for pid in pids: self.add(pid, sid)
+        for pid, sid in assignments: self.add(pid, sid)
+
+    # --- Kosten ---
+    def variance(self):
+        if self._n < 2: return 0.0
+        mean = self._sum / self._n
+        return max(self._sum_sq / self._n - mean * mean, 0.0)
+
+    def cost(self):
+        return plan_cost(self.unfilled, self.missing_tl, self.no_break, self.over_cap, self.variance())
+
+    def result(self, seed=None, assignments=None):
+        return PlanResult(seed, list(self.movable if assignments is None else assignments), self.unfilled, self.missing_tl, self.no_break, self.over_cap, self.variance())
+
+    def _lacks_tl(self, shift_id):
+        return bool(self.members[shift_id]) and self.tl_count[shift_id] == 0
+
+    # --- Änderungen ---
+    def can_add(self, person_id, shift_id):
+        """Harte Regeln: zulässiger Kandidat, nicht schon eingeteilt, keine Überschneidung, keine direkt
+        anschließende Schicht (ohne Pause) und nicht über MAX_SHIFTS_PER_DAY. Die beiden letzten Regeln
+        gelten nur für neue Zuweisungen; bestehende Verstöße bleiben in den Kosten sichtbar."""
+        candidate = self.problem.candidate(shift_id, person_id)
+        if candidate is None or candidate.flags & TOO_YOUNG or person_id in self.members[shift_id]: return False
+        shift = self.shifts[shift_id]
+        if self.daily[(person_id, shift.shift_date)] >= MAX_SHIFTS_PER_DAY: return False
+        start, end = shift.start, shift.end
+        for other in self.person_shifts[person_id]:
+            o = self.shifts[other]
+            if start <= o.end and end >= o.start: return False
+        for busy_start, busy_end in self.problem.external_busy.get(person_id, ()):
+            if start <= busy_end and end >= busy_start: return False
+        return True
+
+    def add(self, person_id, shift_id):
+        shift = self.shifts[shift_id]
+        members = self.members[shift_id]
+        if len(members) < shift.required: self.unfilled -= 1
+        lacked = self._lacks_tl(shift_id)
+        members.append(person_id)
+        if self.problem.is_team_leader(person_id, shift.duty_type_id): self.tl_count[shift_id] += 1
+        self.missing_tl += self._lacks_tl(shift_id) - lacked
+        for other in self.person_shifts[person_id]:
+            o = self.shifts[other]
+            if shift.start == o.end or shift.end == o.start: self.no_break += 1
+        self.person_shifts[person_id].append(shift_id)
+        key = (person_id, shift.shift_date)
+        if self.daily[key] >= MAX_SHIFTS_PER_DAY: self.over_cap += 1
+        self.daily[key] += 1
+        if person_id in self.problem.persons:
+            d = self.duties[person_id]
+            self._sum += 1; self._sum_sq += 2 * d + 1
+            self.duties[person_id] = d + 1
+        if (person_id, shift_id) not in self.fixed:
+            self._movable_pos[(person_id, shift_id)] = len(self.movable)
+            self.movable.append((person_id, shift_id))
+
+    def remove(self, person_id, shift_id):
+        shift = self.shifts[shift_id]
+        members = self.members[shift_id]
+        lacked = self._lacks_tl(shift_id)
+        members.remove(person_id)
+        if len(members) < shift.required: self.unfilled += 1
+        if self.problem.is_team_leader(person_id, shift.duty_type_id): self.tl_count[shift_id] -= 1
+        self.missing_tl += self._lacks_tl(shift_id) - lacked
+        self.person_shifts[person_id].remove(shift_id)
+        for other in self.person_shifts[person_id]:
+            o = self.shifts[other]
+            if shift.start == o.end or shift.end == o.start: self.no_break -= 1
+        key = (person_id, shift.shift_date)
+        self.daily[key] -= 1
+        if self.daily[key] >= MAX_SHIFTS_PER_DAY: self.over_cap -= 1
+        if person_id in self.problem.persons:
+            d = self.duties[person_id]
+            self._sum -= 1; self._sum_sq -= 2 * d - 1
+            self.duties[person_id] = d - 1
+        pos = self._movable_pos.pop((person_id, shift_id), None)
+        if pos is not None:
+            last = self.movable.pop()
+            if pos < len(self.movable):
+                self.movable[pos] = last
+                self._movable_pos[last] = pos
+
+
+def candidate_score(candidate, start, end, duties, busy, is_tl_search=False, components=None):
+    """Punktzahl eines Kandidaten (höher = besser); Bestandteile optional für das Protokoll."""
+    flags = candidate.flags
+    if flags & TOO_YOUNG:  # Jugendschutz
+        if components is not None: components["excluded"] = "Zu jung"
+        return EXCLUDED_SCORE
+    person_id = candidate.person_id
+    base_points = candidate.history * -1 * 10
+    current_event_duties = duties[person_id]
+    fairness_malus = current_event_duties * 25
+    if current_event_duties >= 2: fairness_malus += 10000
+    consecutive_malus = 0
+    for s_start, s_end in busy[person_id]:
+        if start == s_end or end == s_start: consecutive_malus += 10000
+    status_bonus = 5 if candidate.status == STATUS_ACTIVE else 0
+    competence_bonus = 3 if not is_tl_search and flags & HAS_COMPETENCE else 0
+    tl_waste_malus = 500 if not is_tl_search and flags & TEAM_LEADER else 0
+    if components is not None: components.update(history=base_points, fairness=-fairness_malus, consecutive=-consecutive_malus, status=status_bonus, competence=competence_bonus, tl_waste=-tl_waste_malus)
+    return base_points - fairness_malus - consecutive_malus + status_bonus + competence_bonus - tl_waste_malus
+
+
+class ScalarRanking:
+    """Bewertet die Kandidaten einer Schicht einzeln mit candidate_score. Referenz für die
+    vektorisierte Bewertung und Weg für das Protokoll, das die Bestandteile je Kandidat braucht."""
+
+    def __init__(self, problem, trace=None):
+        self.problem = problem
+        self.trace = trace
+        self.duties = Counter()
+        self.busy = defaultdict(list)
+        for pid, intervals in problem.external_busy.items(): self.busy[pid].extend(intervals)  # Andere Events: blockiert, zählt aber nicht als Dienst
+
+    def add(self, person_id, shift):
+        self.duties[person_id] += 1
+        self.busy[person_id].append((shift.start, shift.end))
+
+    def rank(self, shift, taken, is_tl_search, tier):
+        """Liefert (bewertet, Bestwert, Spitzengruppe); bewertet = [(punkte, bestandteile, kandidat)] absteigend."""
+        start, end, busy, duties = shift.start, shift.end, self.busy, self.duties
+        candidates = [c for c in self.problem.pools[shift.shift_id] if c.person_id not in taken and (not is_tl_search or c.flags & TEAM_LEADER) and not any(start < s_end and end > s_start for s_start, s_end in busy[c.person_id])]
+        if self.trace is None:
+            scored = [(candidate_score(c, start, end, duties, busy, is_tl_search), None, c) for c in candidates]
+        else:
+            scored = []
+            for c in candidates:
+                components = {}
+                scored.append((candidate_score(c, start, end, duties, busy, is_tl_search, components), components, c))
+        scored.sort(key=lambda x: x[0], reverse=True)
+        if not scored: return scored, None, []
+        best_score = scored[0][0]
+        return scored, best_score, [c for score, _, c in scored if score >= best_score - tier]
+
+
+class PoolArrays:
+    """Statische Teile der Bewertung für den Pool einer Schicht als NumPy-Vektoren."""
+    __slots__ = ("pool", "slots", "history", "status", "competence", "tl_waste", "team_leader", "too_young")
+
+    def __init__(self, np, pool, slot_of):
+        self.pool = pool
+        self.slots = np.array([slot_of(c.person_id) for c in pool], dtype=np.int64)
+        flags = np.array([c.flags for c in pool], dtype=np.int64)
+        self.history = np.array([c.history for c in pool]) * -1 * 10
+        self.status = np.where(np.array([c.status for c in pool], dtype=np.int64) == STATUS_ACTIVE, 5, 0)
+        self.competence = np.where(flags & HAS_COMPETENCE, 3, 0)
+        self.team_leader = (flags & TEAM_LEADER) != 0
+        self.tl_waste = np.where(self.team_leader, 500, 0)
+        self.too_young = (flags & TOO_YOUNG) != 0
+
+
+class VectorRanking:
+    """Bewertet alle Kandidaten einer Schicht auf einmal (gleiche Punkte wie candidate_score).
+    Dienste je Person liegen in einem Vektor, Belegungen als Intervall-Vektoren (Person, Beginn, Ende);
+    Überschneidungen und direkt anschließende Schichten zählt np.bincount je Person."""
+
+    def __init__(self, problem, np):
+        self.problem = problem
+        self.np = np
+        for sid in problem.pools: problem.pool_arrays(sid)  # Legt auch die Positionen aller Kandidaten an
+        busy = [(problem.person_slot(pid), start, end) for pid, intervals in problem.external_busy.items() for start, end in intervals]
+        for pids in problem.assigned.values():
+            for pid in pids: problem.person_slot(pid)
+        capacity = len(busy) + sum(len(p) for p in problem.assigned.values()) + sum(s.required for s in problem.shifts)
+        self.busy_slot = np.zeros(capacity, dtype=np.int64)
+        self.busy_start = np.zeros(capacity, dtype=np.int64)
+        self.busy_end = np.zeros(capacity, dtype=np.int64)
+        self.n_busy = 0
+        for slot, start, end in busy: self._append(slot, start, end)
+        self.duties = np.zeros(len(problem._slots), dtype=np.int64)
+
+    def _append(self, slot, start, end):
+        n = self.n_busy
+        self.busy_slot[n], self.busy_start[n], self.busy_end[n] = slot, start, end
+        self.n_busy = n + 1
+
+    def add(self, person_id, shift):
+        slot = self.problem.person_slot(person_id)
+        self.duties[slot] += 1
+        self._append(slot, shift.start, shift.end)
+
+    def rank(self, shift, taken, is_tl_search, tier):
+        """Wie ScalarRanking.rank, aber ohne Einzelbewertungen (bewertet ist nur die Anzahl der Kandidaten)."""
+        np = self.np
+        arrays = self.problem.pool_arrays(shift.shift_id)
+        if not arrays.pool: return 0, None, []
+        start, end, n, size = shift.start, shift.end, self.n_busy, len(self.duties)
+        b_slot, b_start, b_end = self.busy_slot[:n], self.busy_start[:n], self.busy_end[:n]
+        overlap = np.bincount(b_slot[(b_start < end) & (b_end > start)], minlength=size)[arrays.slots]
+        touching = np.bincount(b_slot[(b_end == start) | (b_start == end)], minlength=size)[arrays.slots]
+        duties = self.duties[arrays.slots]
+        available = overlap == 0
+        if taken: available &= ~np.isin(arrays.slots, [self.problem.person_slot(pid) for pid in taken])
+        if is_tl_search: available &= arrays.team_leader
+        index = np.flatnonzero(available)
+        if not len(index): return 0, None, []
+
+        # Gleiche Reihenfolge der Operationen wie candidate_score
+        score = arrays.history[index] - (duties[index] * 25 + np.where(duties[index] >= 2, 10000, 0))
+        score = score - touching[index] * 10000
+        score = score + arrays.status[index]
+        if not is_tl_search: score = score + arrays.competence[index] - arrays.tl_waste[index]
+        score = np.where(arrays.too_young[index], EXCLUDED_SCORE, score)
+        best_score = score.max()
+        tier_index = np.flatnonzero(score >= best_score - tier)
+        # Absteigend nach Punkten, bei Gleichstand in Pool-Reihenfolge (wie die stabile Sortierung)
+        tier_index = tier_index[np.argsort(-score[tier_index], kind="stable")]
+        pool = arrays.pool
+        return len(index), best_score.item(), [pool[i] for i in index[tier_index]]
+
+
+def make_ranking(problem, trace=None):
+    """Vektorisierte Bewertung, außer mit Protokoll (braucht die Bestandteile) oder ohne NumPy."""
+    if trace is None:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        if np is not None: return VectorRanking(problem, np)
+    return ScalarRanking(problem, trace)
+
+
+def run_greedy(problem, seed, trace=None, progress=None):
+    """Ein Greedy-Durchlauf mit eigenem Zufallsgenerator. Liefert ein PlanResult.
+    progress(bruchteil, offene_plätze) wird nach jeder Schicht aufgerufen; gibt es False zurück,
+    endet der Durchlauf und liefert den bis dahin aufgebauten Plan."""
+    rng = random.Random(seed)
+    ranking = make_ranking(problem, trace)
+    assigned = defaultdict(list)
+    shifts_by_id = {s.shift_id: s for s in problem.shifts}
+    for sid, pids in problem.assigned.items():
+        assigned[sid].extend(pids)
+        for pid in pids: ranking.add(pid, shifts_by_id[sid])
+    new_assignments = []
+    open_slots = sum(max(s.required - len(assigned[s.shift_id]), 0) for s in problem.shifts)
+    steps = 2 * len(problem.shifts)
+    done = 0
+
+    def assign(candidate, shift):
+        nonlocal open_slots
+        pid = candidate.person_id
+        if len(assigned[shift.shift_id]) < shift.required: open_slots -= 1
+        assigned[shift.shift_id].append(pid)
+        ranking.add(pid, shift)
+        new_assignments.append((pid, shift.shift_id))
+
+    def step():
+        nonlocal done
+        done += 1
+        return progress is None or progress(done / steps, open_slots) is not False
+
+    # Phase 1: Teamleiter
+    if trace is not None: trace.begin_phase(PHASE_TEAM_LEADER)
+    stopped = False
+    for shift in problem.shifts:
+        if not step(): stopped = True; break
+        pids = assigned[shift.shift_id]
+        if len(pids) >= shift.required or any(problem.is_team_leader(pid, shift.duty_type_id) for pid in pids): continue
+        scored, best_score, top_tier = ranking.rank(shift, pids, True, TOP_TIER_TL)
+        if best_score is None:
+            if trace is not None: trace.decision(PHASE_TEAM_LEADER, shift, [], reason="Kein verfügbarer Teamleiter")
+            continue
+        if best_score < EXCLUDED_LIMIT:
+            if trace is not None: trace.decision(PHASE_TEAM_LEADER, shift, scored, reason=f"Alle Teamleiter ausgeschlossen (Bestwert {best_score})")
+            continue
+        chosen = rng.choice(top_tier)
+        if trace is not None: trace.decision(PHASE_TEAM_LEADER, shift, scored, top_tier, chosen)
+        assign(chosen, shift)
+
+    # Phase 2: Auffüllen
+    if trace is not None: trace.begin_phase(PHASE_FILL)
+    for shift in problem.shifts:
+        if stopped or not step(): stopped = True; break
+        num_open = shift.required - len(assigned[shift.shift_id])
+        for slot in range(max(num_open, 0)):
+            scored, best_score, top_tier = ranking.rank(shift, assigned[shift.shift_id], False, TOP_TIER_FILL)
+            if best_score is None or best_score < EXCLUDED_LIMIT:
+                if trace is not None:
+                    reason = "Keine verfügbaren Helfer" if best_score is None else f"Alle Kandidaten ausgeschlossen (Bestwert {best_score})"
+                    for _ in range(num_open - slot): trace.decision(PHASE_FILL, shift, scored, reason=reason)
+                break
+            chosen = rng.choice(top_tier)
+            if trace is not None: trace.decision(PHASE_FILL, shift, scored, top_tier, chosen)
+            assign(chosen, shift)
+    if trace is not None: trace.end_phase()
+
+    return evaluate(problem, new_assignments, seed)
+
+
+def evaluate(problem, new_assignments, seed=None):
+    """Bewertet einen Plan: offene Plätze, Schichten ohne Teamleiter, Schichten ohne Pause,
+    Überschreitungen des Tageslimits und Varianz der Dienste pro Person."""
+    return PlanState(problem, new_assignments).result(seed)
+
+
+def restart_seeds(seed, restarts):
+    """Leitet aus einem Seed die Seeds der einzelnen Durchläufe ab (reproduzierbar)."""
+    rng = random.Random(seed)
+    return [rng.getrandbits(32) for _ in range(max(restarts, 1))]
+
+
+# --- Worker-Prozesse ---
+_worker_problem = None
+
+
+def _init_worker(problem):
+    global _worker_problem
+    _worker_problem = problem
+
+
+def _run_in_worker(seed):
+    return run_greedy(_worker_problem, seed)
+
+
+def search_best_plan(problem, seed=None, restarts=1, workers=1, progress=None, step_progress=None):
+    """Führt mehrere Greedy-Durchläufe aus und liefert den besten. Bei gleichen Kosten gewinnt der
+    frühere Durchlauf, damit das Ergebnis nicht von der Reihenfolge der Prozesse abhängt.
+    progress(bruchteil, bestes_ergebnis) wird nach jedem Durchlauf aufgerufen; gibt es False zurück,
+    werden keine weiteren Durchläufe gestartet und der bisher beste Plan geliefert.
+    step_progress(bruchteil, offene_plätze) meldet sequenzielle Durchläufe zusätzlich je Schicht
+    (auch ein einzelner Durchlauf zeigt so Fortschritt); False beendet den laufenden Durchlauf."""
+    if seed is None: seed = random.SystemRandom().getrandbits(32)
+    seeds = restart_seeds(seed, restarts)
+    results = [None] * len(seeds)
+    best = [None]
+
+    def collect(index, result):
+        results[index] = result
+        if best[0] is None or (result.cost, index) < (best[0][0].cost, best[0][1]): best[0] = (result, index)
+        done = sum(r is not None for r in results)
+        return progress is None or progress(done / len(seeds), best[0][0]) is not False
+
+    stopped = False
+    if workers > 1 and len(seeds) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(seeds)), initializer=_init_worker, initargs=(problem,)) as pool:
+                futures = {pool.submit(_run_in_worker, s): i for i, s in enumerate(seeds)}
+                for future in as_completed(futures):
+                    if not collect(futures[future], future.result()):
+                        stopped = True
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        break
+        except (OSError, BrokenProcessPool) as e:
+            print(f"Parallele Planung nicht möglich, rechne sequenziell: {e}")
+    if not stopped:
+        # Sequenziell – oder Rest nach einem fehlgeschlagenen Prozess-Pool
+        halted = False
+        for index, s in enumerate(seeds):
+            if results[index] is not None: continue
+            on_step = None
+            if step_progress is not None:
+                def on_step(fraction, open_slots, index=index):
+                    nonlocal halted
+                    halted = step_progress((index + fraction) / len(seeds), open_slots) is False
+                    return not halted
+            if not collect(index, run_greedy(problem, s, progress=on_step)) or halted: break
+    return best[0][0]
+
+
+def main(argv=None):
+    """Kommandozeile: python -m utils.planner --event 1 --seed 42 --restarts 20 --improve 5"""
+    import argparse
+    from database_manager import DatabaseManager
+    from utils.settings_manager import SettingsManager
+
+    parser = argparse.ArgumentParser(description="Automatischer Planungsvorschlag für ein Event.")
+    parser.add_argument("--db", default=None, help="Pfad zur Datenbank (Standard: aus config.ini)")
+    parser.add_argument("--event", type=int, nargs="+", required=True, help="ID des Events (mehrere = gemeinsame Planung)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed für reproduzierbare Pläne")
+    parser.add_argument("--restarts", type=int, default=1, help="Anzahl der Greedy-Durchläufe")
+    parser.add_argument("--workers", type=int, default=1, help="Anzahl paralleler Prozesse")
+    parser.add_argument("--limit", type=int, default=None, help="Malus-Basis: nur die letzten N Dienste")
+    parser.add_argument("--improve", type=float, default=None, metavar="SEKUNDEN", help="Zeitbudget der Nachoptimierung")
+    parser.add_argument("--iterations", type=int, default=None, help="Schritte der Nachoptimierung (reproduzierbar)")
+    parser.add_argument("--trace", action="store_true", help="Entscheidungsprotokoll schreiben")
+    parser.add_argument("--dry-run", action="store_true", help="Nur berechnen, nichts speichern")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or SettingsManager().get_db_path()
+    if not db_path:
+        parser.error("Keine Datenbank angegeben (--db) und keine in config.ini hinterlegt.")
+    db = DatabaseManager(db_path)
+    try:
+        event_id = args.event[0] if len(args.event) == 1 else args.event
+        result = db.compute_planning_proposal(event_id, args.limit, args.trace, args.seed, args.restarts, args.workers, args.improve, args.iterations)
+        if result.improved_from is not None:
+            print(f"Vorher:  {result.improved_from} Kosten {result.improved_from.cost:.2f}")
+        print(f"Ergebnis: {result} Kosten {result.cost:.2f}")
+        if args.trace and db.last_planning_trace is not None: print(f"Protokoll: {db.last_planning_trace.path}")
+        if args.dry_run:
+            print("Probelauf – nichts gespeichert.")
+        elif db.add_assignments(result.assignments):
+            print(f"{len(result.assignments)} Zuweisungen gespeichert.")
+        else:
+            print("Speichern fehlgeschlagen, die Zuweisungen wurden nicht übernommen.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
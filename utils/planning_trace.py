@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+utils/planning_trace.py
+
+Optionales Entscheidungsprotokoll des automatischen Planungsvorschlags.
+Pro Schicht-Platz wird festgehalten, wie viele Kandidaten zur Wahl standen,
+wie sich ihre Punktzahl zusammensetzt, wer in der Spitzengruppe lag, wer
+gewählt wurde und warum ein Platz leer blieb. Dazu kommen die Laufzeiten der
+einzelnen Phasen. Das Protokoll wird als JSONL neben der Datenbank abgelegt.
+Ist das Protokoll aus, übergibt der Planer None und es entstehen keine Kosten.
+"""
+import json
+import os
+import time
+from datetime import datetime
+
+TRACE_DIR_NAME = "planning_traces"
+MAX_TRACED_CANDIDATES = 10
+
+# Phasen des Planers
+PHASE_PREPARE = "Vorbereitung"
+PHASE_SEARCH = "Suche"
+PHASE_TEAM_LEADER = "Teamleiter"
+PHASE_FILL = "Auffüllen"
+PHASE_IMPROVE = "Nachoptimierung"
+
+# Anzeigenamen der Punkt-Bestandteile (Schlüssel wie in calculate_candidate_score)
+COMPONENT_LABELS = {
+    "history": "Historie",
+    "fairness": "Fairness",
+    "consecutive": "Ohne Pause",
+    "status": "Status",
+    "competence": "Kompetenz",
+    "tl_waste": "TL-Verschwendung",
+}
+
+
+def default_trace_path(db_path, event_id):
+    """Pfad für ein neues Protokoll: <DB-Ordner>/planning_traces/event_<id>_<zeitstempel>.jsonl
+    (bei gemeinsamer Planung mehrerer Events event_<id>_<id>_...)."""
+    folder = os.path.join(os.path.dirname(os.path.abspath(db_path)), TRACE_DIR_NAME)
+    key = "_".join(str(e) for e in event_id) if isinstance(event_id, (list, tuple)) else event_id
+    return os.path.join(folder, f"event_{key}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+
+
+class PlanningTrace:
+    """Sammelt die Entscheidungen eines Planungslaufs."""
+
+    def __init__(self, event_id, params=None):
+        self.event_id = event_id
+        self.params = params or {}
+        self.created = datetime.now().isoformat(timespec="seconds")
+        self.decisions = []
+        self.phases = []          # [{"phase": name, "ms": dauer}]
+        self.path = None
+        self._phase_name = None
+        self._phase_start = 0.0
+
+    # --- Phasen ---
+    def begin_phase(self, name):
+        """Startet eine neue Phase und schließt die vorherige ab."""
+        self.end_phase()
+        self._phase_name, self._phase_start = name, time.perf_counter()
+
+    def end_phase(self):
+        if self._phase_name is None: return
+        self.phases.append({"phase": self._phase_name, "ms": round((time.perf_counter() - self._phase_start) * 1000.0, 3)})
+        self._phase_name = None
+
+    # --- Entscheidungen ---
+    def decision(self, phase, shift, scored, top_tier=(), chosen=None, reason=None):
+        """Hält einen Platz fest. scored: [(punkte, bestandteile, kandidat)] absteigend sortiert."""
+        self.decisions.append({
+            "phase": phase,
+            "shift_id": shift.shift_id,
+            "shift": shift.label,
+            "pool_size": len(scored),
+            "candidates": [{"person_id": c.person_id, "name": c.display_name, "score": s, "components": comp} for s, comp, c in scored[:MAX_TRACED_CANDIDATES]],
+            "top_tier": [c.person_id for c in top_tier],
+            "chosen": None if chosen is None else {"person_id": chosen.person_id, "name": chosen.display_name},
+            "reason": reason,
+        })
+
+    def empty_slots(self):
+        """Plätze, die beim Auffüllen leer geblieben sind."""
+        return [d for d in self.decisions if d["chosen"] is None and d["phase"] == PHASE_FILL]
+
+    def shifts_without_team_leader(self):
+        return [d for d in self.decisions if d["chosen"] is None and d["phase"] == PHASE_TEAM_LEADER]
+
+    # --- Speichern / Laden ---
+    def write_jsonl(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"type": "header", "event_id": self.event_id, "created": self.created, "params": self.params}, ensure_ascii=False) + "\n")
+            for d in self.decisions:
+                f.write(json.dumps(dict(d, type="decision"), ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.write(json.dumps({"type": "phases", "phases": self.phases}, ensure_ascii=False) + "\n")
+        self.path = path
+
+    @classmethod
+    def load_jsonl(cls, path):
+        trace = None
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip(): continue
+                record = json.loads(line)
+                kind = record.pop("type", None)
+                if kind == "header":
+                    trace = cls(record.get("event_id"), record.get("params"))
+                    trace.created = record.get("created", trace.created)
+                elif trace is None:
+                    raise ValueError("Ungültiges Protokoll: Kopfzeile fehlt.")
+                elif kind == "decision":
+                    trace.decisions.append(record)
+                elif kind == "phases":
+                    trace.phases = record.get("phases", [])
+        if trace is None: raise ValueError("Ungültiges Protokoll: Datei ist leer.")
+        trace.path = path
+        return trace
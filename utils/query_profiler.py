@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+utils/query_profiler.py
+
+Optionale Messung aller SQL-Abfragen des DatabaseManager.
+Pro normalisiertem SQL-Fingerabdruck werden Aufrufe, Gesamt-/Mittel-/p95-Laufzeit
+und gelieferte Zeilen gezählt. Langsame Abfragen landen mit ihrem
+EXPLAIN QUERY PLAN im Slow-Query-Log. Ist das Profiling aus, existiert kein
+Profiler-Objekt und execute_query kostet nur eine Attribut-Prüfung.
+"""
+import json
+import re
+import time
+from collections import deque
+
+PROFILE_ENV_VAR = "EQUISHIFT_PROFILE"
+MAX_SAMPLES_PER_QUERY = 1000
+MAX_SLOW_LOG_ENTRIES = 200
+
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_IN_LIST = re.compile(r"IN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_RE_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Normalisiert eine SQL-Anweisung: Literale -> ?, IN-Listen zusammengefasst, Leerraum vereinheitlicht."""
+    fp = _RE_STRING.sub("?", sql)
+    fp = _RE_NUMBER.sub("?", fp)
+    fp = _RE_IN_LIST.sub("IN (?+)", fp)
+    return _RE_SPACE.sub(" ", fp).strip()
+
+
+def _percentile(samples, pct):
+    if not samples: return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class QueryStats:
+    """Messwerte einer Abfrage-Art."""
+    __slots__ = ("count", "total_ms", "rows", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=MAX_SAMPLES_PER_QUERY)
+
+
+class QueryProfiler:
+    """Sammelt Laufzeiten pro SQL-Fingerabdruck und ein Slow-Query-Log."""
+
+    def __init__(self, conn, slow_threshold_ms=100):
+        self.conn = conn
+        self.slow_threshold_ms = slow_threshold_ms
+        self.stats = {}
+        self.slow_log = deque(maxlen=MAX_SLOW_LOG_ENTRIES)
+        self._explaining = False
+
+    def record(self, sql, params, elapsed_ms, rows=0):
+        fp = fingerprint(sql)
+        stats = self.stats.get(fp)
+        if stats is None:
+            stats = self.stats[fp] = QueryStats()
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        stats.rows += rows
+        stats.samples.append(elapsed_ms)
+        if elapsed_ms >= self.slow_threshold_ms:
+            self.slow_log.append({"fingerprint": fp, "sql": sql.strip(), "ms": round(elapsed_ms, 3), "plan": self._explain(sql, params)})
+        return fp
+
+    def add_fetch(self, fp, rows, elapsed_ms):
+        """Rechnet das spätere Abholen der Zeilen (fetchone/fetchall) der letzten Ausführung zu."""
+        stats = self.stats.get(fp)
+        if stats is None: return
+        stats.rows += rows
+        stats.total_ms += elapsed_ms
+        if stats.samples: stats.samples[-1] += elapsed_ms
+
+    def _explain(self, sql, params):
+        """EXPLAIN QUERY PLAN für lesende Abfragen; Schreibzugriffe und Steuerbefehle werden übersprungen."""
+        if self._explaining or not sql.lstrip().upper().startswith(("SELECT", "WITH")): return []
+        self._explaining = True
+        try:
+            rows = self.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            return [row[3] for row in rows]
+        except Exception as e:
+            return [f"(Plan nicht verfügbar: {e})"]
+        finally:
+            self._explaining = False
+
+    def summary(self):
+        """Liste der Abfragen, nach Gesamtzeit absteigend sortiert."""
+        result = []
+        for fp, s in self.stats.items():
+            result.append({"fingerprint": fp, "count": s.count, "total_ms": round(s.total_ms, 3), "mean_ms": round(s.total_ms / s.count, 3) if s.count else 0.0, "p95_ms": round(_percentile(s.samples, 95), 3), "rows": s.rows})
+        result.sort(key=lambda x: x["total_ms"], reverse=True)
+        return result
+
+    def reset(self):
+        self.stats.clear()
+        self.slow_log.clear()
+
+    def to_dict(self):
+        return {"slow_threshold_ms": self.slow_threshold_ms, "queries": self.summary(), "slow_queries": list(self.slow_log)}
+
+    def dump_json(self, file_path):
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+class ProfiledCursor:
+    """Hülle um einen sqlite3-Cursor, die execute/executemany misst (z. B. für copy_event)."""
+
+    def __init__(self, cursor, profiler):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._last_fp = None
+
+    def execute(self, sql, params=()):
+        start = time.perf_counter()
+        self._cursor.execute(sql, params)
+        self._last_fp = self._profiler.record(sql, params, (time.perf_counter() - start) * 1000.0, max(self._cursor.rowcount, 0))
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        start = time.perf_counter()
+        self._cursor.executemany(sql, seq_of_params)
+        self._last_fp = self._profiler.record(sql, (), (time.perf_counter() - start) * 1000.0, max(self._cursor.rowcount, 0))
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._profiler.add_fetch(self._last_fp, 0 if row is None else 1, (time.perf_counter() - start) * 1000.0)
+        return row
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._profiler.add_fetch(self._last_fp, len(rows), (time.perf_counter() - start) * 1000.0)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
@@ -52,6 +52,19 @@ class SettingsManager:
             if not self.config.has_section("Paths"): self.config.add_section("Paths")
             if not self.config.has_option("Paths", "last_export_path"): self.config.set("Paths", "last_export_path", "")
 
+            if not self.config.has_section("Planning"): self.config.add_section("Planning")
+            if not self.config.has_option("Planning", "restarts"): self.config.set("Planning", "restarts", "20")
+            if not self.config.has_option("Planning", "workers"): self.config.set("Planning", "workers", "1")
+
+            if not self.config.has_section("Backup"): self.config.add_section("Backup")
+            if not self.config.has_option("Backup", "auto_snapshots"): self.config.set("Backup", "auto_snapshots", "true")
+            if not self.config.has_option("Backup", "snapshot_keep"): self.config.set("Backup", "snapshot_keep", "10")
+
+            if not self.config.has_section("Diagnostics"): self.config.add_section("Diagnostics")
+            if not self.config.has_option("Diagnostics", "profile_queries"): self.config.set("Diagnostics", "profile_queries", "false")
+            if not self.config.has_option("Diagnostics", "slow_query_ms"): self.config.set("Diagnostics", "slow_query_ms", "100")
+            if not self.config.has_option("Diagnostics", "trace_planning"): self.config.set("Diagnostics", "trace_planning", "false")
+
             self.save_settings()
 
     def _create_default_config(self):
@@ -93,6 +106,22 @@ class SettingsManager:
         }
         
         self.config["Paths"] = {"last_export_path": ""}
+
+        self.config["Planning"] = {
+            "restarts": "20",
+            "workers": "1"
+        }
+
+        self.config["Backup"] = {
+            "auto_snapshots": "true",
+            "snapshot_keep": "10"
+        }
+
+        self.config["Diagnostics"] = {
+            "profile_queries": "false",
+            "slow_query_ms": "100",
+            "trace_planning": "false"
+        }
         
         self.save_settings()
 
@@ -152,5 +181,29 @@ class SettingsManager:
     def get_feedback_email(self): return self.config.get("PDF", "feedback_email", fallback="")
     def set_feedback_email(self, email): self.config.set("PDF", "feedback_email", email); self.save_settings()
 
+    # --- Automatische Planung ---
+    def get_planning_restarts(self): return self.config.getint("Planning", "restarts", fallback=20)
+    def set_planning_restarts(self, restarts): self.config.set("Planning", "restarts", str(restarts)); self.save_settings()
+
+    def get_planning_workers(self): return self.config.getint("Planning", "workers", fallback=1)
+    def set_planning_workers(self, workers): self.config.set("Planning", "workers", str(workers)); self.save_settings()
+
+    # --- Sicherungen ---
+    def get_auto_snapshots(self): return self.config.getboolean("Backup", "auto_snapshots", fallback=True)
+    def set_auto_snapshots(self, enabled): self.config.set("Backup", "auto_snapshots", "true" if enabled else "false"); self.save_settings()
+
+    def get_snapshot_keep(self): return self.config.getint("Backup", "snapshot_keep", fallback=10)
+    def set_snapshot_keep(self, keep): self.config.set("Backup", "snapshot_keep", str(keep)); self.save_settings()
+
+    # --- Diagnose ---
+    def get_query_profiling(self): return self.config.getboolean("Diagnostics", "profile_queries", fallback=False)
+    def set_query_profiling(self, enabled): self.config.set("Diagnostics", "profile_queries", "true" if enabled else "false"); self.save_settings()
+
+    def get_slow_query_ms(self): return self.config.getint("Diagnostics", "slow_query_ms", fallback=100)
+    def set_slow_query_ms(self, ms): self.config.set("Diagnostics", "slow_query_ms", str(ms)); self.save_settings()
+
+    def get_planning_trace(self): return self.config.getboolean("Diagnostics", "trace_planning", fallback=False)
+    def set_planning_trace(self, enabled): self.config.set("Diagnostics", "trace_planning", "true" if enabled else "false"); self.save_settings()
+
     def get_last_export_path(self): return self.config.get("Paths", "last_export_path", fallback="")
     def set_last_export_path(self, path): self.config.set("Paths", "last_export_path", path); self.save_settings()
\ No newline at end of file
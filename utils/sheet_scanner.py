@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+utils/sheet_scanner.py
+
+Einlesen gescannter Nachbereitungs-Bögen (Exporter.export_post_event_sheets).
+Jeder Bogen trägt drei Passmarken (Ecken oben links, oben rechts, unten links)
+und pro Zeile einen Strichcode mit der assignment_id: START, 20 Datenbits,
+6 Prüfbits (id mod 61), STOP; jedes Bit ist ein 2 pt breites Feld (schwarz = 1).
+Die Geometrie des Bogens (Spaltenbreiten, Kästchen, Code) steht hier und wird
+vom Exporter mitbenutzt, damit Druck und Auswertung nicht auseinanderlaufen.
+
+Die Auswertung läuft offline mit NumPy: Seite binarisieren (Otsu), Integralbild,
+Passmarken suchen (daraus eine affine Abbildung Bogen-Punkte -> Pixel, Drehung um
+90/180 Grad wird erkannt), Codezeilen entlang der Code-Spalte abtasten und für jede
+erkannte Zeile den Füllgrad der vier Kästchen messen. Unklare Zeilen (Füllgrad
+zwischen den Schwellen, mehrere Kreuze, Vertreter ohne Namen) werden zur Prüfung
+markiert. Eingelesen werden Bilddateien und Scan-PDFs (ein Bild pro Seite).
+"""
+import os
+
+# --- Geometrie des Bogens (Punkte, A4 quer, Ursprung unten links wie in ReportLab) ---
+PAGE_W, PAGE_H = 841.89, 595.28
+MARGIN_X = 57.6                # 0.8 inch
+MARGIN_Y = 108.0               # 1.5 inch (oben und unten)
+FRAME_PADDING = 6.0            # Innenabstand des ReportLab-Frames
+COL_WIDTHS = (93.6, 136.8, 57.6, 57.6, 72.0, 72.0, 136.8, 72.0)
+CHECKBOX_COLS = (2, 3, 4, 5)
+BOX_STATUSES = ("Erledigt", "Erledigt (durch Vertreter)", "Entschuldigt", "Nicht Erschienen")
+STATUS_SUBSTITUTE = "Erledigt (durch Vertreter)"
+CODE_COL = 7
+BOX_SIZE = 10.0
+BOX_INSET = 1.8                # gemessen wird nur das Innere, ohne den gedruckten Rahmen
+FIDUCIAL_SIZE = 14.0
+FIDUCIALS = ((27.0, PAGE_H - 27.0), (PAGE_W - 27.0, PAGE_H - 27.0), (27.0, 27.0))  # Mittelpunkte: oben links, oben rechts, unten links
+
+# --- Zeilencode ---
+UNIT = 2.0
+BAR_HEIGHT = 10.0
+START_BITS = (1, 1, 0, 1)
+STOP_BITS = (1, 0, 1, 1)
+DATA_BITS = 20
+CHECK_BITS = 6
+CHECK_MOD = 61                 # Primzahl: jedes einzelne gekippte Datenbit ändert die Prüfsumme
+CODE_UNITS = len(START_BITS) + DATA_BITS + CHECK_BITS + len(STOP_BITS)
+MAX_CODE_ID = (1 << DATA_BITS) - 1
+
+# --- Auswertung ---
+FILL_EMPTY = 0.04              # darunter: sicher leer
+FILL_TICKED = 0.10             # darüber: sicher angekreuzt
+SCAN_STEP = 0.5                # Abtastschritt der Zeilensuche in Punkten
+
+
+def column_x(col):
+    """Linke Kante einer Tabellenspalte (die Tabelle ist links am Rand ausgerichtet)."""
+    return MARGIN_X + FRAME_PADDING + sum(COL_WIDTHS[:col])
+
+
+def code_x():
+    """Linke Kante des Zeilencodes (zentriert in der Code-Spalte)."""
+    return column_x(CODE_COL) + (COL_WIDTHS[CODE_COL] - CODE_UNITS * UNIT) / 2
+
+
+def encode_code(assignment_id):
+    """Bitfolge des Zeilencodes; None, wenn die ID nicht in 20 Bit passt."""
+    if assignment_id is None or not 0 < assignment_id <= MAX_CODE_ID: return None
+    data = [(assignment_id >> i) & 1 for i in range(DATA_BITS - 1, -1, -1)]
+    check = [((assignment_id % CHECK_MOD) >> i) & 1 for i in range(CHECK_BITS - 1, -1, -1)]
+    return list(START_BITS) + data + check + list(STOP_BITS)
+
+
+def decode_code(bits):
+    """assignment_id aus einer Bitfolge oder None (Rahmen oder Prüfsumme falsch)."""
+    if len(bits) != CODE_UNITS: return None
+    if tuple(bits[:len(START_BITS)]) != START_BITS or tuple(bits[-len(STOP_BITS):]) != STOP_BITS: return None
+    body = bits[len(START_BITS):-len(STOP_BITS)]
+    value = check = 0
+    for b in body[:DATA_BITS]: value = (value << 1) | int(b)
+    for b in body[DATA_BITS:]: check = (check << 1) | int(b)
+    if value == 0 or value % CHECK_MOD != check: return None
+    return value
+
+
+class SheetRow:
+    """Eine erkannte Bogenzeile mit Füllgrad der vier Kästchen und Vorschlag."""
+    __slots__ = ("source", "assignment_id", "fills", "status", "needs_review", "reason")
+
+    def __init__(self, source, assignment_id, fills):
+        self.source = source
+        self.assignment_id = assignment_id
+        self.fills = fills
+        ticked = [i for i, f in enumerate(fills) if f > FILL_TICKED]
+        unsure = [i for i, f in enumerate(fills) if FILL_EMPTY <= f <= FILL_TICKED]
+        self.status = BOX_STATUSES[max(range(len(fills)), key=lambda i: fills[i])] if ticked or unsure else None
+        self.needs_review, self.reason = True, ""
+        if unsure: self.reason = "Kreuz nicht eindeutig"
+        elif len(ticked) > 1: self.reason = "Mehrere Kästchen angekreuzt"
+        elif self.status == STATUS_SUBSTITUTE: self.reason = "Vertreter auswählen"
+        else: self.needs_review = False
+
+    def __repr__(self):
+        return f"SheetRow({self.assignment_id}, {self.status}, review={self.needs_review})"
+
+
+# --- Bildverarbeitung ---
+def _ink(gray):
+    """Binarisiert per Otsu-Schwelle; 1 = Tinte."""
+    import numpy as np
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    levels = np.arange(256)
+    w0 = np.cumsum(hist); w1 = total - w0
+    m0 = np.cumsum(hist * levels)
+    mean_all = m0[-1] / total
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mean_all * w0 - m0) ** 2 / (w0 * w1)
+    threshold = int(np.nanargmax(between))
+    return (gray <= threshold).astype(np.int32)
+
+
+def _integral(ink):
+    import numpy as np
+    s = np.zeros((ink.shape[0] + 1, ink.shape[1] + 1), dtype=np.int64)
+    s[1:, 1:] = ink.cumsum(0).cumsum(1)
+    return s
+
+
+def _box_mean(s, xs, ys, r):
+    """Mittlerer Tintenanteil in Quadraten (2r+1) um die Pixelpunkte xs/ys (beliebige Form)."""
+    import numpy as np
+    h, w = s.shape[0] - 1, s.shape[1] - 1
+    xs = np.floor(xs).astype(np.int64); ys = np.floor(ys).astype(np.int64)
+    x0 = np.clip(xs - r, 0, w); x1 = np.clip(xs + r + 1, 0, w)
+    y0 = np.clip(ys - r, 0, h); y1 = np.clip(ys + r + 1, 0, h)
+    area = np.maximum((x1 - x0) * (y1 - y0), 1)
+    return (s[y1, x1] - s[y0, x1] - s[y1, x0] + s[y0, x0]) / area
+
+
+def _find_fiducial(ink, s, corner, scale):
+    """Mittelpunkt (x, y) der Passmarke in einer Bildecke ("tl", "tr", "bl", "br") oder None."""
+    import numpy as np
+    h, w = ink.shape
+    region = int(70 * scale)  # bleibt rechts oben vor dem Logo im Kopfbereich
+    k = max(3, int(FIDUCIAL_SIZE * scale * 0.7))
+    x_lo = 0 if corner[1] == "l" else w - region
+    y_lo = 0 if corner[0] == "t" else h - region
+    x_lo, y_lo = max(0, x_lo), max(0, y_lo)
+    sub = s[y_lo:y_lo + region + 1, x_lo:x_lo + region + 1]
+    if sub.shape[0] <= k or sub.shape[1] <= k: return None
+    sums = sub[k:, k:] - sub[:-k, k:] - sub[k:, :-k] + sub[:-k, :-k]
+    best = np.unravel_index(np.argmax(sums), sums.shape)
+    if sums[best] < 0.9 * k * k: return None
+    # Schwerpunkt der Tinte um den Fund (die Marke ist die einzige Tinte in der Ecke)
+    cy, cx = y_lo + best[0] + k / 2, x_lo + best[1] + k / 2
+    half = int(FIDUCIAL_SIZE * scale * 0.8)
+    ya, yb = max(0, int(cy) - half), min(h, int(cy) + half)
+    xa, xb = max(0, int(cx) - half), min(w, int(cx) + half)
+    patch = ink[ya:yb, xa:xb]
+    if patch.sum() == 0: return None
+    py, px = np.nonzero(patch)
+    return xa + px.mean() + 0.5, ya + py.mean() + 0.5
+
+
+def _locate_page(gray):
+    """Richtet die Seite aus und liefert (ink, integral, affine, scale) oder wirft ValueError."""
+    import numpy as np
+    if gray.shape[0] > gray.shape[1]: gray = np.rot90(gray)
+    for attempt in range(2):
+        ink = _ink(gray)
+        s = _integral(ink)
+        scale = gray.shape[1] / PAGE_W
+        found = {c: _find_fiducial(ink, s, c, scale) for c in ("tl", "tr", "bl", "br")}
+        present = {c for c, p in found.items() if p is not None}
+        if present == {"tl", "tr", "bl"}:
+            pts = np.array([[x, y, 1.0] for x, y in FIDUCIALS])
+            pix = np.array([found["tl"], found["tr"], found["bl"]])
+            affine = np.linalg.solve(pts, pix)  # (3, 2): [x, y, 1] @ affine = [px, py]
+            return ink, s, affine, scale
+        if attempt == 0 and present == {"tr", "bl", "br"}:
+            gray = np.rot90(gray, 2)  # Seite liegt auf dem Kopf
+            continue
+        break
+    raise ValueError("Passmarken nicht gefunden (kein EquiShift-Bogen oder Seite abgeschnitten)")
+
+
+def _to_pixels(affine, xs, ys):
+    return xs * affine[0, 0] + ys * affine[1, 0] + affine[2, 0], xs * affine[0, 1] + ys * affine[1, 1] + affine[2, 1]
+
+
+def scan_page(gray, source=""):
+    """Wertet eine Seite (2D-Array uint8, 0 = schwarz) aus.
+    Liefert (rows, unreadable): erkannte SheetRows und die Zahl der Codes mit Lesefehler."""
+    import numpy as np
+    ink, s, affine, scale = _locate_page(gray)
+    ys = np.arange(MARGIN_Y, PAGE_H - MARGIN_Y, SCAN_STEP)
+    unit_x = code_x() + (np.arange(CODE_UNITS) + 0.5) * UNIT
+    gx, gy = np.meshgrid(unit_x, ys)
+    px, py = _to_pixels(affine, gx, gy)
+    bits = _box_mean(s, px, py, max(1, int(UNIT * scale * 0.3))) > 0.5
+    start, stop = np.array(START_BITS, bool), np.array(STOP_BITS, bool)
+    framed = np.nonzero((bits[:, :len(START_BITS)] == start).all(1) & (bits[:, -len(STOP_BITS):] == stop).all(1))[0]
+
+    # Aufeinanderfolgende Treffer gehören zu einem Code; die Bits werden per Mehrheit bestimmt
+    groups = np.split(framed, np.nonzero(np.diff(framed) > 2)[0] + 1) if len(framed) else []
+    rows, unreadable = [], 0
+    box_x = np.array([column_x(c) + COL_WIDTHS[c] / 2 for c in CHECKBOX_COLS])
+    box_r = max(1, int((BOX_SIZE / 2 - BOX_INSET) * scale))
+    for group in groups:
+        if len(group) < 3: continue  # Streifschuss an Linien, kein vollständiger Code
+        assignment_id = decode_code((bits[group].mean(0) > 0.5).astype(int).tolist())
+        if assignment_id is None:
+            unreadable += 1
+            continue
+        y = ys[group].mean()
+        bx, by = _to_pixels(affine, box_x, np.full(len(box_x), y))
+        fills = tuple(round(float(f), 3) for f in _box_mean(s, bx, by, box_r))
+        rows.append(SheetRow(source, assignment_id, fills))
+    return rows, unreadable
+
+
+# --- Eingabedateien ---
+def _qimage_to_gray(image):
+    import numpy as np
+    from PyQt5.QtGui import QImage
+    image = image.convertToFormat(QImage.Format_Grayscale8)
+    ptr = image.constBits()
+    ptr.setsize(image.bytesPerLine() * image.height())
+    return np.frombuffer(ptr, np.uint8).reshape(image.height(), image.bytesPerLine())[:, :image.width()].copy()
+
+
+def _pdf_page_image(page):
+    """Größtes Bild einer PDF-Seite als Graustufen-Array oder None.
+    JPEG (DCTDecode) und unkomprimierte 8-Bit-Flate-Bilder – das, was Scanner üblicherweise
+    schreiben – werden direkt dekodiert; alles andere über pypdf/Pillow (deutlich langsamer)."""
+    import numpy as np
+    from PyQt5.QtGui import QImage
+    xobjects = page.get("/Resources", {}).get("/XObject", {})
+    candidates = [o.get_object() for o in xobjects.values()]
+    candidates = [o for o in candidates if o.get("/Subtype") == "/Image"]
+    if not candidates: return None
+    obj = max(candidates, key=lambda o: o["/Width"] * o["/Height"])
+    filters = obj.get("/Filter")
+    filters = [filters] if isinstance(filters, str) else list(filters or [])
+    width, height = obj["/Width"], obj["/Height"]
+    if filters == ["/DCTDecode"]:
+        image = QImage.fromData(obj._data)
+        if not image.isNull(): return _qimage_to_gray(image)
+    elif filters == ["/FlateDecode"] and obj.get("/BitsPerComponent") == 8 and "/DecodeParms" not in obj:
+        channels = {"/DeviceGray": 1, "/DeviceRGB": 3}.get(obj.get("/ColorSpace"))
+        if channels:
+            data = np.frombuffer(obj.get_data(), np.uint8)
+            if data.size == width * height * channels:
+                data = data.reshape(height, width, channels)
+                return data[:, :, 0].copy() if channels == 1 else data.mean(2).astype(np.uint8)
+    images = list(page.images)
+    if not images: return None
+    largest = max((img.image for img in images), key=lambda img: img.size[0] * img.size[1])
+    return np.asarray(largest.convert("L"))
+
+
+def load_pages(path):
+    """Liefert [(Bezeichnung, Graustufen-Array), ...] für eine Bilddatei oder ein Scan-PDF."""
+    from PyQt5.QtGui import QImage
+    name = os.path.basename(path)
+    if path.lower().endswith(".pdf"):
+        from pypdf import PdfReader
+        pages = []
+        for number, page in enumerate(PdfReader(path).pages, start=1):
+            gray = _pdf_page_image(page)
+            if gray is None: raise ValueError(f"{name}, Seite {number}: enthält kein Scan-Bild")
+            pages.append((f"{name}, Seite {number}", gray))
+        return pages
+    image = QImage(path)
+    if image.isNull(): raise ValueError(f"{name}: Bild konnte nicht gelesen werden")
+    return [(name, _qimage_to_gray(image))]
+
+
+def scan_files(paths, progress=None):
+    """Wertet alle Seiten aus. Liefert (rows, problems): SheetRows (je assignment_id die erste
+    sichere Erkennung) und Hinweise zu Seiten oder Codes, die nicht gelesen werden konnten.
+    progress(erledigt, gesamt) nach jeder Datei."""
+    rows, problems = {}, []
+    for done, path in enumerate(paths, start=1):
+        try:
+            pages = load_pages(path)
+        except Exception as e:
+            problems.append(str(e))
+            pages = []
+        for label, gray in pages:
+            try:
+                page_rows, unreadable = scan_page(gray, label)
+            except ValueError as e:
+                problems.append(f"{label}: {e}")
+                continue
+            if unreadable: problems.append(f"{label}: {unreadable} Zeilencode(s) nicht lesbar")
+            if not page_rows: problems.append(f"{label}: keine Zeilen erkannt")
+            for row in page_rows:
+                previous = rows.get(row.assignment_id)
+                if previous is None or (previous.needs_review and not row.needs_review): rows[row.assignment_id] = row
+        if progress is not None: progress(done, len(paths))
+    return list(rows.values()), problems
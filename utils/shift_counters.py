@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+utils/shift_counters.py
+
+Vorberechnete Belegung je Schicht: shifts.assigned_count (Zuweisungen) und
+shifts.tl_count (zugewiesene Teamleiter für den Dienst der Aufgabe).
+SQLite-Trigger auf assignments, person_competencies und tasks halten beide
+Spalten in derselben Transaktion aktuell, sodass Baum, Besetzungsübersicht und
+Statusleiste die Belegung als einfache Spalte lesen statt sie zu zählen.
+Die Spalten sind abgeleitet und werden deshalb nicht im Änderungsjournal
+protokolliert (change_journal.DERIVED_COLUMNS); nach dem Zurückspielen einer
+Aktion zählt refresh_counters die betroffenen Schichten neu.
+"""
+
+# Ist die Person Teamleiter für den Dienst der Aufgabe, zu der die Schicht gehört?
+_IS_TL = "EXISTS (SELECT 1 FROM person_competencies pc JOIN tasks t ON t.duty_type_id = pc.duty_type_id WHERE pc.person_id = {pid} AND t.task_id = shifts.task_id AND pc.is_team_leader = 1)"
+
+ASSIGNED_RECOUNT = "(SELECT COUNT(*) FROM assignments a WHERE a.shift_id = shifts.shift_id)"
+TL_RECOUNT = "(SELECT COUNT(*) FROM assignments a JOIN tasks t ON t.task_id = shifts.task_id JOIN person_competencies pc ON pc.person_id = a.person_id AND pc.duty_type_id = t.duty_type_id AND pc.is_team_leader = 1 WHERE a.shift_id = shifts.shift_id)"
+
+
+def _adjust(sign, ref):
+    return f"UPDATE shifts SET assigned_count = assigned_count {sign} 1, tl_count = tl_count {sign} {_IS_TL.format(pid=ref + '.person_id')} WHERE shift_id = {ref}.shift_id;"
+
+
+def _recount_tl(where):
+    return f"UPDATE shifts SET tl_count = {TL_RECOUNT} WHERE {where};"
+
+
+def create_counter_schema(cursor):
+    """Spalten, Trigger und Erstbefüllung (Migration v7)."""
+    cursor.execute("ALTER TABLE shifts ADD COLUMN assigned_count INTEGER NOT NULL DEFAULT 0")
+    cursor.execute("ALTER TABLE shifts ADD COLUMN tl_count INTEGER NOT NULL DEFAULT 0")
+    # Teamleiter-Änderung einer Person: nur deren Schichten im betroffenen Dienst neu zählen
+    competence_scope = "shift_id IN (SELECT a.shift_id FROM assignments a JOIN shifts s ON s.shift_id = a.shift_id JOIN tasks t ON t.task_id = s.task_id WHERE a.person_id = {ref}.person_id AND t.duty_type_id = {ref}.duty_type_id)"
+    triggers = {
+        "shift_counts_assignment_insert": ("AFTER INSERT ON assignments", _adjust("+", "NEW")),
+        "shift_counts_assignment_delete": ("AFTER DELETE ON assignments", _adjust("-", "OLD")),
+        "shift_counts_assignment_update": ("AFTER UPDATE OF person_id, shift_id ON assignments", _adjust("-", "OLD") + "\n" + _adjust("+", "NEW")),
+        "shift_counts_competence_insert": ("AFTER INSERT ON person_competencies", _recount_tl(competence_scope.format(ref="NEW"))),
+        "shift_counts_competence_delete": ("AFTER DELETE ON person_competencies", _recount_tl(competence_scope.format(ref="OLD"))),
+        "shift_counts_competence_update": ("AFTER UPDATE ON person_competencies", _recount_tl(competence_scope.format(ref="OLD")) + "\n" + _recount_tl(competence_scope.format(ref="NEW"))),
+        "shift_counts_task_duty": ("AFTER UPDATE OF duty_type_id ON tasks", _recount_tl("task_id = NEW.task_id")),
+    }
+    for name, (event, body) in triggers.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+    refresh_counters(cursor)
+
+
+def refresh_counters(cursor, shift_ids=None):
+    """Zählt alle oder die angegebenen Schichten neu (Erstbefüllung, nach Rückgängig/Wiederholen)."""
+    if shift_ids is None:
+        cursor.execute(f"UPDATE shifts SET assigned_count = {ASSIGNED_RECOUNT}, tl_count = {TL_RECOUNT}")
+        return
+    shift_ids = list(shift_ids)
+    for i in range(0, len(shift_ids), 500):
+        chunk = shift_ids[i:i + 500]
+        cursor.execute(f"UPDATE shifts SET assigned_count = {ASSIGNED_RECOUNT}, tl_count = {TL_RECOUNT} WHERE shift_id IN ({', '.join('?' * len(chunk))})", chunk)
+
+
+def refresh_after_replay(cursor, group_id):
+    """Zählt die Schichten einer zurückgespielten Journal-Gruppe neu. Beim Zurückspielen können
+    Zuweisungen vor ihrer Schicht wiederkehren; dann greifen die Zähl-Trigger ins Leere."""
+    cursor.execute("""
+        SELECT DISTINCT json_extract(COALESCE(before_json, after_json), '$.shift_id') FROM change_journal
+        WHERE group_id = ? AND table_name IN ('assignments', 'shifts')""", (group_id,))
+    shift_ids = [row[0] for row in cursor.fetchall() if row[0] is not None]
+    cursor.execute("""
+        SELECT s.shift_id FROM shifts s JOIN change_journal j ON j.table_name = 'tasks' AND j.row_id = s.task_id
+        WHERE j.group_id = ?""", (group_id,))
+    shift_ids.extend(row[0] for row in cursor.fetchall())
+    if shift_ids: refresh_counters(cursor, set(shift_ids))
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+utils/unavailability.py
+
+Abwesenheiten der Mitglieder (Urlaub, Montage, ...) als Zeiträume in
+person_unavailability, in Epoch-Minuten wie die Schichten (start_ts, end_ts,
+Ende ausschließlich). Anders als Schichten können Abwesenheiten Wochen dauern,
+die Suche lässt sich also nicht über eine Höchstdauer auf start_ts begrenzen.
+Die Zeiträume liegen deshalb zusätzlich in einem ganzzahligen R*-Baum
+(person_unavailability_rtree), den Trigger in derselben Transaktion aktuell
+halten: "wer ist während [start, end) abwesend" ist eine Bereichsabfrage auf
+dem Index. Fehlt das R*-Tree-Modul, wird über den B-Baum-Index auf end_ts
+gesucht (gleiches Ergebnis, nur ohne Intervallindex).
+"""
+import csv
+from datetime import datetime
+
+from utils.event_model import to_epoch_minutes
+
+RTREE_TABLE = "person_unavailability_rtree"
+CSV_COLUMNS = ("display_name", "start_date", "start_time", "end_date", "end_time", "reason")
+DAY_START, DAY_END = "00:00", "23:59"
+
+
+def rtree_available(cursor):
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.rtree_probe USING rtree_i32(id, lo, hi)")
+        cursor.execute("DROP TABLE temp.rtree_probe")
+        return True
+    except Exception:
+        return False
+
+
+def create_unavailability_schema(cursor):
+    """Tabelle, Index und (wenn verfügbar) R*-Baum mit Sync-Triggern (Migration v9).
+    Liefert False, wenn das R*-Tree-Modul fehlt."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS person_unavailability (
+            unavailability_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            person_id INTEGER NOT NULL,
+            start_date TEXT NOT NULL, start_time TEXT NOT NULL,
+            end_date TEXT NOT NULL, end_time TEXT NOT NULL,
+            start_ts INTEGER NOT NULL, end_ts INTEGER NOT NULL,
+            reason TEXT,
+            FOREIGN KEY (person_id) REFERENCES persons (person_id) ON DELETE CASCADE
+        )""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_unavailability_person ON person_unavailability (person_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_unavailability_time ON person_unavailability (end_ts, start_ts)")
+    if not rtree_available(cursor): return False
+    cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE} USING rtree_i32(id, start_ts, end_ts)")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS unavailability_rtree_insert AFTER INSERT ON person_unavailability BEGIN
+            INSERT INTO {RTREE_TABLE} (id, start_ts, end_ts) VALUES (new.unavailability_id, new.start_ts, new.end_ts);
+        END""")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS unavailability_rtree_delete AFTER DELETE ON person_unavailability BEGIN
+            DELETE FROM {RTREE_TABLE} WHERE id = old.unavailability_id;
+        END""")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS unavailability_rtree_update AFTER UPDATE OF start_ts, end_ts ON person_unavailability BEGIN
+            UPDATE {RTREE_TABLE} SET start_ts = new.start_ts, end_ts = new.end_ts WHERE id = new.unavailability_id;
+        END""")
+    cursor.execute(f"INSERT OR REPLACE INTO {RTREE_TABLE} (id, start_ts, end_ts) SELECT unavailability_id, start_ts, end_ts FROM person_unavailability")
+    return True
+
+
+def unavailability_interval(start_date, start_time, end_date, end_time):
+    """(start_ts, end_ts) in Epoch-Minuten; ValueError bei ungültigen oder leeren Zeiträumen."""
+    start, end = to_epoch_minutes(start_date, start_time), to_epoch_minutes(end_date, end_time)
+    if end <= start: raise ValueError("Das Ende der Abwesenheit liegt nicht nach ihrem Beginn.")
+    return start, end
+
+
+class UnavailabilityIndex:
+    """Bereichsabfragen auf den Abwesenheiten: über den R*-Baum oder, ohne ihn, über idx_unavailability_time."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (RTREE_TABLE,))
+        self.use_rtree = cursor.fetchone() is not None
+        if self.use_rtree:
+            self._source = f"{RTREE_TABLE} r CROSS JOIN person_unavailability u ON u.unavailability_id = r.id"
+            self._bounds = "r"
+        else:
+            self._source, self._bounds = "person_unavailability u", "u"
+
+    def person_subquery(self):
+        """SQL für 'person_id der Abwesenden'; Parameter: (Ende, Beginn) des Zeitraums."""
+        return f"SELECT u.person_id FROM {self._source} WHERE {self._bounds}.start_ts < ? AND {self._bounds}.end_ts > ?"
+
+    def person_ids(self, start, end):
+        """Menge der person_id, die während [start, end) abwesend sind."""
+        cursor = self.conn.cursor()
+        cursor.execute(self.person_subquery(), (end, start))
+        return {row[0] for row in cursor.fetchall()}
+
+    def shift_conflicts(self, event_ids):
+        """{(person_id, shift_id)} für alle Schichten der Events, die in eine Abwesenheit fallen.
+        CROSS JOIN legt die Reihenfolge fest: Schichten außen, je Schicht eine Bereichsabfrage auf dem Index."""
+        events = ", ".join("?" * len(event_ids))
+        b = self._bounds
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            SELECT DISTINCT u.person_id, s.shift_id FROM tasks t CROSS JOIN shifts s CROSS JOIN {self._source}
+            WHERE t.event_id IN ({events}) AND s.task_id = t.task_id AND {b}.start_ts < s.end_ts AND {b}.end_ts > s.start_ts""", tuple(event_ids))
+        return {(row[0], row[1]) for row in cursor.fetchall()}
+
+
+def _parse_date(value):
+    """'TT.MM.JJJJ' oder 'JJJJ-MM-TT' -> 'JJJJ-MM-TT'."""
+    value = (value or "").strip()
+    for fmt in ("%d.%m.%Y", "%Y-%m-%d"):
+        try: return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError: pass
+    raise ValueError(f"Ungültiges Datum: '{value}'")
+
+
+def _parse_time(value, default):
+    value = (value or "").strip()
+    if not value: return default
+    return datetime.strptime(value, "%H:%M").strftime("%H:%M")
+
+
+def parse_unavailability_row(row):
+    """CSV-Zeile -> (display_name, start_date, start_time, end_date, end_time, reason).
+    Ohne Uhrzeiten gilt der ganze Tag, ohne Enddatum nur der Starttag."""
+    start_date = _parse_date(row.get("start_date"))
+    end_date = _parse_date(row.get("end_date")) if (row.get("end_date") or "").strip() else start_date
+    start_time, end_time = _parse_time(row.get("start_time"), DAY_START), _parse_time(row.get("end_time"), DAY_END)
+    return (row.get("display_name") or "").strip(), start_date, start_time, end_date, end_time, (row.get("reason") or "").strip()
+
+
+def read_unavailability_csv(file_path):
+    """Liest eine CSV-Datei (Trennzeichen ';' oder ',') mit den Spalten aus CSV_COLUMNS als Liste von Dicts."""
+    with open(file_path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(4096); f.seek(0)
+        try: dialect = csv.Sniffer().sniff(sample, delimiters=";,")
+        except csv.Error: dialect = csv.excel
+        reader = csv.DictReader(f, dialect=dialect)
+        return [{(k or "").strip().lower(): v for k, v in row.items()} for row in reader]
@@ -14,6 +14,7 @@ from PyQt5.QtWidgets import (
     QLabel,
     QComboBox,
     QHBoxLayout,
+    QLineEdit,
     QAbstractItemView
 )
 from PyQt5.QtGui import QColor, QFont
@@ -30,6 +31,7 @@ class AssignHelperDialog(QDialog):
         self.selected_person_ids = []
         
         self.helpers_data = []
+        self.search_ids = None  # Treffer der Personensuche, None = alle
 
         self.setWindowTitle("Helfer zuweisen")
         self.setMinimumSize(450, 500)
@@ -54,6 +56,12 @@ class AssignHelperDialog(QDialog):
         sort_layout.addWidget(self.sort_combo)
         layout.addLayout(sort_layout)
 
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Suchen...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self._apply_search)
+        layout.addWidget(self.search_edit)
+
         self.helper_list = QListWidget()
         self.helper_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
         # Signal verbinden, um Button zu sperren/entsperren
@@ -95,41 +103,43 @@ class AssignHelperDialog(QDialog):
         
         if sort_mode == 0:
             self.helpers_data.sort(key=lambda x: (
-                -x['is_team_leader'],
-                -x['has_competence'],
-                -(len(x['warnings']) == 0),
-                x['score'],
-                x['display_name']
+                -x.is_team_leader,
+                -x.has_competence,
+                x.warnings != 0,
+                x.score,
+                x.display_name
             ))
         elif sort_mode == 1:
-            self.helpers_data.sort(key=lambda x: (x['score'], x['display_name']))
+            self.helpers_data.sort(key=lambda x: (x.score, x.display_name))
         elif sort_mode == 2:
-            self.helpers_data.sort(key=lambda x: (-x['score'], x['display_name']))
+            self.helpers_data.sort(key=lambda x: (-x.score, x.display_name))
         elif sort_mode == 3:
-            self.helpers_data.sort(key=lambda x: x['display_name'])
+            self.helpers_data.sort(key=lambda x: x.display_name)
 
         for helper in self.helpers_data:
-            display_text = f"{helper['display_name']} [Score: {helper['score']}]"
+            if self.search_ids is not None and helper.person_id not in self.search_ids:
+                continue
+            display_text = f"{helper.display_name} [Score: {helper.score}]"
             
             # Prüfen auf Jugendschutz
-            is_underage = "Zu jung" in helper['warnings']
+            is_underage = helper.too_young
             
-            if helper['warnings']:
-                display_text += f" ⚠️ ({helper['warnings']})"
+            if helper.warnings:
+                display_text += f" ⚠️ ({helper.warning_text})"
 
             item = QListWidgetItem(display_text)
-            item.setData(1, helper["person_id"])
+            item.setData(1, helper.person_id)
             
             # Sperr-Status speichern (UserRole + 1)
             item.setData(Qt.UserRole + 1, is_underage)
 
-            if helper["is_team_leader"]:
+            if helper.is_team_leader:
                 item.setForeground(QColor("blue"))
                 font = item.font(); font.setBold(True); item.setFont(font)
-            elif helper["has_competence"]:
+            elif helper.has_competence:
                 item.setForeground(QColor("green"))
             
-            if helper['warnings']:
+            if helper.warnings:
                 item.setForeground(QColor("red"))
                 
             if is_underage:
@@ -139,6 +149,10 @@ class AssignHelperDialog(QDialog):
             
         self._check_selection()
 
+    def _apply_search(self, text):
+        self.search_ids = self.db_manager.search_person_ids(text)
+        self._update_list()
+
     def _check_selection(self):
         """Prüft, ob die Auswahl zulässig ist (Jugendschutz)."""
         selected_items = self.helper_list.selectedItems()
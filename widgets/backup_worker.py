@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+widgets/backup_worker.py
+
+Führt eine Sicherung (utils/backup_manager.py) in einem eigenen Thread aus.
+Der Thread öffnet eigene Verbindungen zur Datenbankdatei; die Oberfläche und
+die Verbindung des Hauptthreads bleiben währenddessen benutzbar. Der
+BackupProgressDialog zeigt dabei den seitenweisen Fortschritt.
+"""
+from PyQt5.QtCore import QThread, pyqtSignal, Qt
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QProgressBar
+
+from utils.backup_manager import backup_database, SnapshotManager, DEFAULT_KEEP
+
+
+class BackupWorker(QThread):
+    """Sichert nach dest_path oder legt – ohne dest_path – einen rotierenden Schnappschuss an."""
+
+    progress = pyqtSignal(int, int)   # kopierte Seiten, Seiten gesamt
+    succeeded = pyqtSignal(str)       # Pfad der Sicherung
+    failed = pyqtSignal(str)
+
+    def __init__(self, db_path, dest_path=None, reason=None, keep=DEFAULT_KEEP, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.dest_path = dest_path
+        self.reason = reason
+        self.keep = keep
+
+    def run(self):
+        try:
+            if self.dest_path: path = backup_database(self.db_path, self.dest_path, self.progress.emit)
+            else: path = SnapshotManager(self.db_path, self.keep).create(self.reason, self.progress.emit)
+            self.succeeded.emit(path)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class BackupProgressDialog(QDialog):
+    """Zeigt den Fortschritt eines BackupWorker und schließt sich, sobald er fertig ist."""
+
+    def __init__(self, worker, parent=None, title="Sicherung wird erstellt"):
+        super().__init__(parent)
+        self.worker = worker
+        self.path = None
+        self.error = None
+        self.setWindowTitle(title)
+        self.setMinimumWidth(360)
+        self.setWindowFlags(self.windowFlags() & ~Qt.WindowCloseButtonHint)
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Die Datenbank wird gesichert..."))
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        layout.addWidget(self.progress_bar)
+        worker.progress.connect(self._on_progress)
+        worker.succeeded.connect(self._on_succeeded)
+        worker.failed.connect(self._on_failed)
+
+    def exec_(self):
+        self.worker.start()
+        return super().exec_()
+
+    def _on_progress(self, done, total):
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(done)
+
+    def _on_succeeded(self, path):
+        self.worker.wait()
+        self.path = path
+        self.accept()
+
+    def _on_failed(self, message):
+        self.worker.wait()
+        self.error = message
+        super().reject()
+
+    def reject(self):
+        # Esc schließt nicht; die Sicherung läuft ohnehin nur kurz
+        if self.worker.isRunning(): return
+        super().reject()
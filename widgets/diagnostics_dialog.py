@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+widgets/diagnostics_dialog.py
+
+Zeigt die Messwerte des Query-Profilings: Abfragen nach Gesamtlaufzeit
+und das Slow-Query-Log mit den Abfrageplänen.
+"""
+from PyQt5.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QTextEdit,
+    QSplitter,
+    QFileDialog,
+    QMessageBox,
+)
+from PyQt5.QtCore import Qt
+
+from utils.settings_manager import SettingsManager
+
+
+class DiagnosticsDialog(QDialog):
+    """Dialog für die Auswertung der Datenbank-Abfragen."""
+
+    COLUMNS = [("Abfrage", "fingerprint"), ("Aufrufe", "count"), ("Gesamt (ms)", "total_ms"), ("Mittel (ms)", "mean_ms"), ("p95 (ms)", "p95_ms"), ("Zeilen", "rows")]
+
+    def __init__(self, parent, db_manager):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.setWindowTitle("Diagnose: Datenbank-Abfragen")
+        self.setMinimumSize(900, 600)
+
+        layout = QVBoxLayout(self)
+        self.info_label = QLabel()
+        self.info_label.setWordWrap(True)
+        layout.addWidget(self.info_label)
+
+        splitter = QSplitter(Qt.Vertical)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels([c[0] for c in self.COLUMNS])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        splitter.addWidget(self.table)
+
+        self.slow_log_view = QTextEdit()
+        self.slow_log_view.setReadOnly(True)
+        splitter.addWidget(self.slow_log_view)
+        layout.addWidget(splitter)
+
+        button_layout = QHBoxLayout()
+        self.enable_button = QPushButton("Für diese Sitzung aktivieren")
+        self.enable_button.clicked.connect(self.enable_profiling)
+        self.refresh_button = QPushButton("Aktualisieren")
+        self.refresh_button.clicked.connect(self.refresh)
+        self.reset_button = QPushButton("Zurücksetzen")
+        self.reset_button.clicked.connect(self.reset)
+        self.save_button = QPushButton("JSON speichern...")
+        self.save_button.clicked.connect(self.save_json)
+        close_button = QPushButton("Schließen")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(self.enable_button)
+        button_layout.addStretch()
+        button_layout.addWidget(self.refresh_button)
+        button_layout.addWidget(self.reset_button)
+        button_layout.addWidget(self.save_button)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.refresh()
+
+    def refresh(self):
+        profiler = self.db_manager.profiler
+        active = profiler is not None
+        self.enable_button.setVisible(not active)
+        for button in (self.refresh_button, self.reset_button, self.save_button): button.setEnabled(active)
+
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(0)
+        if not active:
+            self.info_label.setText("Das Query-Profiling ist ausgeschaltet. Es kann in den Einstellungen oder über die Umgebungsvariable EQUISHIFT_PROFILE=1 dauerhaft aktiviert werden.")
+            self.slow_log_view.clear()
+            return
+
+        summary = profiler.summary()
+        self.info_label.setText(f"{len(summary)} verschiedene Abfragen, {sum(q['count'] for q in summary)} Aufrufe. Langsam ab {profiler.slow_threshold_ms} ms.")
+        self.table.setRowCount(len(summary))
+        for row, query in enumerate(summary):
+            for col, (_, key) in enumerate(self.COLUMNS):
+                item = QTableWidgetItem()
+                if key == "fingerprint":
+                    item.setText(query[key])
+                    item.setToolTip(query[key])
+                else:
+                    item.setData(Qt.DisplayRole, query[key])
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, col, item)
+        self.table.setSortingEnabled(True)
+
+        lines = []
+        for entry in reversed(profiler.slow_log):
+            lines.append(f"[{entry['ms']:.1f} ms] {entry['sql']}")
+            lines.extend(f"    {step}" for step in entry["plan"])
+            lines.append("")
+        self.slow_log_view.setPlainText("\n".join(lines) if lines else "Keine langsamen Abfragen aufgezeichnet.")
+
+    def enable_profiling(self):
+        self.db_manager.enable_profiling(SettingsManager().get_slow_query_ms())
+        self.refresh()
+
+    def reset(self):
+        if self.db_manager.profiler is not None: self.db_manager.profiler.reset()
+        self.refresh()
+
+    def save_json(self):
+        if self.db_manager.profiler is None: return
+        path, _ = QFileDialog.getSaveFileName(self, "Messwerte speichern", "query_profile.json", "JSON-Dateien (*.json)")
+        if not path: return
+        try:
+            self.db_manager.profiler.dump_json(path)
+            QMessageBox.information(self, "Gespeichert", f"Die Messwerte wurden gespeichert:\n{path}")
+        except OSError as e:
+            QMessageBox.critical(self, "Fehler", f"Die Datei konnte nicht gespeichert werden:\n{e}")
@@ -10,6 +10,7 @@ from PyQt5.QtWidgets import (
     QFormLayout,
     QLineEdit,
     QTextEdit,
+    QSpinBox,
     QDialogButtonBox,
     QMessageBox,
 )
@@ -50,6 +51,14 @@ class DutyTypeDialog(QDialog):
 
         form_layout.addRow("Name*:", self.name_input)
         form_layout.addRow("Beschreibung:", self.description_input)
+
+        # Jugendschutz: 0 = keine Altersgrenze
+        self.min_age_spin = QSpinBox()
+        self.min_age_spin.setRange(0, 99)
+        self.min_age_spin.setSpecialValueText("keins")
+        self.min_age_spin.setSuffix(" Jahre")
+        self.min_age_spin.setToolTip("Jüngere Helfer werden bei der Planung nicht eingeteilt und bei der Auswahl markiert.")
+        form_layout.addRow("Mindestalter:", self.min_age_spin)
         main_layout.addLayout(form_layout)
 
         button_box = QDialogButtonBox(
@@ -67,6 +76,7 @@ class DutyTypeDialog(QDialog):
         if duty_type:
             self.name_input.setText(duty_type["name"])
             self.description_input.setPlainText(duty_type["description"])
+            self.min_age_spin.setValue(duty_type["min_age"] or 0)
             
             # NEU: Wenn geschützt, Namensfeld sperren
             if duty_type["is_protected"]:
@@ -78,6 +88,7 @@ class DutyTypeDialog(QDialog):
         """Validiert und speichert die Daten."""
         name = self.name_input.text().strip()
         description = self.description_input.toPlainText().strip()
+        min_age = self.min_age_spin.value()
 
         if not name:
             QMessageBox.warning(
@@ -86,10 +97,10 @@ class DutyTypeDialog(QDialog):
             return
 
         if self.duty_type_id is None:
-            self.db_manager.add_duty_type(name, description)
+            self.db_manager.add_duty_type(name, description, min_age)
         else:
             # Update aufrufen (DB-Manager kümmert sich darum, dass Name bei geschützten ignoriert wird)
-            self.db_manager.update_duty_type(self.duty_type_id, name, description)
+            self.db_manager.update_duty_type(self.duty_type_id, name, description, min_age)
 
         self.data_changed.emit()
         super().accept()
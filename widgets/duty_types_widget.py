@@ -42,9 +42,9 @@ class DutyTypesWidget(QWidget):
         layout.addWidget(title_label)
 
         self.duty_types_table = QTableWidget()
-        self.duty_types_table.setColumnCount(3)
+        self.duty_types_table.setColumnCount(4)
         self.duty_types_table.setHorizontalHeaderLabels(
-            ["ID", "Name", "Beschreibung"]
+            ["ID", "Name", "Beschreibung", "Mindestalter"]
         )
         self.duty_types_table.setSelectionBehavior(
             QAbstractItemView.SelectRows
@@ -104,6 +104,9 @@ class DutyTypesWidget(QWidget):
             self.duty_types_table.setItem(
                 row_idx, 2, QTableWidgetItem(duty_type["description"])
             )
+            min_age_item = QTableWidgetItem(str(duty_type["min_age"]) if duty_type["min_age"] else "–")
+            min_age_item.setTextAlignment(Qt.AlignCenter)
+            self.duty_types_table.setItem(row_idx, 3, min_age_item)
         self.update_button_states()
 
     def update_button_states(self):
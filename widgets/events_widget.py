@@ -34,16 +34,8 @@ class EventsWidget(QWidget):
         self.settings = settings # Speichern
         self._init_ui()
         self.load_events_data()
-        
-        # NEU: Letztes Event wiederherstellen
-        last_id = self.settings.get_last_event_id()
-        if last_id != -1:
-            # Wir nutzen QTimer, damit die UI erst fertig aufgebaut ist
-            from PyQt5.QtCore import QTimer
-            QTimer.singleShot(100, lambda: self.set_current_event(last_id))
-            # Auch das Signal senden, damit andere Widgets Bescheid wissen
-            QTimer.singleShot(150, lambda: self.event_selection_changed.emit(last_id))
-            
+        # Das letzte Event stellt das Hauptfenster wieder her (Seiten werden erst bei Bedarf gebaut)
+
     def _init_ui(self):
         """Erstellt die Benutzeroberfläche für dieses Widget."""
         layout = QVBoxLayout(self)
@@ -4,7 +4,6 @@ widgets/import_dialog.py
 
 Dialog für den schrittweisen Import von Mitgliedern aus einer Datei.
 """
-import pandas as pd
 from PyQt5.QtWidgets import (
     QDialog,
     QVBoxLayout,
@@ -94,6 +93,7 @@ class ImportDialog(QDialog):
             return
 
         try:
+            import pandas as pd  # erst beim Einlesen laden
             if file_path.endswith(".xlsx"):
                 self.df = pd.read_excel(file_path)
             else:
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+widgets/joint_planning_dialog.py
+
+Auswahl mehrerer Events für eine gemeinsame Planung (z. B. Turnier und Fest am
+selben Wochenende). Vorausgewählt sind die Events, die sich zeitlich mit dem
+aktuellen Event überschneiden; über einen Zeitraum lassen sich weitere wählen.
+"""
+from PyQt5.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QComboBox,
+    QListWidget,
+    QListWidgetItem,
+    QDateEdit,
+    QDialogButtonBox,
+    QMessageBox,
+)
+from PyQt5.QtCore import Qt, QDate
+
+
+class JointPlanningDialog(QDialog):
+    """Liefert nach exec_() die gewählten Events (event_ids) und die Malus-Basis (limit)."""
+
+    LIMIT_OPTIONS = [("Alle Dienste", None), ("Letzter Dienst", 1), ("Letzte 2 Dienste", 2), ("Letzte 3 Dienste", 3), ("Letzte 4 Dienste", 4)]
+
+    def __init__(self, parent, db_manager, event_id):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.event_ids = []
+        self.limit = None
+        self.setWindowTitle("Events gemeinsam planen")
+        self.setMinimumSize(520, 420)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Die gewählten Events werden in einem Durchlauf geplant. Niemand wird zeitgleich in zwei Events eingeteilt;\nbestehende Zuweisungen in anderen Events bleiben unverändert und gelten als belegt."))
+
+        event = db_manager.get_event_by_id(event_id)
+        start = QDate.fromString(event["start_date"], "yyyy-MM-dd") if event else QDate.currentDate()
+        end = QDate.fromString(event["end_date"] or event["start_date"], "yyyy-MM-dd") if event else start
+        range_row = QHBoxLayout()
+        range_row.addWidget(QLabel("Zeitraum von:"))
+        self.from_edit = QDateEdit(start)
+        self.from_edit.setCalendarPopup(True)
+        self.from_edit.setDisplayFormat("dd.MM.yyyy")
+        range_row.addWidget(self.from_edit)
+        range_row.addWidget(QLabel("bis:"))
+        self.to_edit = QDateEdit(end)
+        self.to_edit.setCalendarPopup(True)
+        self.to_edit.setDisplayFormat("dd.MM.yyyy")
+        range_row.addWidget(self.to_edit)
+        range_button = QPushButton("Events im Zeitraum wählen")
+        range_button.clicked.connect(self._select_range)
+        range_row.addWidget(range_button)
+        layout.addLayout(range_row)
+
+        self.event_list = QListWidget()
+        for e in db_manager.get_all_events():
+            item = QListWidgetItem(f"{e['name']} ({e['start_date']}{' – ' + e['end_date'] if e['end_date'] else ''}, {e['status']})")
+            item.setData(Qt.UserRole, e["event_id"])
+            editable = e["status"] not in ("Abgeschlossen", "Abgesagt")
+            item.setFlags((item.flags() | Qt.ItemIsUserCheckable) if editable else (item.flags() & ~Qt.ItemIsEnabled))
+            item.setCheckState(Qt.Unchecked)
+            self.event_list.addItem(item)
+        layout.addWidget(self.event_list, 1)
+        self._check_events({e["event_id"] for e in db_manager.get_overlapping_events(event_id)})
+
+        limit_row = QHBoxLayout()
+        limit_row.addWidget(QLabel("Malus-Basis:"))
+        self.limit_combo = QComboBox()
+        for label, value in self.LIMIT_OPTIONS: self.limit_combo.addItem(label, value)
+        limit_row.addWidget(self.limit_combo)
+        limit_row.addStretch()
+        layout.addLayout(limit_row)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.button(QDialogButtonBox.Ok).setText("Gemeinsam planen")
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def _check_events(self, event_ids):
+        for row in range(self.event_list.count()):
+            item = self.event_list.item(row)
+            if item.flags() & Qt.ItemIsEnabled:
+                item.setCheckState(Qt.Checked if item.data(Qt.UserRole) in event_ids else Qt.Unchecked)
+
+    def _select_range(self):
+        start, end = self.from_edit.date().toString("yyyy-MM-dd"), self.to_edit.date().toString("yyyy-MM-dd")
+        self._check_events({e["event_id"] for e in self.db_manager.get_events_in_range(start, end)})
+
+    def accept(self):
+        self.event_ids = [self.event_list.item(row).data(Qt.UserRole) for row in range(self.event_list.count()) if self.event_list.item(row).checkState() == Qt.Checked]
+        if not self.event_ids:
+            QMessageBox.warning(self, "Keine Events", "Bitte mindestens ein Event auswählen.")
+            return
+        self.limit = self.limit_combo.currentData()
+        super().accept()
@@ -21,8 +21,11 @@ from PyQt5.QtWidgets import (
     QHeaderView,
     QWidget,
     QHBoxLayout,
+    QDateTimeEdit,
+    QPushButton,
+    QAbstractItemView,
 )
-from PyQt5.QtCore import QDate, pyqtSignal, Qt
+from PyQt5.QtCore import QDate, QDateTime, QTime, pyqtSignal, Qt
 
 
 class PersonDialog(QDialog):
@@ -134,6 +137,30 @@ class PersonDialog(QDialog):
 
         main_layout.addLayout(skills_layout)
 
+        # --- Box für Abwesenheiten ---
+        absence_groupbox = QGroupBox("Abwesenheiten (wird bei Auswahl und Planung nicht eingeteilt)")
+        absence_layout = QVBoxLayout()
+        self.absence_table = QTableWidget(0, 3)
+        self.absence_table.setHorizontalHeaderLabels(["Von", "Bis", "Grund"])
+        self.absence_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.absence_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        self.absence_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.absence_table.verticalHeader().setVisible(False)
+        self.absence_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.absence_table.setFixedHeight(130)
+        absence_layout.addWidget(self.absence_table)
+        absence_buttons = QHBoxLayout()
+        add_absence_button = QPushButton("Abwesenheit hinzufügen")
+        remove_absence_button = QPushButton("Abwesenheit entfernen")
+        add_absence_button.clicked.connect(lambda: self._add_absence_row())
+        remove_absence_button.clicked.connect(self._remove_absence_row)
+        absence_buttons.addWidget(add_absence_button)
+        absence_buttons.addWidget(remove_absence_button)
+        absence_buttons.addStretch()
+        absence_layout.addLayout(absence_buttons)
+        absence_groupbox.setLayout(absence_layout)
+        main_layout.addWidget(absence_groupbox)
+
         self._populate_duties()
 
         # --- Buttons ---
@@ -187,6 +214,37 @@ class PersonDialog(QDialog):
         
         self.restrictions_layout.addStretch()
 
+    def _add_absence_row(self, start=None, end=None, reason=""):
+        """Neue Zeile; ohne Angaben ganztägig ab heute."""
+        today = QDate.currentDate()
+        start = start or QDateTime(today, QTime(0, 0))
+        end = end or QDateTime(today, QTime(23, 59))
+        row = self.absence_table.rowCount()
+        self.absence_table.insertRow(row)
+        for col, value in ((0, start), (1, end)):
+            edit = QDateTimeEdit(value, calendarPopup=True)
+            edit.setDisplayFormat("dd.MM.yyyy HH:mm")
+            self.absence_table.setCellWidget(row, col, edit)
+        self.absence_table.setItem(row, 2, QTableWidgetItem(reason))
+
+    def _remove_absence_row(self):
+        row = self.absence_table.currentRow()
+        if row >= 0: self.absence_table.removeRow(row)
+
+    def _absence_periods(self):
+        """[(start_date, start_time, end_date, end_time, reason), ...] aus der Tabelle."""
+        periods = []
+        for row in range(self.absence_table.rowCount()):
+            start = self.absence_table.cellWidget(row, 0).dateTime()
+            end = self.absence_table.cellWidget(row, 1).dateTime()
+            reason_item = self.absence_table.item(row, 2)
+            periods.append((
+                start.toString("yyyy-MM-dd"), start.toString("HH:mm"),
+                end.toString("yyyy-MM-dd"), end.toString("HH:mm"),
+                reason_item.text().strip() if reason_item else "",
+            ))
+        return periods
+
     def _load_person_data(self):
         person = self.db_manager.get_person_by_id(self.person_id)
         if not person:
@@ -226,6 +284,13 @@ class PersonDialog(QDialog):
             if cb_r.property("duty_type_id") in restrictions:
                 cb_r.setChecked(True)
 
+        for period in self.db_manager.get_person_unavailability(self.person_id):
+            self._add_absence_row(
+                QDateTime.fromString(f"{period['start_date']} {period['start_time']}", "yyyy-MM-dd HH:mm"),
+                QDateTime.fromString(f"{period['end_date']} {period['end_time']}", "yyyy-MM-dd HH:mm"),
+                period["reason"] or "",
+            )
+
     def _update_all_states(self):
         """Zentrale Logik-Funktion, die alle Abhängigkeiten prüft und UI-Elemente (de)aktiviert."""
         checked_restrictions = [
@@ -288,6 +353,15 @@ class PersonDialog(QDialog):
             "notes": self.notes_input.toPlainText().strip(),
         }
 
+        absence_periods = self._absence_periods()
+        if any((p[2], p[3]) <= (p[0], p[1]) for p in absence_periods):
+            QMessageBox.warning(
+                self,
+                "Ungültige Abwesenheit",
+                "Bei jeder Abwesenheit muss das Ende nach dem Beginn liegen.",
+            )
+            return
+
         selected_restriction_ids = [
             cb.property("duty_type_id")
             for cb in self.duty_type_checkboxes
@@ -301,12 +375,15 @@ class PersonDialog(QDialog):
 
         if self.person_id is None:
             new_id = self.db_manager.add_person(**person_data)
+            self.person_id = new_id
             self.db_manager.set_person_restrictions(
                 new_id, selected_restriction_ids
             )
             self.db_manager.set_person_competencies(
                 new_id, selected_competencies
             )
+            if not self.db_manager.set_person_unavailability(new_id, absence_periods):
+                QMessageBox.critical(self, "Fehler", "Die Abwesenheiten konnten nicht gespeichert werden.")
         else:
             self.db_manager.update_person(self.person_id, **person_data)
             self.db_manager.set_person_restrictions(
@@ -315,6 +392,8 @@ class PersonDialog(QDialog):
             self.db_manager.set_person_competencies(
                 self.person_id, selected_competencies
             )
+            if not self.db_manager.set_person_unavailability(self.person_id, absence_periods):
+                QMessageBox.critical(self, "Fehler", "Die Abwesenheiten konnten nicht gespeichert werden.")
 
         self.data_changed.emit()
         super().accept()
\ No newline at end of file
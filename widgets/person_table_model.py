@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+widgets/person_table_model.py
+
+Tabellenmodell für die Mitglieder-Stammdaten.
+Die Werte liegen spaltenweise in einfachen Listen (eine Liste je Datenbankspalte)
+statt als ein QTableWidgetItem pro Zelle. Datumswerte werden erst in data() und
+nur für tatsächlich angezeigte Zellen ins deutsche Format gebracht; sortiert wird
+über einen QSortFilterProxyModel anhand der Rohwerte (SORT_ROLE), gefiltert über
+die Ergebnis-IDs der Personensuche (PersonFilterProxy).
+"""
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+
+# Anzeigename -> Datenbankspalte, in Anzeigereihenfolge (Spalte 0 = ID, wird ausgeblendet)
+PERSON_COLUMNS = [
+    ("ID", "person_id"), ("Status", "status"), ("Vorname", "first_name"),
+    ("Nachname", "last_name"), ("Anzeigename", "display_name"),
+    ("Geburtsdatum", "birth_date"), ("Straße", "street"), ("PLZ", "postal_code"),
+    ("Ort", "city"), ("E-Mail", "email"), ("Telefon 1", "phone1"),
+    ("Telefon 2", "phone2"), ("Eintritt", "entry_date"), ("Austritt", "exit_date"),
+    ("Notizen", "notes"),
+]
+DATE_COLUMNS = {"birth_date", "entry_date", "exit_date"}
+SORT_ROLE = Qt.UserRole
+
+
+def format_date(value):
+    """'YYYY-MM-DD' -> 'DD.MM.YYYY'; andere Werte bleiben unverändert."""
+    if not value: return ""
+    if len(value) == 10 and value[4] == "-" and value[7] == "-": return f"{value[8:10]}.{value[5:7]}.{value[0:4]}"
+    return value
+
+
+class PersonTableModel(QAbstractTableModel):
+    """Spaltenweise gespeicherte Personendaten; einzelne Zeilen lassen sich gezielt nachladen."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.headers = [name for name, _ in PERSON_COLUMNS]
+        self.keys = [key for _, key in PERSON_COLUMNS]
+        self.date_cols = {col for col, key in enumerate(self.keys) if key in DATE_COLUMNS}
+        self.columns = [[] for _ in self.keys]
+        self.row_of = {}   # person_id -> Zeile
+
+    # --- Qt-Schnittstelle ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns[0])
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.keys)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole: return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        value = self.columns[index.column()][index.row()]
+        if role == Qt.DisplayRole:
+            if index.column() in self.date_cols: return format_date(value)
+            return "" if value is None else str(value)
+        if role == SORT_ROLE:
+            # Rohwerte: ISO-Datum und Zahlen sortieren so korrekt, None landet vorne
+            return "" if value is None else value
+        return None
+
+    # --- Befüllen ---
+    def load(self, persons):
+        """Ersetzt den gesamten Inhalt durch die übergebenen Datenbankzeilen."""
+        self.beginResetModel()
+        self.columns = [[p[key] for p in persons] for key in self.keys]
+        self.row_of = {pid: row for row, pid in enumerate(self.columns[0])}
+        self.endResetModel()
+
+    def person_id(self, row):
+        return self.columns[0][row]
+
+    def value(self, row, key):
+        return self.columns[self.keys.index(key)][row]
+
+    def update_person(self, person):
+        """Aktualisiert die Zeile einer Person oder hängt sie neu an."""
+        row = self.row_of.get(person["person_id"])
+        if row is None:
+            row = self.rowCount()
+            self.beginInsertRows(QModelIndex(), row, row)
+            for col, key in enumerate(self.keys): self.columns[col].append(person[key])
+            self.row_of[person["person_id"]] = row
+            self.endInsertRows()
+            return
+        for col, key in enumerate(self.keys): self.columns[col][row] = person[key]
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.keys) - 1))
+
+    def remove_person(self, person_id):
+        row = self.row_of.get(person_id)
+        if row is None: return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        for column in self.columns: del column[row]
+        self.row_of = {pid: r for r, pid in enumerate(self.columns[0])}
+        self.endRemoveRows()
+
+
+class PersonFilterProxy(QSortFilterProxyModel):
+    """Sortiert nach Rohwerten und zeigt nur Personen aus der letzten Suche (None = alle)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.person_ids = None
+        self.setSortRole(SORT_ROLE)
+        self.setSortCaseSensitivity(Qt.CaseInsensitive)
+        self.setDynamicSortFilter(True)
+
+    def set_person_ids(self, person_ids):
+        self.person_ids = person_ids
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self.person_ids is None or self.sourceModel().person_id(source_row) in self.person_ids
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+widgets/plan_draft_dialog.py
+
+Was-wäre-wenn-Sandbox: Planungsalternativen in einem Entwurf ausprobieren
+(Personen ausfallen lassen, Vorschlag mit anderer Malus-Basis erstellen),
+Änderungen und Prüfergebnis ansehen und den Entwurf übernehmen oder verwerfen.
+"""
+from PyQt5.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QComboBox,
+    QListWidget,
+    QListWidgetItem,
+    QGroupBox,
+    QMessageBox,
+    QApplication,
+)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QBrush, QColor
+
+from utils.plan_validator import SEVERITY_ERROR
+
+
+class PlanDraftDialog(QDialog):
+    """Dialog für einen PlanDraft."""
+
+    LIMIT_OPTIONS = [("Alle Dienste", None), ("Letzter Dienst", 1), ("Letzte 2 Dienste", 2), ("Letzte 3 Dienste", 3), ("Letzte 4 Dienste", 4)]
+
+    def __init__(self, parent, db_manager, settings, event_id):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.settings = settings
+        self.draft = db_manager.create_plan_draft(event_id)
+        self.person_names = {p["person_id"]: p["display_name"] for p in db_manager.get_all_persons()}
+        self.committed = False
+
+        self.setWindowTitle("Was-wäre-wenn: Planungsentwurf")
+        self.setMinimumSize(1000, 650)
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Änderungen in diesem Fenster betreffen nur den Entwurf. Der aktuelle Plan bleibt unverändert, bis Sie 'Entwurf übernehmen' wählen."))
+
+        # --- Ausfälle ---
+        absence_box = QGroupBox("Ausfälle")
+        absence_layout = QVBoxLayout(absence_box)
+        absence_row = QHBoxLayout()
+        self.person_combo = QComboBox()
+        for p in db_manager.get_all_persons():
+            if p["status"] in ("Aktiv", "Passiv"): self.person_combo.addItem(p["display_name"], p["person_id"])
+        self.date_combo = QComboBox()
+        self.date_combo.addItem("Alle Tage", None)
+        for date in self.draft.shift_dates(): self.date_combo.addItem(date, date)
+        exclude_button = QPushButton("Fällt aus")
+        exclude_button.clicked.connect(self._exclude_person)
+        absence_row.addWidget(QLabel("Person:"))
+        absence_row.addWidget(self.person_combo, 1)
+        absence_row.addWidget(QLabel("Tag:"))
+        absence_row.addWidget(self.date_combo)
+        absence_row.addWidget(exclude_button)
+        absence_layout.addLayout(absence_row)
+        self.absence_list = QListWidget()
+        self.absence_list.setMaximumHeight(80)
+        self.absence_list.itemDoubleClicked.connect(self._include_person)
+        self.absence_list.setToolTip("Doppelklick hebt den Ausfall wieder auf.")
+        absence_layout.addWidget(self.absence_list)
+        layout.addWidget(absence_box)
+
+        # --- Planer ---
+        planner_row = QHBoxLayout()
+        planner_row.addWidget(QLabel("Malus-Basis:"))
+        self.limit_combo = QComboBox()
+        for label, value in self.LIMIT_OPTIONS: self.limit_combo.addItem(label, value)
+        planner_row.addWidget(self.limit_combo)
+        plan_button = QPushButton("Vorschlag im Entwurf erstellen")
+        plan_button.clicked.connect(self._run_planner)
+        clear_button = QPushButton("Entwurf leeren")
+        clear_button.clicked.connect(self._clear_draft)
+        reset_button = QPushButton("Auf aktuellen Plan zurücksetzen")
+        reset_button.clicked.connect(self._reset_draft)
+        planner_row.addStretch()
+        planner_row.addWidget(plan_button)
+        planner_row.addWidget(clear_button)
+        planner_row.addWidget(reset_button)
+        layout.addLayout(planner_row)
+
+        # --- Ergebnis ---
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+        result_row = QHBoxLayout()
+        diff_box = QGroupBox("Änderungen gegenüber dem aktuellen Plan")
+        diff_layout = QVBoxLayout(diff_box)
+        self.diff_list = QListWidget()
+        diff_layout.addWidget(self.diff_list)
+        result_row.addWidget(diff_box)
+        check_box = QGroupBox("Prüfung des Entwurfs")
+        check_layout = QVBoxLayout(check_box)
+        self.violation_list = QListWidget()
+        check_layout.addWidget(self.violation_list)
+        result_row.addWidget(check_box)
+        layout.addLayout(result_row, 1)
+
+        button_row = QHBoxLayout()
+        button_row.addStretch()
+        commit_button = QPushButton("Entwurf übernehmen")
+        commit_button.setStyleSheet("font-weight: bold;")
+        commit_button.clicked.connect(self._commit)
+        discard_button = QPushButton("Verwerfen")
+        discard_button.clicked.connect(self.reject)
+        button_row.addWidget(commit_button)
+        button_row.addWidget(discard_button)
+        layout.addLayout(button_row)
+
+        self._refresh()
+
+    def _refresh(self):
+        required, assigned = self.draft.staffing()
+        added, removed = self.draft.diff()
+        violations = self.draft.validate()
+        errors = sum(1 for v in violations if v.severity == SEVERITY_ERROR)
+        self.summary_label.setText(f"<b>Entwurf:</b> {assigned} von {required} Plätzen besetzt, {len(added)} neue und {len(removed)} entfernte Zuweisungen, {errors} Fehler, {len(violations) - errors} Warnungen.")
+
+        self.diff_list.clear()
+        for sign, color, pairs in (("+", "darkgreen", added), ("−", "darkred", removed)):
+            for pid, sid in sorted(pairs, key=lambda x: (self.draft.shifts[x[1]]["label"], self.person_names.get(x[0], ""))):
+                item = QListWidgetItem(f"{sign} {self.person_names.get(pid, pid)}: {self.draft.shifts[sid]['label']}")
+                item.setForeground(QBrush(QColor(color)))
+                self.diff_list.addItem(item)
+
+        self.violation_list.clear()
+        for v in violations: self.violation_list.addItem(v.message)
+
+        self.absence_list.clear()
+        for pid, date in sorted(self.draft.unavailable, key=lambda x: (self.person_names.get(x[0], ""), x[1] or "")):
+            item = QListWidgetItem(f"{self.person_names.get(pid, pid)} – {date or 'alle Tage'}")
+            item.setData(Qt.UserRole, (pid, date))
+            self.absence_list.addItem(item)
+
+    def _exclude_person(self):
+        pid = self.person_combo.currentData()
+        if pid is None: return
+        self.draft.exclude_person(pid, self.date_combo.currentData())
+        self._refresh()
+
+    def _include_person(self, item):
+        pid, date = item.data(Qt.UserRole)
+        self.draft.include_person(pid, date)
+        self._refresh()
+
+    def _run_planner(self):
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            result = self.draft.run_planner(limit=self.limit_combo.currentData(), restarts=self.settings.get_planning_restarts(), workers=self.settings.get_planning_workers())
+        finally:
+            QApplication.restoreOverrideCursor()
+        self._refresh()
+        QMessageBox.information(self, "Vorschlag im Entwurf", f"{len(result.assignments)} Zuweisungen ergänzt (Seed {result.seed}).")
+
+    def _clear_draft(self):
+        self.draft.clear()
+        self._refresh()
+
+    def _reset_draft(self):
+        self.draft.reset()
+        self._refresh()
+
+    def _commit(self):
+        added, removed = self.draft.diff()
+        if not added and not removed:
+            self.reject()
+            return
+        text = f"{len(added)} Zuweisungen hinzufügen und {len(removed)} entfernen?"
+        if self.draft.has_conflicts():
+            text += "\n\nAchtung: Der aktuelle Plan wurde seit dem Anlegen des Entwurfs geändert. Diese Änderungen werden durch den Entwurf ersetzt."
+        if QMessageBox.question(self, "Entwurf übernehmen", text, QMessageBox.Yes | QMessageBox.No) != QMessageBox.Yes: return
+        if self.db_manager.commit_plan_draft(self.draft):
+            self.committed = True
+            self.accept()
+        else:
+            QMessageBox.critical(self, "Fehler", "Der Entwurf konnte nicht übernommen werden. Der aktuelle Plan ist unverändert.")
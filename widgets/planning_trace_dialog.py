@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+widgets/planning_trace_dialog.py
+
+Dialog "Vorschlag erklären": zeigt das Entscheidungsprotokoll eines
+Planungsvorschlags (Kandidaten, Punkt-Bestandteile, Wahl, Gründe für leere Plätze).
+"""
+from PyQt5.QtWidgets import (
+    QDialog,
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QSplitter,
+    QCheckBox,
+    QFileDialog,
+    QMessageBox,
+)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QBrush, QColor
+
+from utils.planning_trace import PlanningTrace, COMPONENT_LABELS, PHASE_TEAM_LEADER
+
+
+class PlanningTraceDialog(QDialog):
+    """Zeigt ein PlanningTrace an."""
+
+    def __init__(self, parent, trace=None):
+        super().__init__(parent)
+        self.trace = trace
+        self.setWindowTitle("Planungsvorschlag erklären")
+        self.setMinimumSize(1000, 600)
+
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        self.only_empty_check = QCheckBox("Nur leer gebliebene Plätze anzeigen")
+        self.only_empty_check.toggled.connect(self._populate)
+        layout.addWidget(self.only_empty_check)
+
+        splitter = QSplitter(Qt.Horizontal)
+        self.decision_tree = QTreeWidget()
+        self.decision_tree.setHeaderLabels(["Schicht", "Ergebnis"])
+        self.decision_tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.decision_tree.currentItemChanged.connect(self._show_decision)
+        splitter.addWidget(self.decision_tree)
+
+        detail_panel = QVBoxLayout()
+        detail_widget = QWidget()
+        detail_widget.setLayout(detail_panel)
+        self.detail_label = QLabel()
+        self.detail_label.setWordWrap(True)
+        detail_panel.addWidget(self.detail_label)
+        columns = ["Name", "Punkte"] + list(COMPONENT_LABELS.values()) + ["Ausschluss"]
+        self.candidate_table = QTableWidget(0, len(columns))
+        self.candidate_table.setHorizontalHeaderLabels(columns)
+        self.candidate_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.candidate_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        detail_panel.addWidget(self.candidate_table)
+        splitter.addWidget(detail_widget)
+        splitter.setSizes([350, 650])
+        layout.addWidget(splitter)
+
+        button_layout = QHBoxLayout()
+        open_button = QPushButton("Protokoll öffnen...")
+        open_button.clicked.connect(self._open_file)
+        close_button = QPushButton("Schließen")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(open_button)
+        button_layout.addStretch()
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self._populate()
+
+    def _populate(self):
+        self.decision_tree.clear()
+        self.candidate_table.setRowCount(0)
+        self.detail_label.clear()
+        if self.trace is None:
+            self.summary_label.setText("Es liegt kein Entscheidungsprotokoll vor. Aktivieren Sie in den Einstellungen unter 'Diagnose' die Protokollierung, erstellen Sie einen Planungsvorschlag oder öffnen Sie ein gespeichertes Protokoll.")
+            return
+
+        phases = ", ".join(f"{p['phase']}: {p['ms']:.0f} ms" for p in self.trace.phases)
+        empty, no_tl = len(self.trace.empty_slots()), len(self.trace.shifts_without_team_leader())
+        text = f"Event {self.trace.event_id}, erstellt {self.trace.created}: {len(self.trace.decisions)} Entscheidungen, {empty} Plätze leer geblieben, {no_tl} Schichten ohne Teamleiter."
+        if phases: text += f"<br>Laufzeiten: {phases}"
+        if self.trace.path: text += f"<br>Datei: {self.trace.path}"
+        self.summary_label.setText(text)
+
+        only_empty = self.only_empty_check.isChecked()
+        phase_items = {}
+        for decision in self.trace.decisions:
+            if only_empty and decision["chosen"] is not None: continue
+            parent = phase_items.get(decision["phase"])
+            if parent is None:
+                parent = phase_items[decision["phase"]] = QTreeWidgetItem(self.decision_tree, [decision["phase"], ""])
+                parent.setExpanded(True)
+            if decision["chosen"]: result = decision["chosen"]["name"]
+            else: result = "kein Teamleiter" if decision["phase"] == PHASE_TEAM_LEADER else "leer"
+            item = QTreeWidgetItem(parent, [decision["shift"], result])
+            item.setData(0, Qt.UserRole, decision)
+            if decision["chosen"] is None: item.setForeground(1, QBrush(QColor("red")))
+
+    def _show_decision(self, current, previous):
+        self.candidate_table.setRowCount(0)
+        decision = current.data(0, Qt.UserRole) if current else None
+        if not decision:
+            self.detail_label.clear()
+            return
+
+        lines = [f"<b>{decision['shift']}</b> ({decision['phase']})", f"Kandidaten im Pool: {decision['pool_size']}"]
+        if decision["chosen"]: lines.append(f"Gewählt: {decision['chosen']['name']} (zufällig aus {len(decision['top_tier'])} in der Spitzengruppe)")
+        if decision["reason"]: lines.append(f"Nicht besetzt: {decision['reason']}")
+        self.detail_label.setText("<br>".join(lines))
+
+        top_tier = set(decision["top_tier"])
+        chosen_id = decision["chosen"]["person_id"] if decision["chosen"] else None
+        self.candidate_table.setRowCount(len(decision["candidates"]))
+        for row, candidate in enumerate(decision["candidates"]):
+            components = candidate.get("components") or {}
+            values = [candidate["name"], candidate["score"]] + [components.get(key, "") for key in COMPONENT_LABELS] + [components.get("excluded", "")]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                if col > 0: item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                if candidate["person_id"] == chosen_id: item.setBackground(QBrush(QColor("#c8e6c9")))
+                elif candidate["person_id"] in top_tier: item.setBackground(QBrush(QColor("#fff9c4")))
+                self.candidate_table.setItem(row, col, item)
+
+    def _open_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Planungsprotokoll öffnen", "", "Planungsprotokolle (*.jsonl)")
+        if not path: return
+        try:
+            self.trace = PlanningTrace.load_jsonl(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Fehler", f"Das Protokoll konnte nicht gelesen werden:\n{e}")
+            return
+        self._populate()
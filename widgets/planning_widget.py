@@ -16,7 +16,10 @@ from .shift_details_widget import ShiftDetailsWidget
 from .task_from_template_dialog import TaskFromTemplateDialog
 from .task_dialog import TaskDialog
 from .export_dialog import ExportDialog
+from .planning_worker import PlanningWorker, PlanningProgressDialog
+from .backup_worker import BackupWorker, BackupProgressDialog
 from utils.exporter import Exporter
+from utils.backup_manager import REASON_PLANNING
 
 class PlanningWidget(QWidget):
     plan_changed = pyqtSignal(int, str)
@@ -50,6 +53,9 @@ class PlanningWidget(QWidget):
             self.event_combobox.setMinimumWidth(300)
             top_bar_layout.addWidget(self.event_combobox)
             top_bar_layout.addStretch()
+            self.heatmap_button = QPushButton("Besetzung je Tag...")
+            self.heatmap_button.setToolTip("Übersicht über alle offenen Events: besetzte und offene Plätze je Tag.")
+            top_bar_layout.addWidget(self.heatmap_button)
             self.export_button = QPushButton("Dienstplan exportieren")
             top_bar_layout.addWidget(self.export_button)
             main_layout.addLayout(top_bar_layout)
@@ -60,6 +66,12 @@ class PlanningWidget(QWidget):
             self.proposal_limit_combo = QComboBox()
             self.proposal_limit_combo.addItems(["Alle Dienste", "Letzter Dienst", "Letzte 2 Dienste", "Letzte 3 Dienste", "Letzte 4 Dienste"])
             proposal_layout.addWidget(self.proposal_limit_combo)
+            proposal_layout.addWidget(QLabel("Nachoptimierung:"))
+            self.improve_combo = QComboBox()
+            for label, seconds in (("Aus", 0), ("2 Sekunden", 2), ("5 Sekunden", 5), ("10 Sekunden", 10), ("30 Sekunden", 30)):
+                self.improve_combo.addItem(label, seconds)
+            self.improve_combo.setToolTip("Verbessert den Vorschlag anschließend durch Tauschen und Verschieben\n(Fairness, Pausen, offene Plätze, Teamleiter).")
+            proposal_layout.addWidget(self.improve_combo)
             proposal_layout.addStretch(1)
             
             self.proposal_button = QPushButton("Automatischen Planungsvorschlag erstellen")
@@ -72,6 +84,18 @@ class PlanningWidget(QWidget):
             
             self.reset_proposal_button = QPushButton("Planung zurücksetzen")
             proposal_layout.addWidget(self.reset_proposal_button)
+
+            self.draft_button = QPushButton("Was-wäre-wenn...")
+            self.draft_button.setToolTip("Planungsalternativen in einem Entwurf ausprobieren, ohne den aktuellen Plan zu ändern.")
+            proposal_layout.addWidget(self.draft_button)
+
+            self.joint_button = QPushButton("Gemeinsam planen...")
+            self.joint_button.setToolTip("Mehrere zeitlich überlappende Events in einem Durchlauf planen.")
+            proposal_layout.addWidget(self.joint_button)
+
+            self.explain_proposal_button = QPushButton("Vorschlag erklären...")
+            self.explain_proposal_button.setToolTip("Zeigt das Entscheidungsprotokoll des letzten Planungsvorschlags\n(Protokollierung in den Einstellungen unter 'Diagnose' aktivieren).")
+            proposal_layout.addWidget(self.explain_proposal_button)
             main_layout.addLayout(proposal_layout)
             
             # Trennlinie
@@ -93,7 +117,7 @@ class PlanningWidget(QWidget):
             # OPTIMIERUNG 1: Spaltenbreiten
             self.plan_tree.header().setSectionResizeMode(0, QHeaderView.Stretch) # Nimmt den ganzen Platz
             self.plan_tree.header().setSectionResizeMode(1, QHeaderView.Fixed)   # Fixe Breite
-            self.plan_tree.header().resizeSection(1, 50) # 50 Pixel für "[5/5]" reichen
+            self.plan_tree.header().resizeSection(1, 90) # "[5/5]" plus Live-Badge (z. B. "⚠ 2")
             
             left_panel.addWidget(self.plan_tree)
             
@@ -130,10 +154,14 @@ class PlanningWidget(QWidget):
             self.add_shift_button.clicked.connect(self._add_shift)
             self.edit_item_button.clicked.connect(self._edit_item)
             self.delete_item_button.clicked.connect(self._delete_item)
-            self.details_widget.data_changed.connect(self.update_plan_view)
+            self.details_widget.data_changed.connect(self._refresh_live_status)
             self.proposal_button.clicked.connect(self._generate_proposal)
             self.check_plan_button.clicked.connect(self._check_plan)
             self.reset_proposal_button.clicked.connect(self._reset_planning)
+            self.explain_proposal_button.clicked.connect(self._explain_proposal)
+            self.draft_button.clicked.connect(self._open_plan_draft)
+            self.joint_button.clicked.connect(self._open_joint_planning)
+            self.heatmap_button.clicked.connect(self._open_staffing_heatmap)
             self.export_button.clicked.connect(self._export_plan)
             
             self._update_button_states()
@@ -202,6 +230,7 @@ class PlanningWidget(QWidget):
         sorted_tasks = sorted(tasks, key=lambda t: task_sort_keys[t['task_id']])
         item_to_reselect = None
         light_red = QBrush(QColor(255, 220, 220))
+        engine = self.db_manager.get_constraint_engine(event_id)
         for task in sorted_tasks:
             task_item = QTreeWidgetItem(self.plan_tree)
             task_item.setText(0, task['name'])
@@ -211,17 +240,11 @@ class PlanningWidget(QWidget):
             shifts = self.db_manager.get_shifts_for_task(task['task_id'])
             sorted_shifts = sorted(shifts, key=lambda s: (s['shift_date'], s['start_time']))
             for shift in sorted_shifts:
-                assigned = shift['assigned_count']
-                required = shift['required_people']
-                status_text = f"[{assigned}/{required}]"
                 formatted_date = QDate.fromString(shift['shift_date'], "yyyy-MM-dd").toString("dd.MM.yyyy")
                 shift_item = QTreeWidgetItem(task_item)
                 shift_item.setText(0, f"Schicht: {formatted_date} {shift['start_time']} - {shift['end_time']}")
-                shift_item.setText(1, status_text)
                 shift_item.setData(0, Qt.UserRole, {'type': 'shift', 'id': shift['shift_id']})
-                if assigned < required:
-                    shift_item.setBackground(0, light_red)
-                    shift_item.setBackground(1, light_red)
+                self._apply_shift_badge(shift_item, engine, shift['shift_id'], shift['assigned_count'], shift['required_people'])
                 if selected_item_data and selected_item_data['type'] == 'shift' and selected_item_data['id'] == shift['shift_id']:
                     item_to_reselect = shift_item
         self.plan_tree.expandAll()
@@ -230,6 +253,38 @@ class PlanningWidget(QWidget):
         self._update_button_states()
         self._update_details_view()
 
+    def _apply_shift_badge(self, shift_item, engine, shift_id, assigned, required):
+        """Setzt Besetzung, Live-Badge und Tooltip eines Schicht-Eintrags."""
+        status_text = f"[{assigned}/{required}]"
+        violations = engine.violations_for_shift(shift_id)
+        if violations:
+            status_text += f" ⚠ {len(violations)}"
+            shift_item.setToolTip(0, "\n".join(v.message for v in violations))
+            shift_item.setToolTip(1, shift_item.toolTip(0))
+        else:
+            shift_item.setToolTip(0, "")
+            shift_item.setToolTip(1, "")
+        shift_item.setText(1, status_text)
+        brush = QBrush(QColor(255, 220, 220)) if assigned < required else QBrush()
+        shift_item.setBackground(0, brush)
+        shift_item.setBackground(1, brush)
+
+    def _refresh_live_status(self):
+        """Aktualisiert nach einer Zuweisungsänderung nur Badges und Statusleiste aus der Live-Prüfung."""
+        event_id = self.event_combobox.currentData()
+        if event_id == -1: return
+        engine = self.db_manager.get_constraint_engine(event_id)
+        root = self.plan_tree.invisibleRootItem()
+        for i in range(root.childCount()):
+            task_item = root.child(i)
+            for j in range(task_item.childCount()):
+                shift_item = task_item.child(j)
+                shift_id = shift_item.data(0, Qt.UserRole)['id']
+                shift = engine.model.shifts.get(shift_id)
+                if shift:
+                    self._apply_shift_badge(shift_item, engine, shift_id, len(engine.model.shift_persons.get(shift_id, [])), shift.required)
+        self.plan_changed.emit(event_id, self.event_combobox.currentText())
+
     def _update_button_states(self):
         selected_item = self.plan_tree.currentItem()
         event_id = self.event_combobox.currentData()
@@ -255,6 +310,8 @@ class PlanningWidget(QWidget):
         self.proposal_button.setEnabled(is_editable)
         self.check_plan_button.setEnabled(event_selected)
         self.reset_proposal_button.setEnabled(is_editable)
+        self.draft_button.setEnabled(is_editable)
+        self.joint_button.setEnabled(is_editable)
         self.export_button.setEnabled(event_selected)
         self.details_widget.set_editable(is_editable)
         self.add_shift_button.setEnabled(False)
@@ -360,10 +417,16 @@ class PlanningWidget(QWidget):
             )
             if confirm == QMessageBox.No:
                 return
-                
-            self.db_manager.clear_assignments_for_event(event_id)
-            
-        filled, total = self.db_manager.generate_planning_proposal(event_id, limit=limit)
+
+        # Schnappschuss erst nach der letzten Bestätigung, direkt vor dem ersten Schreiben
+        self._take_planning_snapshot()
+        # Bei "Alles LÖSCHEN" wird ohne den bestehenden Plan gerechnet und erst beim Speichern in derselben
+        # Transaktion ersetzt – ein Abbruch lässt den alten Plan stehen
+        result = self._run_planning_worker(event_id, limit, replace=msg.clickedButton() == btn_reset)
+        if result is None:
+            self.update_plan_view()
+            return
+        total, filled = self.db_manager.get_event_staffing_summary(event_id)
         
         self.plan_is_dirty = False
         self.update_plan_view()
@@ -371,9 +434,75 @@ class PlanningWidget(QWidget):
         info_text = f"Planung abgeschlossen.\nEs sind jetzt {filled} von {total} Plätzen besetzt."
         if msg.clickedButton() == btn_fill:
             info_text += "\n(Manuelle Zuweisungen wurden beibehalten)."
+        info_text += f"\n\nSeed des gewählten Durchlaufs: {result.seed}"
+        if result.improved_from is not None:
+            info_text += f"\nNachoptimierung: Zielwert {result.improved_from.cost:.1f} -> {result.cost:.1f}"
+        elif self.improve_combo.currentData():
+            info_text += f"\nNachoptimierung: keine Verbesserung gefunden (Zielwert {result.cost:.1f})."
             
         QMessageBox.information(self, "Erfolg", info_text)
 
+    def _take_planning_snapshot(self):
+        """Schnappschuss vor dem Planungslauf (rotierend, siehe Einstellungen)."""
+        if not self.settings.get_auto_snapshots(): return
+        snapshot = BackupProgressDialog(BackupWorker(self.db_manager.db_path, reason=REASON_PLANNING, keep=self.settings.get_snapshot_keep(), parent=self), self, "Schnappschuss vor der Planung")
+        snapshot.exec_()
+        if snapshot.error:
+            QMessageBox.warning(self, "Schnappschuss fehlgeschlagen", f"Vor der Planung konnte kein Schnappschuss angelegt werden:\n{snapshot.error}\n\nDie Planung wird trotzdem fortgesetzt.")
+
+    def _run_planning_worker(self, event_id, limit, label="Planungsvorschlag", replace=False):
+        """Berechnet im Hintergrund (eigene DB-Verbindung) und speichert hier im Hauptthread; None bei Abbruch/Fehler.
+        Mit replace=True ersetzt der Vorschlag beim Speichern alle bisherigen Zuweisungen des Events."""
+        worker = PlanningWorker(self.db_manager.db_path, event_id, self, limit=limit, trace=self.settings.get_planning_trace(), restarts=self.settings.get_planning_restarts(), workers=self.settings.get_planning_workers(), improve_seconds=self.improve_combo.currentData() or None, replace=replace)
+        progress_dialog = PlanningProgressDialog(worker, self)
+        accepted = progress_dialog.exec_() == QDialog.Accepted
+        if progress_dialog.error:
+            QMessageBox.critical(self, "Fehler", f"Der Planungsvorschlag konnte nicht berechnet werden:\n{progress_dialog.error}")
+        if not accepted: return None
+        result = progress_dialog.result
+        self.db_manager.last_planning_result = result
+        if progress_dialog.trace is not None: self.db_manager.last_planning_trace = progress_dialog.trace
+        if not self.db_manager.add_assignments(result.assignments, label, replace_event_id=event_id if replace else None):
+            QMessageBox.critical(self, "Fehler", "Der Planungsvorschlag konnte nicht gespeichert werden.\nDer bisherige Plan bleibt unverändert.")
+            return None
+        return result
+
+    def _open_joint_planning(self):
+        event_id = self.event_combobox.currentData()
+        if event_id == -1: return
+        from .joint_planning_dialog import JointPlanningDialog
+        dialog = JointPlanningDialog(self, self.db_manager, event_id)
+        if dialog.exec_() != QDialog.Accepted: return
+        self._take_planning_snapshot()
+        event_ids = dialog.event_ids[0] if len(dialog.event_ids) == 1 else dialog.event_ids
+        result = self._run_planning_worker(event_ids, dialog.limit, "Gemeinsamer Planungsvorschlag")
+        self.plan_is_dirty = False
+        self.update_plan_view()
+        if result is None: return
+        lines = []
+        rollup = self.db_manager.get_staffing_rollup(dialog.event_ids)
+        for eid in dialog.event_ids:
+            event = self.db_manager.get_event_by_id(eid)
+            total = rollup[eid]["total"]
+            lines.append(f"{event['name']}: {total['assigned']} von {total['required']} Plätzen besetzt")
+        QMessageBox.information(self, "Gemeinsame Planung abgeschlossen", "\n".join(lines) + f"\n\n{len(result.assignments)} neue Zuweisungen, Seed {result.seed}.")
+
+    def _open_staffing_heatmap(self):
+        from .staffing_heatmap_dialog import StaffingHeatmapDialog
+        StaffingHeatmapDialog(self, self.db_manager, self.event_combobox.currentData()).exec_()
+
+    def _open_plan_draft(self):
+        event_id = self.event_combobox.currentData()
+        if event_id == -1: return
+        from .plan_draft_dialog import PlanDraftDialog
+        dialog = PlanDraftDialog(self, self.db_manager, self.settings, event_id)
+        if dialog.exec_() == QDialog.Accepted and dialog.committed:
+            self.update_plan_view()
+
+    def _explain_proposal(self):
+        from .planning_trace_dialog import PlanningTraceDialog
+        PlanningTraceDialog(self, self.db_manager.last_planning_trace).exec_()
+
     def _check_plan(self):
         event_id = self.event_combobox.currentData()
         if event_id == -1: return
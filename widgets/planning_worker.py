@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+widgets/planning_worker.py
+
+Berechnet den automatischen Planungsvorschlag in einem eigenen Thread mit
+eigener Datenbankverbindung, damit die Oberfläche bedienbar bleibt.
+Der Fortschritt (besetzte Plätze, aktueller Zielwert) wird per Signal
+gemeldet; der bisher beste Plan bleibt immer erhalten und kann jederzeit
+übernommen werden. Gespeichert wird erst im Hauptthread.
+"""
+import math
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal, Qt
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QProgressBar, QPushButton
+
+from utils.planning_trace import PHASE_SEARCH, PHASE_IMPROVE
+
+PROGRESS_INTERVAL = 0.1  # Sekunden zwischen zwei Fortschrittsmeldungen
+
+
+class PlanningWorker(QThread):
+    """Führt DatabaseManager.compute_planning_proposal im Hintergrund aus."""
+
+    progress = pyqtSignal(str, float, float, int, int)  # phase, bruchteil, beste_kosten, besetzt, gesamt
+    plan_ready = pyqtSignal(object, object)              # PlanResult, PlanningTrace (oder None)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db_path, event_id, parent=None, **planning_args):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.event_id = event_id
+        self.planning_args = planning_args
+        self._stop_requested = False
+        self._last_emit = 0.0
+
+    def request_stop(self):
+        """Beendet die Suche beim nächsten Fortschrittsschritt; der bisher beste Plan wird geliefert."""
+        self._stop_requested = True
+
+    def run(self):
+        # Import hier, damit database_manager und planning_worker sich nicht gegenseitig laden
+        from database_manager import DatabaseManager
+        db = None
+        try:
+            db = DatabaseManager(self.db_path)  # Eigene Verbindung: sqlite3-Verbindungen gehören einem Thread
+            result = db.compute_planning_proposal(self.event_id, progress=self._on_progress, **self.planning_args)
+            self.plan_ready.emit(result, db.last_planning_trace)
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            if db: db.close()
+
+    def _on_progress(self, phase, fraction, cost, open_slots, total_slots):
+        now = time.perf_counter()
+        if now - self._last_emit >= PROGRESS_INTERVAL or fraction >= 1.0:
+            self._last_emit = now
+            self.progress.emit(phase, fraction, cost, total_slots - open_slots, total_slots)
+        return not self._stop_requested
+
+
+class PlanningProgressDialog(QDialog):
+    """Zeigt den Fortschritt eines PlanningWorker; 'Stoppen und übernehmen' liefert den bisher besten Plan."""
+
+    PHASE_TEXTS = {PHASE_SEARCH: "Durchläufe", PHASE_IMPROVE: "Nachoptimierung"}
+
+    def __init__(self, worker, parent=None):
+        super().__init__(parent)
+        self.worker = worker
+        self.result = None
+        self.trace = None
+        self.error = None
+        self.setWindowTitle("Planungsvorschlag wird berechnet")
+        self.setMinimumWidth(420)
+        self.setWindowFlags(self.windowFlags() & ~Qt.WindowCloseButtonHint)
+
+        layout = QVBoxLayout(self)
+        self.phase_label = QLabel("Lade Daten...")
+        layout.addWidget(self.phase_label)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        layout.addWidget(self.progress_bar)
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        self.stop_button = QPushButton("Stoppen und übernehmen")
+        self.stop_button.clicked.connect(self._stop)
+        self.cancel_button = QPushButton("Abbrechen")
+        self.cancel_button.clicked.connect(self._cancel)
+        button_layout.addWidget(self.stop_button)
+        button_layout.addWidget(self.cancel_button)
+        layout.addLayout(button_layout)
+
+        worker.progress.connect(self._on_progress)
+        worker.plan_ready.connect(self._on_plan_ready)
+        worker.failed.connect(self._on_failed)
+        self._cancelled = False
+
+    def exec_(self):
+        self.worker.start()
+        return super().exec_()
+
+    def _on_progress(self, phase, fraction, cost, filled, total):
+        self.phase_label.setText(f"{self.PHASE_TEXTS.get(phase, phase)}: {fraction * 100:.0f} %")
+        self.progress_bar.setValue(int(fraction * 1000))
+        if math.isnan(cost):  # Meldung aus einem laufenden Durchlauf, noch ohne Zielwert
+            self.status_label.setText(f"Aktueller Durchlauf: {filled} von {total} Plätzen besetzt")
+        else:
+            self.status_label.setText(f"Bester Plan bisher: {filled} von {total} Plätzen besetzt, Zielwert {cost:.1f}")
+
+    def _stop(self):
+        self.stop_button.setEnabled(False)
+        self.phase_label.setText("Wird beendet...")
+        self.worker.request_stop()
+
+    def _cancel(self):
+        self._cancelled = True
+        self._stop()
+
+    def _on_plan_ready(self, result, trace):
+        self.worker.wait()
+        if self._cancelled:
+            self.reject()
+            return
+        self.result, self.trace = result, trace
+        self.accept()
+
+    def _on_failed(self, message):
+        self.worker.wait()
+        self.error = message
+        self.reject()
+
+    def reject(self):
+        # Esc darf den Dialog nicht schließen, solange der Worker rechnet
+        if self.worker.isRunning() and self.result is None and self.error is None and not self._cancelled:
+            self._cancel()
+            return
+        super().reject()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+widgets/post_event_model.py
+
+Modell und Delegate für die Nachbereitung (Finaler Status je Zuweisung).
+Statt einer QComboBox pro Zeile hält das Modell Status und Vertreter in Listen
+und merkt sich den geladenen Stand; geändert (und gespeichert) werden nur Zeilen,
+die davon abweichen. Sammeländerungen wie "Alle auf Erledigt" laufen als eine
+Schleife über die Listen mit einem einzigen dataChanged.
+"""
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QBrush, QColor
+from PyQt5.QtWidgets import QStyledItemDelegate, QComboBox
+
+STATUS_OPTIONS = ['Geplant', 'Erledigt', 'Nicht Erschienen', 'Entschuldigt', 'Erledigt (durch Vertreter)']
+STATUS_SUBSTITUTE = 'Erledigt (durch Vertreter)'
+HEADERS = ["Schicht", "Aufgabe", "Geplanter Helfer", "Finaler Status", "Anmerkung (Vertreter)"]
+COL_STATUS, COL_SUBSTITUTE = 3, 4
+DIRTY_BRUSH = QBrush(QColor("#fff4c2"))
+
+
+class AssignmentStatusModel(QAbstractTableModel):
+    """Zuweisungen eines Events mit bearbeitbarem Status und Vertreter."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._clear()
+
+    def _clear(self):
+        self.assignment_ids, self.shift_texts, self.task_names, self.person_names = [], [], [], []
+        self.statuses, self.substitute_ids, self.substitute_names = [], [], []
+        self.saved = []     # geladener Stand je Zeile: (Status, Vertreter-ID)
+        self.dirty = set()  # Zeilen, die vom geladenen Stand abweichen
+
+    # --- Qt-Schnittstelle ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.assignment_ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole: return HEADERS[section]
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        return flags | Qt.ItemIsEditable if index.column() == COL_STATUS else flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        row, col = index.row(), index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if col == 0: return self.shift_texts[row]
+            if col == 1: return self.task_names[row]
+            if col == 2: return self.person_names[row]
+            if col == COL_STATUS: return self.statuses[row]
+            return self.substitute_names[row] or ""
+        if role == Qt.BackgroundRole and row in self.dirty: return DIRTY_BRUSH
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or index.column() != COL_STATUS or value == STATUS_SUBSTITUTE: return False
+        self.set_status([index.row()], value)
+        return True
+
+    # --- Befüllen und Ändern ---
+    def load(self, assignments):
+        self.beginResetModel()
+        self._clear()
+        for a in assignments:
+            self.assignment_ids.append(a['assignment_id'])
+            self.shift_texts.append(f"{a['shift_date']} {a['start_time']}-{a['end_time']}")
+            self.task_names.append(a['task_name'])
+            self.person_names.append(a['person_name'])
+            self.statuses.append(a['attendance_status'])
+            self.substitute_ids.append(a['substitute_person_id'])
+            self.substitute_names.append(a['substitute_name'])
+            self.saved.append((a['attendance_status'], a['substitute_person_id']))
+        self.endResetModel()
+
+    def _mark(self, row):
+        if (self.statuses[row], self.substitute_ids[row]) != self.saved[row]: self.dirty.add(row)
+        else: self.dirty.discard(row)
+
+    def _emit_rows(self, rows):
+        if rows: self.dataChanged.emit(self.index(min(rows), 0), self.index(max(rows), len(HEADERS) - 1))
+
+    def set_status(self, rows, status):
+        """Setzt den Status für alle Zeilen (ohne Vertreter) und meldet das als eine Änderung."""
+        rows = list(rows)
+        for row in rows:
+            self.statuses[row] = status
+            self.substitute_ids[row] = None
+            self.substitute_names[row] = None
+            self._mark(row)
+        self._emit_rows(rows)
+
+    def set_substitute(self, row, person_id, person_name):
+        self.statuses[row] = STATUS_SUBSTITUTE
+        self.substitute_ids[row] = person_id
+        self.substitute_names[row] = person_name
+        self._mark(row)
+        self._emit_rows([row])
+
+    def changes(self):
+        """[(Status, Vertreter-ID, assignment_id), ...] für alle geänderten Zeilen."""
+        return [(self.statuses[r], self.substitute_ids[r], self.assignment_ids[r]) for r in sorted(self.dirty)]
+
+    def mark_saved(self):
+        rows = list(self.dirty)
+        for row in rows: self.saved[row] = (self.statuses[row], self.substitute_ids[row])
+        self.dirty.clear()
+        self._emit_rows(rows)
+
+
+class StatusDelegate(QStyledItemDelegate):
+    """Auswahlliste für den Status; bei 'durch Vertreter' fragt pick_substitute() nach der Person
+    und liefert (person_id, Name) oder None (dann bleibt die Zeile unverändert)."""
+
+    def __init__(self, pick_substitute, parent=None):
+        super().__init__(parent)
+        self.pick_substitute = pick_substitute
+
+    def createEditor(self, parent, option, index):
+        editor = QComboBox(parent)
+        editor.addItems(STATUS_OPTIONS)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentText(index.data(Qt.EditRole))
+
+    def setModelData(self, editor, model, index):
+        status = editor.currentText()
+        if status == index.data(Qt.EditRole): return
+        if status != STATUS_SUBSTITUTE:
+            model.setData(index, status)
+            return
+        picked = self.pick_substitute()
+        if picked: model.set_substitute(index.row(), *picked)
@@ -3,11 +3,14 @@
 widgets/post_event_widget.py (mit Synchronisation)
 """
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
-    QTableWidgetItem, QLabel, QComboBox, QHeaderView, QMessageBox, QDialog,
-    QListWidget, QListWidgetItem, QDialogButtonBox, QAbstractItemView
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableView,
+    QLabel, QComboBox, QHeaderView, QMessageBox, QDialog,
+    QListWidget, QListWidgetItem, QDialogButtonBox, QAbstractItemView, QLineEdit,
+    QFileDialog, QApplication
 )
 from PyQt5.QtCore import Qt, pyqtSignal
+from .post_event_model import AssignmentStatusModel, StatusDelegate, COL_STATUS
+from .sheet_import_dialog import SheetImportDialog
 
 class PostEventWidget(QWidget):
     """Widget zur Nachbereitung von Events."""
@@ -32,12 +35,15 @@ class PostEventWidget(QWidget):
         top_bar_layout.addWidget(self.event_combobox)
         top_bar_layout.addStretch()
         main_layout.addLayout(top_bar_layout)
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels([
-            "Schicht", "Aufgabe", "Geplanter Helfer", "Finaler Status", "Anmerkung (Vertreter)"
-        ])
+        # Modell/View: Status wird per Delegate bearbeitet, geänderte Zeilen sind markiert
+        self.model = AssignmentStatusModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setItemDelegateForColumn(COL_STATUS, StatusDelegate(self._pick_substitute, self.table))
+        self.table.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.SelectedClicked | QAbstractItemView.EditKeyPressed)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.table.verticalHeader().setVisible(False)
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.Stretch)
         header.setSectionResizeMode(1, QHeaderView.Stretch)
@@ -51,11 +57,14 @@ class PostEventWidget(QWidget):
         button_layout.addWidget(self.set_all_done_button)
         button_layout.addWidget(self.set_selection_done_button)
         button_layout.addStretch()
+        self.scan_button = QPushButton("Gescannte Bögen einlesen...")
+        button_layout.addWidget(self.scan_button)
         self.save_button = QPushButton("Änderungen speichern")
         button_layout.addWidget(self.save_button)
         main_layout.addLayout(button_layout)
         self.event_combobox.currentIndexChanged.connect(self.on_event_changed)
         self.save_button.clicked.connect(self.save_changes)
+        self.scan_button.clicked.connect(self.import_scanned_sheets)
         self.set_all_done_button.clicked.connect(self.set_all_to_done)
         self.set_selection_done_button.clicked.connect(self.set_selection_to_done)
 
@@ -105,71 +114,68 @@ class PostEventWidget(QWidget):
         self.event_combobox.blockSignals(False) # Freigeben
 
     def load_assignments(self):
-        self.table.setRowCount(0)
         event_id = self.event_combobox.currentData()
-        if event_id == -1: return
-        assignments = self.db_manager.get_assignments_for_event(event_id)
-        self.table.setRowCount(len(assignments))
-        status_options = ['Geplant', 'Erledigt', 'Nicht Erschienen', 'Entschuldigt', 'Erledigt (durch Vertreter)']
-        for row_idx, assignment in enumerate(assignments):
-            shift_text = f"{assignment['shift_date']} {assignment['start_time']}-{assignment['end_time']}"
-            self.table.setItem(row_idx, 0, QTableWidgetItem(shift_text))
-            self.table.setItem(row_idx, 1, QTableWidgetItem(assignment['task_name']))
-            self.table.setItem(row_idx, 2, QTableWidgetItem(assignment['person_name']))
-            combo = QComboBox()
-            combo.addItems(status_options)
-            combo.setCurrentText(assignment['attendance_status'])
-            combo.setProperty("assignment_id", assignment['assignment_id'])
-            combo.setProperty("row", row_idx)
-            self.table.setCellWidget(row_idx, 3, combo)
-            note_item = QTableWidgetItem(assignment['substitute_name'] if assignment['substitute_name'] else "")
-            note_item.setData(Qt.UserRole, None)
-            self.table.setItem(row_idx, 4, note_item)
-            combo.currentTextChanged.connect(self.on_status_changed)
-        self.table.resizeRowsToContents()
-
-    def on_status_changed(self, text):
-        combo = self.sender()
-        row = combo.property("row")
-        if text == 'Erledigt (durch Vertreter)':
-            dialog = SubstituteDialog(self.db_manager, self)
-            if dialog.exec_() == QDialog.Accepted and dialog.selected_person_id:
-                note_item = self.table.item(row, 4)
-                note_item.setText(dialog.selected_person_name)
-                note_item.setData(Qt.UserRole, dialog.selected_person_id)
-            else:
-                combo.setCurrentText('Geplant')
-        else:
-            note_item = self.table.item(row, 4)
-            note_item.setText("")
-            note_item.setData(Qt.UserRole, None)
+        if event_id is None or event_id == -1:
+            self.model.load([])
+            return
+        self.model.load(self.db_manager.get_assignments_for_event(event_id) or [])
+
+    def _pick_substitute(self):
+        """Fragt den Vertreter ab; (person_id, Name) oder None bei Abbruch."""
+        dialog = SubstituteDialog(self.db_manager, self)
+        if dialog.exec_() == QDialog.Accepted and dialog.selected_person_id:
+            return dialog.selected_person_id, dialog.selected_person_name
+        return None
 
     def save_changes(self):
-        for row in range(self.table.rowCount()):
-            combo = self.table.cellWidget(row, 3)
-            note_item = self.table.item(row, 4)
-            assignment_id = combo.property("assignment_id")
-            new_status = combo.currentText()
-            substitute_id = note_item.data(Qt.UserRole)
-            self.db_manager.update_assignment_status(assignment_id, new_status, substitute_id)
-        QMessageBox.information(self, "Gespeichert", "Die Änderungen wurden erfolgreich gespeichert.")
-        self.load_assignments()
+        """Speichert nur geänderte Zeilen, alle in einer Transaktion."""
+        changes = self.model.changes()
+        if not changes:
+            QMessageBox.information(self, "Keine Änderungen", "Es gibt keine ungespeicherten Änderungen.")
+            return
+        if not self.db_manager.update_assignment_statuses(changes):
+            QMessageBox.critical(self, "Fehler", "Die Änderungen konnten nicht gespeichert werden.")
+            return
+        self.model.mark_saved()
+        QMessageBox.information(self, "Gespeichert", f"{len(changes)} Änderungen wurden erfolgreich gespeichert.")
 
     def set_all_to_done(self):
-        for row in range(self.table.rowCount()):
-            combo = self.table.cellWidget(row, 3)
-            if combo:
-                combo.setCurrentText("Erledigt")
+        self.model.set_status(range(self.model.rowCount()), "Erledigt")
 
     def set_selection_to_done(self):
-        selected_rows = {index.row() for index in self.table.selectedIndexes()}
+        selected_rows = {index.row() for index in self.table.selectionModel().selectedRows()}
         if not selected_rows:
             QMessageBox.information(self, "Keine Auswahl", "Bitte markieren Sie zuerst eine oder mehrere Zeilen.")
             return
-        for row in selected_rows:
-            combo = self.table.cellWidget(row, 3)
-            if combo:
-                combo.setCurrentText("Erledigt")
+        self.model.set_status(selected_rows, "Erledigt")
+
+    def import_scanned_sheets(self):
+        """Liest gescannte Nachbereitungs-Bögen ein und speichert die Ergebnisse in einer Transaktion."""
+        event_id = self.event_combobox.currentData()
+        if event_id is None or event_id == -1:
+            QMessageBox.information(self, "Kein Event", "Bitte wählen Sie zuerst ein Event aus.")
+            return
+        if self.model.dirty:
+            reply = QMessageBox.question(self, "Ungespeicherte Änderungen", "Vor dem Einlesen müssen die aktuellen Änderungen gespeichert werden. Jetzt speichern?", QMessageBox.Yes | QMessageBox.Cancel)
+            if reply != QMessageBox.Yes: return
+            self.save_changes()
+            if self.model.dirty: return  # Speichern fehlgeschlagen: nicht neu laden, sonst gehen die Änderungen verloren
+        paths, _ = QFileDialog.getOpenFileNames(self, "Gescannte Bögen auswählen", "", "Scans (*.pdf *.png *.jpg *.jpeg *.tif *.tiff *.bmp)")
+        if not paths: return
+        from utils.sheet_scanner import scan_files  # NumPy erst bei Bedarf laden
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            rows, problems = scan_files(paths)
+        finally:
+            QApplication.restoreOverrideCursor()
+        assignments = self.db_manager.get_assignments_for_event(event_id) or []
+        dialog = SheetImportDialog(self, rows, problems, assignments, self._pick_substitute)
+        if dialog.exec_() != QDialog.Accepted or not dialog.changes: return
+        if not self.db_manager.update_assignment_statuses(dialog.changes, label="Nachbereitung (Scan)"):
+            QMessageBox.critical(self, "Fehler", "Die eingelesenen Ergebnisse konnten nicht gespeichert werden.")
+            return
+        self.load_assignments()
+        QMessageBox.information(self, "Gespeichert", f"{len(dialog.changes)} Ergebnisse aus den Bögen wurden gespeichert.")
 
 class SubstituteDialog(QDialog):
     def __init__(self, db_manager, parent=None):
@@ -180,6 +186,11 @@ class SubstituteDialog(QDialog):
         self.setWindowTitle("Vertreter auswählen")
         layout = QVBoxLayout(self)
         layout.addWidget(QLabel("Bitte wählen Sie den Vertreter aus:"))
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Suchen...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self._apply_search)
+        layout.addWidget(self.search_edit)
         self.list_widget = QListWidget()
         layout.addWidget(self.list_widget)
         button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
@@ -195,8 +206,14 @@ class SubstituteDialog(QDialog):
             item.setData(Qt.UserRole, person['person_id'])
             self.list_widget.addItem(item)
 
+    def _apply_search(self, text):
+        person_ids = self.db_manager.search_person_ids(text)
+        for row in range(self.list_widget.count()):
+            item = self.list_widget.item(row)
+            item.setHidden(person_ids is not None and item.data(Qt.UserRole) not in person_ids)
+
     def accept(self):
-        if self.list_widget.currentItem():
+        if self.list_widget.currentItem() and not self.list_widget.currentItem().isHidden():
             self.selected_person_id = self.list_widget.currentItem().data(Qt.UserRole)
             self.selected_person_name = self.list_widget.currentItem().text()
         super().accept()
\ No newline at end of file
@@ -4,6 +4,8 @@ widgets/settings_dialog.py
 
 Dialog zur Verwaltung der Anwendungseinstellungen.
 """
+import os
+
 from PyQt5.QtWidgets import (
     QDialog,
     QVBoxLayout,
@@ -17,9 +19,12 @@ from PyQt5.QtWidgets import (
     QFileDialog,
     QTextEdit,
     QSpinBox,
+    QCheckBox,
 )
 from PyQt5.QtCore import pyqtSignal
 
+from utils.query_profiler import PROFILE_ENV_VAR
+
 
 class SettingsDialog(QDialog):
     """Dialog für die Anwendungseinstellungen."""
@@ -63,16 +68,19 @@ class SettingsDialog(QDialog):
         self.mandatory_spin.setValue(self.settings.get_mandatory_hours())
         form_layout.addRow("Pflichtstunden pro Jahr:", self.mandatory_spin)
 
-        # Altersgrenzen
-        self.age_bar_spin = QSpinBox()
-        self.age_bar_spin.setRange(14, 99)
-        self.age_bar_spin.setValue(self.settings.get_min_age_bar())
-        form_layout.addRow("Mindestalter 'Bar':", self.age_bar_spin)
+        # Automatische Planung
+        form_layout.addRow(QLabel("<b>Automatische Planung</b>"))
+        self.restarts_spin = QSpinBox()
+        self.restarts_spin.setRange(1, 1000)
+        self.restarts_spin.setValue(self.settings.get_planning_restarts())
+        self.restarts_spin.setToolTip("Anzahl der Planungsdurchläufe; übernommen wird der beste Plan.")
+        form_layout.addRow("Durchläufe pro Vorschlag:", self.restarts_spin)
 
-        self.age_kasse_spin = QSpinBox()
-        self.age_kasse_spin.setRange(14, 99)
-        self.age_kasse_spin.setValue(self.settings.get_min_age_kasse())
-        form_layout.addRow("Mindestalter 'Kasse':", self.age_kasse_spin)        
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, os.cpu_count() or 1)
+        self.workers_spin.setValue(min(self.settings.get_planning_workers(), self.workers_spin.maximum()))
+        self.workers_spin.setToolTip("Anzahl paralleler Prozesse (1 = im Programm selbst rechnen).")
+        form_layout.addRow("Parallele Prozesse:", self.workers_spin)
 
         # PDF-Einstellungen
         form_layout.addRow(QLabel("<b>PDF Export</b>"))
@@ -100,6 +108,34 @@ class SettingsDialog(QDialog):
         self.footer_text_input.setFixedHeight(100)
         form_layout.addRow("Footer-Text (links):", self.footer_text_input)
 
+        # --- Sicherungen ---
+        form_layout.addRow(QLabel("<b>Sicherungen</b>"))
+        self.auto_snapshot_check = QCheckBox("Automatische Schnappschüsse (täglich und vor jedem Planungsvorschlag)")
+        self.auto_snapshot_check.setChecked(self.settings.get_auto_snapshots())
+        form_layout.addRow(self.auto_snapshot_check)
+
+        self.snapshot_keep_spin = QSpinBox()
+        self.snapshot_keep_spin.setRange(1, 100)
+        self.snapshot_keep_spin.setValue(self.settings.get_snapshot_keep())
+        self.snapshot_keep_spin.setToolTip("Ältere Schnappschüsse im Ordner 'backups' neben der Datenbank werden gelöscht.")
+        form_layout.addRow("Aufbewahrte Schnappschüsse:", self.snapshot_keep_spin)
+
+        # --- Diagnose ---
+        form_layout.addRow(QLabel("<b>Diagnose</b>"))
+        self.profiling_check = QCheckBox("Datenbank-Abfragen messen (Query-Profiling)")
+        self.profiling_check.setChecked(self.settings.get_query_profiling())
+        form_layout.addRow(self.profiling_check)
+
+        self.slow_query_spin = QSpinBox()
+        self.slow_query_spin.setRange(1, 60000)
+        self.slow_query_spin.setSuffix(" ms")
+        self.slow_query_spin.setValue(self.settings.get_slow_query_ms())
+        form_layout.addRow("Langsame Abfragen ab:", self.slow_query_spin)
+
+        self.planning_trace_check = QCheckBox("Entscheidungen des Planungsvorschlags protokollieren")
+        self.planning_trace_check.setChecked(self.settings.get_planning_trace())
+        form_layout.addRow(self.planning_trace_check)
+
         # --- System-Infos ---
         form_layout.addRow(QLabel("<b>System</b>"))
         
@@ -138,12 +174,21 @@ class SettingsDialog(QDialog):
 
         self.settings.set_default_shift_duration(self.duration_spin.value())
         self.settings.set_mandatory_hours(self.mandatory_spin.value())
-        self.settings.set_min_age_bar(self.age_bar_spin.value())
-        self.settings.set_min_age_kasse(self.age_kasse_spin.value())
+        self.settings.set_planning_restarts(self.restarts_spin.value())
+        self.settings.set_planning_workers(self.workers_spin.value())
         self.settings.set_pdf_club_name(self.club_name_input.text())
         self.settings.set_feedback_email(self.feedback_email_input.text())
         self.settings.set_pdf_logo_path(self.logo_path_input.text())
         self.settings.set_pdf_footer_text(self.footer_text_input.toPlainText())
+        self.settings.set_auto_snapshots(self.auto_snapshot_check.isChecked())
+        self.settings.set_snapshot_keep(self.snapshot_keep_spin.value())
+        self.settings.set_query_profiling(self.profiling_check.isChecked())
+        self.settings.set_slow_query_ms(self.slow_query_spin.value())
+        self.settings.set_planning_trace(self.planning_trace_check.isChecked())
+
+        # Profiling sofort für die laufende Sitzung übernehmen
+        if self.profiling_check.isChecked(): self.db_manager.enable_profiling(self.slow_query_spin.value())
+        elif not os.environ.get(PROFILE_ENV_VAR): self.db_manager.disable_profiling()
 
         self.settings.save_settings()
 
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+widgets/sheet_import_dialog.py
+
+Prüfansicht für eingelesene Nachbereitungs-Bögen (utils/sheet_scanner.py).
+Sicher erkannte Zeilen werden ohne Rückfrage übernommen; unklare Zeilen
+(Kreuz nicht eindeutig, mehrere Kreuze, Vertreter) erscheinen in der Tabelle
+und werden hier entschieden. Das Ergebnis (changes) schreibt der Aufrufer
+in einer Transaktion.
+"""
+from PyQt5.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QLabel,
+    QTableWidget,
+    QTableWidgetItem,
+    QComboBox,
+    QHeaderView,
+    QDialogButtonBox,
+    QListWidget,
+    QAbstractItemView,
+)
+
+from utils.sheet_scanner import BOX_STATUSES, STATUS_SUBSTITUTE
+from .post_event_model import STATUS_OPTIONS
+
+KEEP = "Nicht ändern"
+BOX_SHORT = ("Erl.", "Vertr.", "Entsch.", "Gschw.")
+
+
+class SheetImportDialog(QDialog):
+    """Liefert nach exec_() in changes [(status, substitute_id, assignment_id), ...]."""
+
+    def __init__(self, parent, rows, problems, assignments, pick_substitute):
+        super().__init__(parent)
+        self.pick_substitute = pick_substitute
+        self.changes = []
+        self.assignments = {a['assignment_id']: a for a in assignments}
+        known = [r for r in rows if r.assignment_id in self.assignments]
+        foreign = len(rows) - len(known)
+        self.confident = [r for r in known if not r.needs_review and r.status is not None]
+        self.review = [r for r in known if r.needs_review]
+        unmarked = sum(1 for r in known if not r.needs_review and r.status is None)
+        self.substitutes = {}  # Tabellenzeile -> (person_id, Name)
+
+        self.setWindowTitle("Eingelesene Bögen prüfen")
+        self.setMinimumSize(900, 550)
+        layout = QVBoxLayout(self)
+        summary = f"<b>{len(known)} Zeilen erkannt:</b> {len(self.confident)} sicher, {len(self.review)} zur Prüfung, {unmarked} ohne Kreuz."
+        if foreign: summary += f" {foreign} Zeilen gehören zu einem anderen Event und werden ignoriert."
+        layout.addWidget(QLabel(summary))
+
+        layout.addWidget(QLabel("Zeilen zur Prüfung (sicher erkannte Zeilen werden direkt übernommen):"))
+        self.table = QTableWidget(len(self.review), 6)
+        self.table.setHorizontalHeaderLabels(["Helfer", "Schicht", "Bogen", "Füllgrad", "Hinweis", "Status"])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        for row_idx, row in enumerate(self.review):
+            a = self.assignments[row.assignment_id]
+            self.table.setItem(row_idx, 0, QTableWidgetItem(a['person_name']))
+            self.table.setItem(row_idx, 1, QTableWidgetItem(f"{a['shift_date']} {a['start_time']}-{a['end_time']} {a['task_name']}"))
+            self.table.setItem(row_idx, 2, QTableWidgetItem(row.source))
+            self.table.setItem(row_idx, 3, QTableWidgetItem("  ".join(f"{name} {fill:.0%}" for name, fill in zip(BOX_SHORT, row.fills))))
+            self.table.setItem(row_idx, 4, QTableWidgetItem(row.reason))
+            combo = QComboBox()
+            combo.addItems([KEEP] + STATUS_OPTIONS)
+            combo.setCurrentText(row.status if row.status in BOX_STATUSES and row.status != STATUS_SUBSTITUTE else KEEP)
+            combo.currentTextChanged.connect(lambda text, r=row_idx: self._on_status_changed(r, text))
+            self.table.setCellWidget(row_idx, 5, combo)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        layout.addWidget(self.table, 1)
+
+        if problems:
+            layout.addWidget(QLabel("Hinweise:"))
+            problem_list = QListWidget()
+            problem_list.addItems(problems)
+            problem_list.setMaximumHeight(100)
+            layout.addWidget(problem_list)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.button(QDialogButtonBox.Ok).setText("Übernehmen und speichern")
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def _on_status_changed(self, table_row, text):
+        self.substitutes.pop(table_row, None)
+        if text != STATUS_SUBSTITUTE: return
+        picked = self.pick_substitute()
+        if picked:
+            self.substitutes[table_row] = picked
+            self.table.item(table_row, 4).setText(f"Vertreter: {picked[1]}")
+        else:
+            self.table.cellWidget(table_row, 5).setCurrentText(KEEP)
+
+    def accept(self):
+        self.changes = [(r.status, None, r.assignment_id) for r in self.confident]
+        for table_row, row in enumerate(self.review):
+            status = self.table.cellWidget(table_row, 5).currentText()
+            if status == KEEP: continue
+            if status == STATUS_SUBSTITUTE:
+                person_id = self.substitutes.get(table_row, (None,))[0]
+                if person_id is None: continue
+                self.changes.append((status, person_id, row.assignment_id))
+            else:
+                self.changes.append((status, None, row.assignment_id))
+        super().accept()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+widgets/staffing_heatmap_dialog.py
+
+Besetzung je Tag als Heatmap: eine Zeile pro offenem Event, eine Spalte pro Tag.
+Die Zellen zeigen besetzt/benötigt, die Farbe den Besetzungsgrad (rot -> grün);
+Schichten ohne Teamleiter werden zusätzlich markiert. Alle Werte stammen aus
+DatabaseManager.get_staffing_rollup (eine Aggregat-Abfrage für alle Events).
+"""
+from PyQt5.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QLabel,
+    QTableWidget,
+    QTableWidgetItem,
+    QAbstractItemView,
+    QDialogButtonBox,
+)
+from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtGui import QBrush, QColor, QFont
+
+CLOSED_STATUSES = ("Abgeschlossen", "Abgesagt")
+
+
+def heat_color(ratio):
+    """Besetzungsgrad 0..1 -> Farbton von Rot über Gelb nach Grün (pastell, damit der Text lesbar bleibt)."""
+    return QColor.fromHsv(int(120 * max(0.0, min(1.0, ratio))), 90, 245)
+
+
+class StaffingHeatmapDialog(QDialog):
+    def __init__(self, parent, db_manager, current_event_id=None):
+        super().__init__(parent)
+        self.setWindowTitle("Besetzung je Tag")
+        self.setMinimumSize(900, 400)
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Besetzte/benötigte Plätze je Event und Tag. ⚑ = Schichten ohne Teamleiter (Anzahl im Tooltip)."))
+
+        events = [e for e in db_manager.get_all_events() if e["status"] not in CLOSED_STATUSES]
+        rollup = db_manager.get_staffing_rollup([e["event_id"] for e in events])
+        events = [e for e in events if rollup[e["event_id"]]["days"]]
+        days = sorted({day for e in events for day in rollup[e["event_id"]]["days"]})
+
+        self.table = QTableWidget(len(events), len(days) + 1)
+        self.table.setHorizontalHeaderLabels(["Gesamt"] + [QDate.fromString(d, "yyyy-MM-dd").toString("ddd dd.MM.") for d in days])
+        self.table.setVerticalHeaderLabels([e["name"] for e in events])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionMode(QAbstractItemView.NoSelection)
+        day_columns = {day: col for col, day in enumerate(days, start=1)}
+        for row, event in enumerate(events):
+            entry = rollup[event["event_id"]]
+            self.table.setItem(row, 0, self._cell(entry["total"], bold=True))
+            for day, counts in entry["days"].items():
+                self.table.setItem(row, day_columns[day], self._cell(counts))
+            if event["event_id"] == current_event_id:
+                header_item = self.table.verticalHeaderItem(row)
+                font = header_item.font(); font.setBold(True); header_item.setFont(font)
+        self.table.resizeColumnsToContents()
+        layout.addWidget(self.table, 1)
+        if not events: layout.addWidget(QLabel("Keine offenen Events mit Schichten vorhanden."))
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def _cell(self, counts, bold=False):
+        required, assigned = counts["required"], counts["assigned"]
+        text = f"{assigned}/{required}" + (" ⚑" if counts["missing_tl"] else "")
+        item = QTableWidgetItem(text)
+        item.setTextAlignment(Qt.AlignCenter)
+        ratio = (required - counts["open"]) / required if required else 1.0
+        item.setBackground(QBrush(heat_color(ratio)))
+        item.setToolTip(f"Benötigt: {required}\nBesetzt: {assigned}\nOffen: {counts['open']}\nSchichten ohne Teamleiter: {counts['missing_tl']}")
+        if bold:
+            font = QFont(); font.setBold(True); item.setFont(font)
+        return item
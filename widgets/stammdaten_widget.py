@@ -7,15 +7,14 @@ Widget zur Verwaltung der Mitglieder-Stammdaten.
 
 import os
 
-from datetime import datetime
 from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QLabel,
+    QLineEdit,
     QAbstractItemView,
     QHeaderView,
     QMessageBox,
@@ -24,8 +23,10 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 from .person_dialog import PersonDialog
+from .person_table_model import PersonTableModel, PersonFilterProxy
 from .import_dialog import ImportDialog
 from utils.exporter import Exporter
+from utils.unavailability import CSV_COLUMNS, read_unavailability_csv
 
 
 class StammdatenWidget(QWidget):
@@ -48,30 +49,37 @@ class StammdatenWidget(QWidget):
         self.template_button = QPushButton("Vorlage herunterladen")
         self.import_button = QPushButton("Mitglieder importieren...")
         self.export_button = QPushButton("Mitglieder exportieren...")
+        self.absence_import_button = QPushButton("Abwesenheiten importieren...")
+        self.absence_import_button.setToolTip("CSV-Datei mit den Spalten " + ", ".join(CSV_COLUMNS) + "\n(Datum als TT.MM.JJJJ; ohne Uhrzeit gilt der ganze Tag)")
         top_layout.addWidget(self.template_button)
         top_layout.addWidget(self.import_button)
         top_layout.addWidget(self.export_button)
+        top_layout.addWidget(self.absence_import_button)
         layout.addLayout(top_layout)
 
-        self.persons_table = QTableWidget()
-        self.column_map = {
-            "ID": "person_id", "Status": "status", "Vorname": "first_name",
-            "Nachname": "last_name", "Anzeigename": "display_name",
-            "Geburtsdatum": "birth_date", "Straße": "street", "PLZ": "postal_code",
-            "Ort": "city", "E-Mail": "email", "Telefon 1": "phone1",
-            "Telefon 2": "phone2", "Eintritt": "entry_date", "Austritt": "exit_date",
-            "Notizen": "notes"
-        }
-        self.persons_table.setColumnCount(len(self.column_map))
-        self.persons_table.setHorizontalHeaderLabels(self.column_map.keys())
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Suchen (Name, Ort, E-Mail, Notizen)...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.apply_search)
+        layout.addWidget(self.search_edit)
+
+        # Modell/View statt QTableWidget: keine Item-Objekte je Zelle, Sortierung im Proxy
+        self.persons_model = PersonTableModel(self)
+        self.persons_proxy = PersonFilterProxy(self)
+        self.persons_proxy.setSourceModel(self.persons_model)
+        self.persons_table = QTableView()
+        self.persons_table.setModel(self.persons_proxy)
         self.persons_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.persons_table.setSelectionMode(QAbstractItemView.SingleSelection)
         self.persons_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.persons_table.verticalHeader().setVisible(False)
         self.persons_table.setAlternatingRowColors(True)
         self.persons_table.hideColumn(0)
         
-        # NEU: Sortierung durch Klick auf den Header erlauben
+        # Sortierung durch Klick auf den Header erlauben
         self.persons_table.setSortingEnabled(True)
+        self.persons_table.sortByColumn(3, Qt.AscendingOrder)
+        self._columns_sized = False
         
         layout.addWidget(self.persons_table)
 
@@ -91,50 +99,45 @@ class StammdatenWidget(QWidget):
         self.template_button.clicked.connect(self.download_template)
         self.import_button.clicked.connect(self.import_members)
         self.export_button.clicked.connect(self.export_members)
-
-    def _format_date_for_display(self, date_str_from_db):
-        if not date_str_from_db:
-            return ""
-        try:
-            date_obj = datetime.strptime(date_str_from_db, "%Y-%m-%d")
-            return date_obj.strftime("%d.%m.%Y")
-        except (ValueError, TypeError):
-            return date_str_from_db
+        self.absence_import_button.clicked.connect(self.import_unavailability)
 
     def load_persons_data(self):
-        """Lädt alle Personendaten aus der Datenbank und füllt die Tabelle."""
-        # Merke dir die aktuelle Sortierung
-        header = self.persons_table.horizontalHeader()
-        sort_column = header.sortIndicatorSection()
-        sort_order = header.sortIndicatorOrder()
-
-        # Blockiere die Sortierung während des Füllens, um Performance zu verbessern
-        self.persons_table.setSortingEnabled(False)
-
-        persons = self.db_manager.get_all_persons()
-        self.persons_table.setRowCount(len(persons))
-        date_columns = ['birth_date', 'entry_date', 'exit_date']
-        for row_idx, person in enumerate(persons):
-            for col_idx, db_key in enumerate(self.column_map.values()):
-                value = person[db_key]
-                item_text = self._format_date_for_display(value) if db_key in date_columns else (str(value) if value is not None else "")
-                self.persons_table.setItem(row_idx, col_idx, QTableWidgetItem(item_text))
-        
-        # Aktiviere die Sortierung wieder
-        self.persons_table.setSortingEnabled(True)
-        
-        # Stelle die ursprüngliche Sortierung wieder her
-        self.persons_table.sortByColumn(sort_column, sort_order)
+        """Lädt alle Personendaten aus der Datenbank in das Modell.
+        Die Sortierung übernimmt der Proxy und bleibt dabei erhalten."""
+        self.persons_model.load(self.db_manager.get_all_persons())
+        if self.search_edit.text(): self.apply_search()
+        if not self._columns_sized and self.persons_model.rowCount():
+            # Nur einmal und nur anhand der ersten Zeilen, sonst misst Qt jede Zelle aus
+            self.persons_table.horizontalHeader().setResizeContentsPrecision(200)
+            self.persons_table.resizeColumnsToContents()
+            self._columns_sized = True
+
+    def apply_search(self, text=None):
+        """Filtert die Tabelle auf die Treffer der Volltextsuche."""
+        self.persons_proxy.set_person_ids(self.db_manager.search_person_ids(self.search_edit.text() if text is None else text))
+
+    def reload_person(self, person_id):
+        """Lädt nur die Zeile einer geänderten oder neu angelegten Person nach."""
+        person = self.db_manager.get_person_by_id(person_id) if person_id is not None else None
+        if person is None:
+            self.load_persons_data()
+            return
+        self.persons_model.update_person(person)
+        if self.search_edit.text(): self.apply_search()
 
-        self.persons_table.resizeColumnsToContents()
+    def _selected_source_row(self):
+        """Zeile der Auswahl im Modell (nicht in der sortierten Ansicht) oder -1."""
+        index = self.persons_table.currentIndex()
+        if not index.isValid(): return -1
+        return self.persons_proxy.mapToSource(index).row()
 
     def add_person(self):
         dialog = PersonDialog(self.db_manager, parent=self)
-        dialog.data_changed.connect(self.load_persons_data)
+        dialog.data_changed.connect(lambda: self.reload_person(dialog.person_id))
         dialog.exec_()
 
     def edit_person(self):
-        selected_row = self.persons_table.currentRow()
+        selected_row = self._selected_source_row()
         if selected_row < 0:
             QMessageBox.warning(
                 self,
@@ -142,15 +145,15 @@ class StammdatenWidget(QWidget):
                 "Bitte wählen Sie zuerst ein Mitglied aus der Liste aus.",
             )
             return
-        person_id = int(self.persons_table.item(selected_row, 0).text())
+        person_id = self.persons_model.person_id(selected_row)
         dialog = PersonDialog(
             self.db_manager, person_id=person_id, parent=self
         )
-        dialog.data_changed.connect(self.load_persons_data)
+        dialog.data_changed.connect(lambda: self.reload_person(person_id))
         dialog.exec_()
 
     def delete_person(self):
-        selected_row = self.persons_table.currentRow()
+        selected_row = self._selected_source_row()
         if selected_row < 0:
             QMessageBox.warning(
                 self,
@@ -158,8 +161,8 @@ class StammdatenWidget(QWidget):
                 "Bitte wählen Sie zuerst ein Mitglied aus der Liste aus.",
             )
             return
-        person_id = int(self.persons_table.item(selected_row, 0).text())
-        display_name = self.persons_table.item(selected_row, 4).text()
+        person_id = self.persons_model.person_id(selected_row)
+        display_name = self.persons_model.value(selected_row, "display_name") or ""
         reply = QMessageBox.question(
             self,
             "Löschen bestätigen",
@@ -170,7 +173,7 @@ class StammdatenWidget(QWidget):
         )
         if reply == QMessageBox.Yes:
             self.db_manager.delete_person(person_id)
-            self.load_persons_data()
+            self.persons_model.remove_person(person_id)
             QMessageBox.information(
                 self,
                 "Erfolg",
@@ -236,3 +239,28 @@ class StammdatenWidget(QWidget):
         result = dialog.exec_()
         if result == QDialog.Accepted:
             self.load_persons_data()
+
+    def import_unavailability(self):
+        """Liest Abwesenheiten aus einer CSV-Datei; die Mitglieder werden über den Anzeigenamen zugeordnet."""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Abwesenheiten importieren",
+            self.settings.get_last_export_path(),
+            "CSV-Dateien (*.csv)",
+        )
+        if not file_path:
+            return
+        try:
+            rows = read_unavailability_csv(file_path)
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.critical(self, "Fehler beim Lesen", f"Die Datei konnte nicht gelesen werden:\n{e}")
+            return
+        if rows and "display_name" not in rows[0]:
+            QMessageBox.critical(self, "Fehler", "Die Datei enthält keine Spalte 'display_name'.\n\nErwartete Spalten: " + ", ".join(CSV_COLUMNS))
+            return
+
+        added, skipped = self.db_manager.import_unavailability(rows)
+        message = f"{added} Abwesenheiten wurden übernommen."
+        if skipped:
+            message += f"\n{skipped} Zeilen wurden übersprungen (unbekannter Anzeigename, ungültiges Datum oder bereits erfasst)."
+        QMessageBox.information(self, "Import abgeschlossen", message)